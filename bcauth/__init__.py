@@ -1 +1,2 @@
 """django-allauth customizations for browsercompat."""
+default_app_config = 'bcauth.apps.BcAuthConfig'
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""Application configuration."""
+from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
+
+
+class BcAuthConfig(AppConfig):
+    """Configuration for the bcauth app."""
+
+    name = 'bcauth'
+    verbose_name = 'BrowserCompat Auth'
+
+    def ready(self):
+        """Register signal handlers when models are loaded."""
+        super(BcAuthConfig, self).ready()
+        from django.contrib.auth.models import User
+        from oauth2_provider.models import AccessToken
+        from bcauth.oauth2p.validators import (
+            invalidate_access_token, invalidate_user_tokens)
+
+        # Drop cached access tokens on token and user changes
+        post_delete.connect(
+            invalidate_access_token,
+            sender=AccessToken,
+            dispatch_uid='post_delete_invalidate_access_token')
+        post_save.connect(
+            invalidate_access_token,
+            sender=AccessToken,
+            dispatch_uid='post_save_invalidate_access_token')
+        post_save.connect(
+            invalidate_user_tokens,
+            sender=User,
+            dispatch_uid='post_save_invalidate_user_tokens')
@@ -3,11 +3,18 @@
 
 from __future__ import unicode_literals
 
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.urlresolvers import reverse
 from django.test import RequestFactory
+from django.utils import timezone
 from oauth2_provider.exceptions import FatalClientError, OAuthToolkitError
 from oauth2_provider.http import HttpResponseUriRedirect
+from oauth2_provider.models import AccessToken, Application
 
 from webplatformcompat.tests.base import TestCase
+from .validators import get_access_token
 from .views import MyAuthorizationView
 
 
@@ -42,3 +49,57 @@ class TestMyAuthorizationView(TestCase):
         error = OAuthToolkitError(error=base_error)
         response = self.view.error_response(error)
         self.assertIsInstance(response, HttpResponseUriRedirect)
+
+
+class TestCachedOAuth2Validator(TestCase):
+    """Test the cached validation of access tokens."""
+
+    def setUp(self):
+        self.user = User.objects.create(username='user')
+        app = Application.objects.create(
+            user=self.user, client_type='public',
+            authorization_grant_type='implicit', name='Test App')
+        self.token = AccessToken.objects.create(
+            user=self.user, token='token', application=app,
+            expires=timezone.now() + timedelta(seconds=300), scope='read')
+        self.url = reverse('v2:user-me')
+
+    def get(self):
+        return self.client.get(
+            self.url, HTTP_AUTHORIZATION='Bearer %s' % self.token.token)
+
+    def test_token_cached(self):
+        self.assertEqual(self.token.pk, get_access_token('token').pk)
+        with self.assertNumQueries(0):
+            access_token = get_access_token('token')
+        self.assertEqual(self.user.pk, access_token.user.pk)
+        self.assertEqual('Test App', access_token.application.name)
+
+    def test_token_not_found(self):
+        self.assertIsNone(get_access_token('other'))
+
+    def test_expired_token_not_cached(self):
+        self.token.expires = timezone.now() - timedelta(seconds=1)
+        self.token.save()
+        get_access_token('token')
+        with self.assertNumQueries(1):
+            get_access_token('token')
+
+    def test_request_authenticated(self):
+        self.assertEqual(302, self.get().status_code)
+        with self.assertNumQueries(0):
+            response = self.get()
+        self.assertEqual(302, response.status_code)
+
+    def test_revoked_token(self):
+        self.assertEqual(302, self.get().status_code)
+        self.token.revoke()
+        self.assertIn(self.get().status_code, (401, 403))
+
+    def test_user_changed(self):
+        get_access_token('token')
+        self.user.is_active = False
+        self.user.save()
+        with self.assertNumQueries(1):
+            access_token = get_access_token('token')
+        self.assertFalse(access_token.user.is_active)
@@ -0,0 +1,74 @@
+"""Overrides for oauth2_provider.oauth2_validators."""
+
+from hashlib import sha1
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from oauth2_provider.models import AccessToken
+from oauth2_provider.oauth2_validators import OAuth2Validator
+
+
+def get_token_key(token):
+    return 'oauth2_token:%s' % sha1(force_bytes(token)).hexdigest()
+
+
+def get_access_token(token):
+    """Return the AccessToken for a bearer token, or None.
+
+    Valid tokens are cached for OAUTH2_TOKEN_CACHE_SECONDS, or until they
+    expire, if sooner.
+    """
+    key = get_token_key(token)
+    access_token = cache.get(key)
+    if access_token is None:
+        try:
+            access_token = AccessToken.objects.select_related(
+                'application', 'user').get(token=token)
+        except AccessToken.DoesNotExist:
+            return None
+        remaining = (access_token.expires - timezone.now()).total_seconds()
+        timeout = min(settings.OAUTH2_TOKEN_CACHE_SECONDS, int(remaining))
+        if timeout > 0:
+            cache.set(key, access_token, timeout)
+    return access_token
+
+
+def invalidate_access_token(sender, instance, **kwargs):
+    """Drop a cached token when it is changed or revoked."""
+    cache.delete(get_token_key(instance.token))
+
+
+def invalidate_user_tokens(sender, instance, created, raw, **kwargs):
+    """Drop the cached tokens of a user when the user is updated."""
+    if raw or created:
+        return
+    tokens = AccessToken.objects.filter(
+        user=instance).values_list('token', flat=True)
+    cache.delete_many([get_token_key(token) for token in tokens])
+
+
+class CachedOAuth2Validator(OAuth2Validator):
+    """Validate OAuth2 requests.
+
+    Same as oauth2_provider.oauth2_validators.OAuth2Validator, except
+    that access tokens, with the application and user, are loaded from the
+    cache.
+    """
+
+    def validate_bearer_token(self, token, scopes, request):
+        """Check that the provided token is valid, using the cache."""
+        if not token:
+            return False
+
+        access_token = get_access_token(token)
+        if access_token and access_token.is_valid(scopes):
+            request.client = access_token.application
+            request.user = access_token.user
+            request.scopes = scopes
+
+            # this is needed by django rest framework
+            request.access_token = access_token
+            return True
+        return False
@@ -12,6 +12,7 @@ from json import dumps
 from time import time
 import logging
 
+from six.moves.urllib.parse import parse_qs, urlparse
 import requests
 
 logger = logging.getLogger('tools.client')
@@ -22,13 +23,18 @@ class APIException(Exception):
 
 
 class Client(object):
-    """Client for talking to the browsercompat API."""
+    """Client for talking to the browsercompat API.
+
+    use_bulk controls the use of the v2 bulk operations endpoint.  If None
+    (the default), it is tried, and set to False if the API doesn't have it.
+    """
 
     def __init__(self, base_url):
         self.base_url = base_url
         self._session = None
         self.csrftoken = None
         self.changeset = None
+        self.use_bulk = None
 
     @property
     def session(self):
@@ -37,19 +43,20 @@ class Client(object):
             self._session = requests.Session()
         return self._session
 
-    def url(self, resource_type, resource_id=None):
+    def url(self, resource_type, resource_id=None, version='v1'):
         """Build the URL for a resource."""
-        url = self.base_url + '/api/v1/' + resource_type
+        url = self.base_url + '/api/' + version + '/' + resource_type
         if resource_id:
             url += '/' + resource_id
         return url
 
     def request(
             self, method, resource_type, resource_id=None, params=None,
-            data=None, json_params=None):
+            data=None, json_params=None, version='v1',
+            expected_statuses=None):
         """Request data from the API."""
         start = time()
-        url = self.url(resource_type, resource_id)
+        url = self.url(resource_type, resource_id, version)
 
         # Setup parameters
         params = params or {}
@@ -62,12 +69,13 @@ class Client(object):
             headers['X-CSRFToken'] = self.csrftoken
         if method in change_methods and self.changeset:
             params['use_changeset'] = self.changeset
-        if method in create_methods:
-            expected_statuses = [201]
-        elif method in delete_methods:
-            expected_statuses = [204, 404]
-        else:
-            expected_statuses = [200]
+        if expected_statuses is None:
+            if method in create_methods:
+                expected_statuses = [201]
+            elif method in delete_methods:
+                expected_statuses = [204, 404]
+            else:
+                expected_statuses = [200]
         if data:
             data_json = dumps(data)
         else:
@@ -175,6 +183,32 @@ class Client(object):
         # Response is empty, but return it.
         return response
 
+    def bulk(self, operations):
+        """Apply a list of operations with the v2 bulk endpoint.
+
+        Keyword arguments:
+        operations -- A list of JSON API v1.0 operations, such as:
+          {'op': 'add', 'data': {'type': 'browsers', 'lid': 'b1', ...}}
+
+        The return is a list of results, one per operation, such as:
+          {'data': {'type': 'browsers', 'id': '1', 'lid': 'b1'}}
+        If the API doesn't have the bulk endpoint, use_bulk is set to False,
+        and the return is None.  On failure, an APIException is raised.
+        """
+        data = {'atomic:operations': operations}
+        try:
+            response = self.request(
+                'POST', 'bulk', data=data, version='v2',
+                expected_statuses=[200])
+        except APIException as error:
+            if self.use_bulk is None and error.args[1] == 404:
+                logger.info('Bulk operations are not supported.')
+                self.use_bulk = False
+                return None
+            raise
+        self.use_bulk = True
+        return response['atomic:results']
+
     def get_resource_collection(self, resource_type, log_at=15):
         """Get all the resources of a type as a single JSON API response.
 
@@ -185,12 +219,11 @@ class Client(object):
         """
         data = None
         next_url = True
-        page = 0
+        params = {'page[cursor]': ''}
         count = None
         total = None
         last_time = time()
         while next_url:
-            page += 1
             current_time = time()
             if data and log_at >= 0 and (current_time - last_time) > log_at:
                 count = float(len(data[resource_type]))
@@ -199,7 +232,6 @@ class Client(object):
                     '  Loaded %d of %d %s (%d%%)...',
                     count, total, resource_type, percent)
                 last_time = current_time
-            params = {'page': page}
             response = self.request(
                 'GET', resource_type, params=params,
                 json_params={'object_pairs_hook': OrderedDict})
@@ -210,10 +242,27 @@ class Client(object):
                 data = response.copy()
                 total = data['meta']['pagination'][resource_type]['count']
             next_url = response['meta']['pagination'][resource_type]['next']
+            if next_url:
+                params = self.next_page_params(next_url)
         data['meta']['pagination'][resource_type]['previous'] = None
         data['meta']['pagination'][resource_type]['next'] = None
         return data
 
+    def next_page_params(self, next_url):
+        """Get the query parameters for the next page of a collection.
+
+        Cursor pagination is requested, and the count is skipped after the
+        first page.  Servers without cursor pagination ignore page[cursor],
+        and return page-numbered next links.
+        """
+        query = urlparse(next_url).query
+        params = dict(
+            (name, values[-1]) for name, values in parse_qs(
+                query, keep_blank_values=True).items())
+        if 'page' not in params:
+            params['page[count]'] = '0'
+        return params
+
 
 if __name__ == '__main__':
     from math import log10, trunc
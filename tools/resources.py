@@ -694,6 +694,8 @@ class CollectionChangeset(object):
                 my_item._original = orig_item
                 self.changes['changed'][k] = my_item
 
+    bulk_size = 500
+
     def change_original_collection(self, checkpoint=100):
         """Commit changes to the original Collection.
 
@@ -701,6 +703,9 @@ class CollectionChangeset(object):
         -- logger_name - The name of the logger that gets progress message
         -- checkpoint - Item count between progress messages
 
+        If the client can use bulk operations, changes are sent in batches of
+        bulk_size operations.  Otherwise, they are sent one at a time.
+
         Return is a dictionary of resource types to a dictionary of actions
         ('new', 'deleted', 'changed') and the counts of those actions.
         """
@@ -711,45 +716,146 @@ class CollectionChangeset(object):
 
         counts = defaultdict(lambda: defaultdict(int))
         try:
-            for item in self.changes['new'].values():
-                resource_type = item._resource_type
+            changed_in_bulk = (
+                client.use_bulk is not False and
+                self._change_in_bulk(client, counts, checkpoint))
+            if not changed_in_bulk:
+                self._change_one_at_a_time(client, counts, checkpoint)
+        finally:
+            logger.info('Closing changeset, updating cache...')
+            client.close_changeset()
+        return counts
+
+    def _ordered_changes(self):
+        """Return the changes as (action, item) pairs, in write order."""
+        changes = [('new', item) for item in self.changes['new'].values()]
+        if not self.skip_deletes:
+            changes.extend(
+                ('deleted', item) for item in self.changes['deleted'].values())
+        changes.extend(
+            ('changed', item) for item in self.changes['changed'].values())
+        return changes
+
+    def _count_change(self, counts, resource_type, action, checkpoint):
+        """Count a change, logging progress at checkpoints."""
+        counts[resource_type][action] += 1
+        count = counts[resource_type][action]
+        if (count % checkpoint == 0):  # pragma nocover
+            verb = {
+                'new': 'Imported', 'deleted': 'Deleted', 'changed': 'Changed'}
+            logger.info('%s %d %s' % (verb[action], count, resource_type))
+
+    def _set_new_id(self, item, new_id):
+        """Point links to a created item at its new ID."""
+        resource_type = item._resource_type
+        if not item.id:
+            item.id = Link.NoId()
+        old_id = item.id.linked_id
+        item._collection._override_ids.setdefault(
+            resource_type, {})[old_id] = new_id
+
+    def _change_one_at_a_time(self, client, counts, checkpoint):
+        """Commit changes with one request per change."""
+        for action, item in self._ordered_changes():
+            resource_type = item._resource_type
+            if action == 'new':
                 json_api = item.to_json_api(with_sorted=False)
                 response = client.create(
                     resource_type, json_api[resource_type])
-                if not item.id:
-                    item.id = Link.NoId()
-                old_id = item.id.linked_id
-                new_id = response['id']
-                item._collection._override_ids.setdefault(
-                    resource_type, {})[old_id] = new_id
-                counts[resource_type]['new'] += 1
-                count = counts[resource_type]['new']
-                if (count % checkpoint == 0):  # pragma nocover
-                    logger.info('Imported %d %s' % (count, resource_type))
-
-            if not self.skip_deletes:
-                for item in self.changes['deleted'].values():
-                    resource_type = item._resource_type
-                    client.delete(resource_type, item.id.id)
-                    item._collection.remove(item)
-                    counts[resource_type]['deleted'] += 1
-                    count = counts[resource_type]['deleted']
-                    if (count % checkpoint == 0):  # pragma nocover
-                        logger.info('Deleted %d %s' % (count, resource_type))
-
-            for item in self.changes['changed'].values():
+                self._set_new_id(item, response['id'])
+            elif action == 'deleted':
+                client.delete(resource_type, item.id.id)
+                item._collection.remove(item)
+            else:
                 json_api = item.to_json_api()
-                resource_type = item._resource_type
                 client.update(
                     resource_type, item.id.id, json_api[resource_type])
-                counts[resource_type]['changed'] += 1
-                count = counts[resource_type]['changed']
-                if (count % checkpoint == 0):  # pragma nocover
-                    logger.info('Changed %d %s' % (count, resource_type))
-        finally:
-            logger.info('Closing changeset, updating cache...')
-            client.close_changeset()
-        return counts
+            self._count_change(counts, resource_type, action, checkpoint)
+
+    def _change_in_bulk(self, client, counts, checkpoint):
+        """Commit changes in batches of bulk operations.
+
+        Return is False if the client can't use bulk operations.
+        """
+        changes = self._ordered_changes()
+        for start in range(0, len(changes), self.bulk_size):
+            batch = changes[start:start + self.bulk_size]
+            pending = set()
+            for action, item in batch:
+                if action == 'new' and item.id:
+                    pending.add((item._resource_type, item.id.linked_id))
+            operations = [
+                self._bulk_operation(action, item, seq, pending)
+                for seq, (action, item) in enumerate(batch)]
+            results = client.bulk(operations)
+            if results is None:
+                assert start == 0, 'Bulk operations stopped working.'
+                return False
+            for (action, item), result in zip(batch, results):
+                if action == 'new':
+                    self._set_new_id(item, result['data']['id'])
+                elif action == 'deleted':
+                    item._collection.remove(item)
+                self._count_change(
+                    counts, item._resource_type, action, checkpoint)
+        return True
+
+    def _bulk_operation(self, action, item, seq, pending):
+        """Convert a change to a JSON API v1.0 bulk operation.
+
+        Keyword Arguments:
+        action -- 'new', 'deleted', or 'changed'
+        item -- the changed resource
+        seq -- the position of the operation in the batch
+        pending -- (type, local ID) pairs of resources created in the batch
+        """
+        resource_type = item._resource_type
+        if action == 'deleted':
+            return OrderedDict((
+                ('op', 'remove'),
+                ('ref', OrderedDict((
+                    ('type', resource_type),
+                    ('id', str(item.id.id)))))))
+
+        json_api = item.to_json_api(with_sorted=(action == 'changed'))
+        attributes = json_api[resource_type].copy()
+        attributes.pop('links', None)
+        data = OrderedDict((('type', resource_type),))
+        if action == 'new':
+            op = 'add'
+            if item.id and not isinstance(item.id.linked_id, Link.NoId):
+                data['lid'] = str(item.id.linked_id)
+            else:
+                data['lid'] = 'new.%d' % seq
+        else:
+            op = 'update'
+            data['id'] = str(item.id.id)
+        data['attributes'] = attributes
+
+        relationships = OrderedDict()
+        for name in sorted(json_api[resource_type].get('links', {})):
+            link = item._data[name]
+            if isinstance(link, LinkList):
+                linkage = [
+                    self._bulk_identifier(l, pending) for l in link.links]
+            else:
+                linkage = self._bulk_identifier(link, pending)
+            relationships[name] = {'data': linkage}
+        if relationships:
+            data['relationships'] = relationships
+        return OrderedDict((('op', op), ('data', data)))
+
+    def _bulk_identifier(self, link, pending):
+        """Convert a link to a resource identifier for a bulk operation."""
+        if (link.linked_type, link.linked_id) in pending:
+            key = 'lid'
+            value = link.linked_id
+        else:
+            key = 'id'
+            value = link.id
+            if value is None:
+                return None
+        return OrderedDict((('type', link.linked_type), (key, str(value))))
 
     def summarize(self):
         """Get human-friendly summary of changes."""
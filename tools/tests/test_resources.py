@@ -7,7 +7,7 @@ from unittest import TestCase as BaseTestCase
 from collections import OrderedDict
 import mock
 
-from tools.client import Client
+from tools.client import APIException, Client
 from tools.resources import (
     Browser, Collection, CollectionChangeset, Feature, Maturity, Reference,
     Section, Specification, Support, Version, Link, LinkList)
@@ -772,6 +772,7 @@ class TestCollectionChangeset(TestCase):
         self.client = Client('http://example.com')
         self.client.request = mock.Mock()
         self.client.request.side_effect = Exception('should not be called')
+        self.client.use_bulk = False  # Bulk operations are tested separately
         self.orig_col = Collection(self.client)
         self.new_col = Collection()
 
@@ -842,6 +843,89 @@ class TestCollectionChangeset(TestCase):
         changes = cc.change_original_collection()
         self.assertEqual(expected, changes)
 
+    def fake_bulk_request(self, bulk_response):
+        """Return a fake request function for bulk operations."""
+        def fake_request(
+                method, resource_type, resource_id=None, params=None,
+                data=None, version='v1', expected_statuses=None):
+            if method == 'POST' and resource_type == 'changesets':
+                return {'changesets': {'id': '_changeset'}}
+            elif method == 'POST' and resource_type == 'bulk':
+                self.assertEqual('v2', version)
+                self.bulk_data = data
+                return bulk_response(data['atomic:operations'])
+            else:
+                assert (method == 'PUT' and resource_type == 'changesets'), \
+                    'Unexpected request: %s' % repr(locals())
+                return {'changesets': {'id': '_changeset', 'closed': True}}
+        return fake_request
+
+    def test_change_original_new_items_in_bulk(self):
+        _, cc = self.setup_new()
+        self.client.use_bulk = None
+
+        def bulk_response(operations):
+            return {'atomic:results': [
+                {'data': {'type': 'browsers', 'id': '1', 'lid': '_chrome'}},
+                {'data': {'type': 'versions', 'id': '2', 'lid': 'new.1'}},
+            ]}
+        self.client.request.side_effect = self.fake_bulk_request(
+            bulk_response)
+        expected = {
+            'browsers': {'new': 1},
+            'versions': {'new': 1},
+        }
+        changes = cc.change_original_collection()
+        self.assertEqual(expected, changes)
+        expected_operations = [{
+            'op': 'add',
+            'data': {
+                'type': 'browsers',
+                'lid': '_chrome',
+                'attributes': {'slug': 'chrome'},
+            },
+        }, {
+            'op': 'add',
+            'data': {
+                'type': 'versions',
+                'lid': 'new.1',
+                'attributes': {'version': '2.0'},
+                'relationships': {
+                    'browser': {
+                        'data': {'type': 'browsers', 'lid': '_chrome'}},
+                },
+            },
+        }]
+        self.assertEqual(
+            expected_operations, self.bulk_data['atomic:operations'])
+        self.assertTrue(self.client.use_bulk)
+        self.assertEqual(
+            '1', self.new_col.get_override_id('browsers', '_chrome'))
+
+    def test_change_original_bulk_not_supported(self):
+        _, cc = self.setup_new()
+        self.client.use_bulk = None
+
+        def fake_request(
+                method, resource_type, resource_id=None, params=None,
+                data=None, version='v1', expected_statuses=None):
+            if resource_type == 'bulk':
+                raise APIException('Not found', 404, '', '')
+            elif method == 'POST' and resource_type == 'changesets':
+                return {'changesets': {'id': '_changeset'}}
+            elif method == 'POST':
+                return {resource_type: {'id': '_' + resource_type}}
+            else:
+                return {'changesets': {'id': '_changeset', 'closed': True}}
+        self.client.request.side_effect = fake_request
+        expected = {
+            'browsers': {'new': 1},
+            'versions': {'new': 1},
+        }
+        changes = cc.change_original_collection()
+        self.assertEqual(expected, changes)
+        self.assertFalse(self.client.use_bulk)
+
     def test_summary_new_items(self):
         _, cc = self.setup_new()
         expected = """\
@@ -1166,6 +1250,38 @@ Deleted http://example.com/api/v1/versions/_chrome_2:
         changes = cc.change_original_collection()
         self.assertEqual(expected, changes)
 
+    def test_change_original_matched_items_in_bulk(self):
+        _, cc = self.setup_matched()
+        self.client.use_bulk = True
+
+        def bulk_response(operations):
+            return {'atomic:results': [
+                {'data': {'type': 'versions', 'id': '1'}},
+            ]}
+        self.client.request.side_effect = self.fake_bulk_request(
+            bulk_response)
+        changes = cc.change_original_collection()
+        self.assertEqual({'versions': {'changed': 1}}, changes)
+        expected_operations = [{
+            'op': 'update',
+            'data': {
+                'type': 'versions',
+                'id': '1',
+                'attributes': {
+                    'version': '2.0',
+                    'note': {
+                        'en': 'Second Version',
+                        'es': 'Segunda Versi\xf3n',
+                    },
+                },
+                'relationships': {
+                    'browser': {'data': {'type': 'browsers', 'id': '1'}},
+                },
+            },
+        }]
+        self.assertEqual(
+            expected_operations, self.bulk_data['atomic:operations'])
+
     def test_summary_matched_items(self):
         _, cc = self.setup_matched()
         expected = """\
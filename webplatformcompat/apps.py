@@ -1,7 +1,8 @@
 # -*- coding: utf-8 -*-
 """Application configuration."""
 from django.apps import AppConfig
-from django.db.models.signals import post_delete, post_save
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_save)
 
 
 class WebPlatformCompatConfig(AppConfig):
@@ -13,16 +14,22 @@ class WebPlatformCompatConfig(AppConfig):
     def ready(self):
         """Register signal handlers when models are loaded."""
         super(WebPlatformCompatConfig, self).ready()
-        from django.contrib.auth.models import User
+        from django.contrib.auth.models import Group, User
         from webplatformcompat.history import Changeset
         from webplatformcompat.models import (
             Browser, Feature, Maturity, Reference, Section, Specification,
             Support, Version)
         from webplatformcompat.signals import (
             add_user_to_change_resource_group,
+            invalidate_group_permissions,
+            invalidate_slug_lookup,
+            m2m_changed_user_permissions,
             post_delete_update_cache,
             post_save_changeset,
-            post_save_update_cache)
+            post_save_slug_lookup,
+            post_save_update_cache,
+            post_save_user_permissions,
+            pre_save_slug_lookup)
 
         # Add default API permissions to new users
         post_save.connect(
@@ -30,6 +37,30 @@ class WebPlatformCompatConfig(AppConfig):
             sender=User,
             dispatch_uid='add_user_to_change_resource_group')
 
+        # Drop cached permission snapshots on user and group changes
+        post_save.connect(
+            post_save_user_permissions,
+            sender=User,
+            dispatch_uid='post_save_user_permissions')
+        for through in (User.groups.through, User.user_permissions.through):
+            m2m_changed.connect(
+                m2m_changed_user_permissions,
+                sender=through,
+                dispatch_uid='m2m_changed_user_permissions_%s' % (
+                    through.__name__))
+        m2m_changed.connect(
+            invalidate_group_permissions,
+            sender=Group.permissions.through,
+            dispatch_uid='m2m_changed_invalidate_group_permissions')
+        post_save.connect(
+            invalidate_group_permissions,
+            sender=Group,
+            dispatch_uid='post_save_invalidate_group_permissions')
+        post_delete.connect(
+            invalidate_group_permissions,
+            sender=Group,
+            dispatch_uid='post_delete_invalidate_group_permissions')
+
         # Invalidate instance cache on model changes
         for model in (
                 Browser, Feature, Maturity, Reference, Section,
@@ -44,6 +75,22 @@ class WebPlatformCompatConfig(AppConfig):
                 sender=model,
                 dispatch_uid='post_save_update_cache_%s' % name)
 
+        # Update cached slug lookups on model changes
+        for model in (Browser, Feature, Maturity, Specification):
+            name = model.__name__
+            post_delete.connect(
+                invalidate_slug_lookup,
+                sender=model,
+                dispatch_uid='post_delete_invalidate_slug_lookup_%s' % name)
+            pre_save.connect(
+                pre_save_slug_lookup,
+                sender=model,
+                dispatch_uid='pre_save_slug_lookup_%s' % name)
+            post_save.connect(
+                post_save_slug_lookup,
+                sender=model,
+                dispatch_uid='post_save_slug_lookup_%s' % name)
+
         # Invalidate user instance cache on changeset creation
         post_save.connect(
             post_save_changeset,
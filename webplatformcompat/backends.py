@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Authentication backends with cached permissions.
+
+The groups and permissions of a user are loaded once and stored in the cache
+as a snapshot, for up to PERMISSION_SNAPSHOT_TIMEOUT seconds.  Changes to the
+user, their groups, or their permissions drop their snapshot.  Changes to a
+group, its permissions, or its deletion replace a generation token, dropping
+every snapshot.
+"""
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+
+from .replicas import get_cache_timeout
+from .utils import get_generation, new_generation
+
+generation_key = 'permission_snapshot_generation'
+
+
+def get_snapshot_key(user_pk):
+    return 'permission_snapshot:%s:%s' % (
+        get_generation(generation_key), user_pk)
+
+
+def load_permission_snapshot(user):
+    """Load the group names and permissions of a user."""
+    def perm_names(perms):
+        perms = perms.values_list('content_type__app_label', 'codename')
+        return set('%s.%s' % (ct, name) for ct, name in perms.order_by())
+
+    groups = sorted(user.groups.values_list('name', flat=True))
+    if user.is_superuser:
+        user_perms = group_perms = perm_names(Permission.objects.all())
+    else:
+        user_perms = perm_names(user.user_permissions.all())
+        group_perms = perm_names(
+            Permission.objects.filter(group__user=user))
+    return {'groups': groups, 'user': user_perms, 'group': group_perms}
+
+
+def get_permission_snapshot(user):
+    """Return the cached group names and permissions of a user."""
+    key = get_snapshot_key(user.pk)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = load_permission_snapshot(user)
+        cache.set(
+            key, snapshot,
+            get_cache_timeout(settings.PERMISSION_SNAPSHOT_TIMEOUT))
+    return snapshot
+
+
+def invalidate_permission_snapshot(user_pk):
+    """Drop the cached snapshot of a user."""
+    cache.delete(get_snapshot_key(user_pk))
+
+
+def invalidate_permission_snapshots():
+    """Drop the cached snapshots of all users."""
+    new_generation(generation_key)
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend that loads permissions from the cached snapshot."""
+
+    def _get_permissions(self, user_obj, obj, from_name):
+        if (not user_obj.is_active or user_obj.is_anonymous() or
+                obj is not None):
+            return set()
+
+        perm_cache_name = '_%s_perm_cache' % from_name
+        if not hasattr(user_obj, perm_cache_name):
+            snapshot = get_permission_snapshot(user_obj)
+            setattr(user_obj, perm_cache_name, set(snapshot[from_name]))
+        return getattr(user_obj, perm_cache_name)
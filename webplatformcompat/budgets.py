@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""Count the database, cache, and task work done for each request.
+
+RequestStatsMiddleware counts the SQL queries, cache reads and writes, and
+Celery task dispatches of a request, along with the time spent in queries
+and cache calls.  The counts are logged for the resolved view and action,
+and added to the New Relic transaction when the agent is installed.
+
+REQUEST_BUDGETS sets limits for endpoints, keyed by the view name (such as
+'v2:viewfeatures-detail'), or by the view name and action (such as
+'v2:browser-list.create').  A request that exceeds a limit is logged, or, if
+REQUEST_BUDGETS_STRICT is set, raises BudgetExceeded.  Tests opt in to strict
+budgets with assertWithinBudget.
+"""
+
+from functools import wraps
+import logging
+from threading import local
+from time import time
+
+from celery.signals import before_task_publish, task_prerun
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+try:
+    import newrelic.agent
+except ImportError:
+    newrelic = None
+
+logger = logging.getLogger(__name__)
+
+# The RequestStats collecting in the current thread
+_active = local()
+
+# The counter for each cache method
+CACHE_METHODS = {
+    'get': 'cache_gets',
+    'get_many': 'cache_gets',
+    'has_key': 'cache_gets',
+    'set': 'cache_sets',
+    'set_many': 'cache_sets',
+    'add': 'cache_sets',
+    'delete': 'cache_sets',
+    'delete_many': 'cache_sets',
+}
+
+
+class BudgetExceeded(AssertionError):
+    """A request exceeded the budget for the endpoint."""
+
+
+def get_active_stats():
+    """Return the RequestStats collecting in this thread."""
+    if not hasattr(_active, 'stats'):
+        _active.stats = []
+        _active.in_cache_call = False
+    return _active.stats
+
+
+def count_cache_calls(method, counter):
+    """Wrap a cache method to count calls and time."""
+    @wraps(method)
+    def counted(*args, **kwargs):
+        stats = get_active_stats()
+        if not stats or _active.in_cache_call:
+            # Some methods, such as locmem get_many, call other methods
+            return method(*args, **kwargs)
+        _active.in_cache_call = True
+        start = time()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _active.in_cache_call = False
+            elapsed = time() - start
+            for request_stats in stats:
+                request_stats.counts[counter] += 1
+                request_stats.counts['cache_time'] += elapsed
+    return counted
+
+
+def instrument_caches():
+    """Count the calls to this thread's cache backends."""
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        if getattr(backend, '_count_calls', False):
+            continue
+        for name, counter in CACHE_METHODS.items():
+            setattr(backend, name, count_cache_calls(
+                getattr(backend, name), counter))
+        backend._count_calls = True
+
+
+def count_task(**kwargs):
+    """Count a task dispatch.
+
+    Eager tasks (as in tests) are run rather than published, so they are
+    counted when run.
+    """
+    task = kwargs.get('task')
+    if task is not None and not task.request.is_eager:
+        return
+    for request_stats in get_active_stats():
+        request_stats.counts['tasks'] += 1
+
+
+before_task_publish.connect(count_task, dispatch_uid='budgets_publish')
+task_prerun.connect(count_task, dispatch_uid='budgets_prerun')
+
+
+class RequestStats(object):
+    """Count the queries, cache calls, and tasks of a block of code."""
+
+    fields = (
+        'queries', 'query_time', 'cache_gets', 'cache_sets', 'cache_time',
+        'tasks')
+
+    def __init__(self):
+        self.counts = dict((field, 0) for field in self.fields)
+        self._connections = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def start(self):
+        """Start counting."""
+        for connection in connections.all():
+            self._connections.append((
+                connection, connection.force_debug_cursor,
+                len(connection.queries_log)))
+            connection.force_debug_cursor = True
+        instrument_caches()
+        get_active_stats().append(self)
+
+    def stop(self):
+        """Stop counting, and total the queries."""
+        get_active_stats().remove(self)
+        for connection, force_debug_cursor, initial in self._connections:
+            connection.force_debug_cursor = force_debug_cursor
+            queries = connection.queries[initial:]
+            self.counts['queries'] += len(queries)
+            self.counts['query_time'] += sum(
+                float(query['time']) for query in queries)
+        self._connections = []
+
+    def over_budget(self, budget):
+        """Return descriptions of the counts that exceed a budget."""
+        over = []
+        for field in self.fields:
+            limit = budget.get(field)
+            if limit is not None and self.counts[field] > limit:
+                over.append('%s=%s (limit %s)' % (
+                    field, self.format(field), limit))
+        return over
+
+    def format(self, field):
+        value = self.counts[field]
+        if field.endswith('_time'):
+            return '%.3f' % value
+        return str(value)
+
+    def __str__(self):
+        return ' '.join(
+            '%s=%s' % (field, self.format(field)) for field in self.fields)
+
+
+def get_endpoint(request, response):
+    """Return the view name and action of a request."""
+    match = getattr(request, 'resolver_match', None)
+    name = match.view_name if match else None
+    view = (getattr(response, 'renderer_context', None) or {}).get('view')
+    action = getattr(view, 'action', None) or request.method.lower()
+    return name, action
+
+
+def get_budget(name, action):
+    """Return the budget for an endpoint, or None."""
+    budgets = getattr(settings, 'REQUEST_BUDGETS', {})
+    return budgets.get('%s.%s' % (name, action), budgets.get(name))
+
+
+class RequestStatsMiddleware(object):
+    """Count the work of each request, and check the endpoint budget."""
+
+    def process_request(self, request):
+        if settings.USE_REQUEST_STATS:
+            request.stats = RequestStats()
+            request.stats.start()
+
+    def process_exception(self, request, exception):
+        stats = getattr(request, 'stats', None)
+        if stats is not None and stats in get_active_stats():
+            stats.stop()
+
+    def process_response(self, request, response):
+        stats = getattr(request, 'stats', None)
+        if stats is None or stats not in get_active_stats():
+            return response
+        stats.stop()
+        name, action = get_endpoint(request, response)
+        logger.info('Request stats for %s.%s: %s', name, action, stats)
+        if newrelic is not None:
+            for field in stats.fields:
+                newrelic.agent.add_custom_parameter(
+                    field, stats.counts[field])
+
+        budget = get_budget(name, action)
+        over = budget and stats.over_budget(budget)
+        if over:
+            message = 'Request budget exceeded for %s.%s: %s' % (
+                name, action, ', '.join(over))
+            if getattr(settings, 'REQUEST_BUDGETS_STRICT', False):
+                raise BudgetExceeded(message)
+            logger.warning(message)
+        return response
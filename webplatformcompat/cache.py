@@ -4,7 +4,9 @@ from django.conf import settings
 from django.contrib.auth.models import User
 
 from drf_cached_instances.cache import BaseCache
+from .backends import get_permission_snapshot
 from .history import Changeset
+from .replicas import ReplicaCacheProxy, is_reading_replica
 from .models import (
     Browser, Feature, Maturity, Reference, Section, Specification, Support,
     Version)
@@ -16,6 +18,14 @@ class Cache(BaseCache):
     versions = ('v1',)
     default_version = 'v1'
 
+    @property
+    def cache(self):
+        """Get the Django cache, limiting timeouts for replica reads."""
+        cache = super(Cache, self).cache
+        if cache and is_reading_replica():
+            return ReplicaCacheProxy(cache)
+        return cache
+
     def browser_v1_serializer(self, obj):
         if not obj:
             return None
@@ -30,7 +40,7 @@ class Cache(BaseCache):
                 pks=obj._history_pks),
             self.field_to_json(
                 'PK', 'history_current', model=obj.history.model,
-                pk=obj._history_pks[0]),
+                pk=obj.current_history_id),
             self.field_to_json(
                 'PKList', 'versions', model=Version, pks=obj._version_pks),
         ))
@@ -175,7 +185,7 @@ class Cache(BaseCache):
                 pks=obj._history_pks),
             self.field_to_json(
                 'PK', 'history_current', model=obj.history.model,
-                pk=obj._history_pks[0]),
+                pk=obj.current_history_id),
         ))
 
     def feature_v1_loader(self, pk):
@@ -236,7 +246,7 @@ class Cache(BaseCache):
                 pks=obj._history_pks),
             self.field_to_json(
                 'PK', 'history_current', model=obj.history.model,
-                pk=obj._history_pks[0]),
+                pk=obj.current_history_id),
         ))
 
     def maturity_v1_loader(self, pk):
@@ -278,7 +288,7 @@ class Cache(BaseCache):
                 pks=obj._history_pks),
             self.field_to_json(
                 'PK', 'history_current', model=obj.history.model,
-                pk=obj._history_pks[0]),
+                pk=obj.current_history_id),
         ))
 
     def reference_v1_loader(self, pk):
@@ -326,7 +336,7 @@ class Cache(BaseCache):
                 pks=obj._history_pks),
             self.field_to_json(
                 'PK', 'history_current', model=obj.history.model,
-                pk=obj._history_pks[0]),
+                pk=obj.current_history_id),
         ))
 
     def section_v1_loader(self, pk):
@@ -370,7 +380,7 @@ class Cache(BaseCache):
                 pks=obj._history_pks),
             self.field_to_json(
                 'PK', 'history_current', model=obj.history.model,
-                pk=obj._history_pks[0]),
+                pk=obj.current_history_id),
         ))
 
     def specification_v1_loader(self, pk):
@@ -419,7 +429,7 @@ class Cache(BaseCache):
                 pks=obj._history_pks),
             self.field_to_json(
                 'PK', 'history_current', model=obj.history.model,
-                pk=obj._history_pks[0]),
+                pk=obj.current_history_id),
         ))
 
     def support_v1_loader(self, pk):
@@ -466,7 +476,7 @@ class Cache(BaseCache):
                 pks=obj._history_pks),
             self.field_to_json(
                 'PK', 'history_current', model=obj.history.model,
-                pk=obj._history_pks[0]),
+                pk=obj.current_history_id),
         ))
 
     def version_v1_loader(self, pk):
@@ -509,7 +519,7 @@ class Cache(BaseCache):
     def user_v1_add_related_pks(self, obj):
         """Add related primary keys and data to a User instance."""
         if not hasattr(obj, 'group_names'):
-            obj.group_names = sorted(obj.groups.values_list('name', flat=True))
+            obj.group_names = get_permission_snapshot(obj)['groups']
         if not hasattr(obj, '_changeset_pks'):
             obj._changeset_pks = list(
                 obj.changesets.values_list('pk', flat=True))
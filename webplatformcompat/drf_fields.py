@@ -55,8 +55,14 @@ class CurrentHistoryField(PrimaryKeyRelatedField):
         this object.  In some views, such as the browsable API for the list,
         the object is not set, so we leave it as the none() queryset set in
         initialize.
+
+        Model instances have a denormalized current_history_id, so the
+        history is only queried for other objects, such as cached instances.
         """
-        return self.queryset.values_list('history_id', flat=True)[0]
+        history_id = getattr(obj, 'current_history_id', None)
+        if history_id is None:
+            history_id = self.queryset.values_list('history_id', flat=True)[0]
+        return history_id
 
 
 class HistoricalObjectField(PrimaryKeyRelatedField):
@@ -167,6 +173,20 @@ class OptionalIntegerField(IntegerField):
             return 0
 
 
+def prune_languages(value, languages):
+    """Omit translations not in languages, a set of lowercase languages.
+
+    If languages is None, or none of the languages are in the value, it is
+    returned unchanged.
+    """
+    if languages is None:
+        return value
+    pruned = OrderedDict(
+        (lang, text) for lang, text in value.items()
+        if lang.lower() in languages)
+    return pruned or value
+
+
 class TranslatedTextField(CharField):
     """Field is a dictionary of language codes to text.
 
@@ -177,6 +197,9 @@ class TranslatedTextField(CharField):
 
     If blank=True, then empty strings and other falsy values are allowed, and
     are serialized as null.
+
+    If the serializer context has a set of lowercase "languages", then other
+    languages are omitted from the serialized data.
     """
 
     def __init__(self, *args, **kwargs):
@@ -198,10 +221,14 @@ class TranslatedTextField(CharField):
                 for lang in sorted(value.keys()):
                     if lang != 'en':
                         out[lang] = value[lang]
-                return out
+                return self.prune_languages(out)
         else:
             return None
 
+    def prune_languages(self, value):
+        """Omit languages not in the serializer context's languages."""
+        return prune_languages(value, self.context.get('languages'))
+
     def to_internal_value(self, value):
         """Convert from serializable data to model."""
         if isinstance(value, dict):
@@ -4,7 +4,7 @@
 from django.utils.translation import ugettext_lazy as _
 
 from rest_framework.exceptions import APIException
-from rest_framework.status import HTTP_400_BAD_REQUEST
+from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_410_GONE
 from rest_framework.views import exception_handler as base_handler
 
 
@@ -36,6 +36,17 @@ class NotImplementedQueryParam(InvalidQueryParam):
     detail_fmt = _('Query parameter "%(query_param)s" is not implemented.')
 
 
+class HistoryArchived(APIException):
+    """The requested changeset is before the compacted history.
+
+    compact_history archives the historical records before a floor, so the
+    snapshots and diffs of earlier changesets are no longer available.
+    """
+
+    status_code = HTTP_410_GONE
+    default_detail = _('The history of this changeset has been archived.')
+
+
 def handler(exc, context):
     """
     Return the response that should be used for any given exception.
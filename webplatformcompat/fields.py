@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 """Fields for Django models."""
+import re
+
+from django.db.models import F, Func, TextField
 from django_extensions.db.fields.json import JSONField
 
 from .validators import LanguageDictValidator
@@ -14,3 +17,34 @@ class TranslatedField(JSONField):
             'validators', [LanguageDictValidator(self.allow_canonical)])
         super(TranslatedField, self).__init__(
             validators=validators, *args, **kwargs)
+
+
+class TranslatedValue(Func):
+    """The string for one locale of a TranslatedField, for sorting.
+
+    The locale is part of the SQL, rather than a parameter, so that the
+    database can match the expression to an expression index, such as:
+
+    CREATE INDEX ... ON webplatformcompat_browser
+        (json_extract(name, '$."en"'));            -- SQLite
+    CREATE INDEX ... ON webplatformcompat_browser
+        (((name)::json ->> 'en'));                 -- PostgreSQL
+    """
+
+    locale_re = re.compile(r'^[A-Za-z]{2,3}(-[A-Za-z0-9]+)*$')
+
+    def __init__(self, field_name, locale, **extra):
+        assert self.locale_re.match(locale), 'Invalid locale "%s"' % locale
+        self.locale = locale
+        super(TranslatedValue, self).__init__(
+            F(field_name), output_field=TextField(), **extra)
+
+    def as_sql(self, compiler, connection):
+        template = "json_extract(%%(expressions)s, '$.\"%s\"')" % self.locale
+        return super(TranslatedValue, self).as_sql(
+            compiler, connection, template=template)
+
+    def as_postgresql(self, compiler, connection):
+        template = "((%%(expressions)s)::json ->> '%s')" % self.locale
+        return super(TranslatedValue, self).as_sql(
+            compiler, connection, template=template)
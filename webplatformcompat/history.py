@@ -2,16 +2,20 @@
 """Extensions of simplehistory for webplatformcompat."""
 
 from __future__ import unicode_literals
+from datetime import timedelta
 from json import dumps
 
 from django.conf import settings
 from django.db import models
 from django.http import HttpResponseBadRequest
 from django.utils.timezone import now
+from django_extensions.db.fields.json import JSONField
 
 from simple_history.middleware import (
     HistoryRequestMiddleware as BaseHistoryRequestMiddleware)
 from simple_history.models import HistoricalRecords as BaseHistoricalRecords
+from simple_history.models import (
+    HistoricalObjectDescriptor as BaseHistoricalObjectDescriptor)
 
 
 user_model = getattr(settings, 'AUTH_USER_MODEL', 'auth.User')
@@ -62,13 +66,95 @@ class Changeset(models.Model):
         """Refresh cache of the items updated in changeset."""
         super(Changeset, self).save(*args, **kwargs)
         if self.closed and update_cache:
-            from .tasks import update_cache_for_instance
+            from .tasks import update_cache_for_instances
+            instances = []
             for relation in self._meta.get_all_related_objects():
                 related = getattr(self, relation.get_accessor_name())
                 type_name = related.model.instance_type.__name__
-                ids = related.values_list('id', flat=True)
-                for i in ids:
-                    update_cache_for_instance.delay(type_name, i)
+                # An object may have several records in a changeset
+                ids = related.order_by().values_list('id', flat=True)
+                instances.extend((type_name, i) for i in sorted(set(ids)))
+            if instances:
+                update_cache_for_instances.delay(instances)
+
+
+def get_stale_cutoff():
+    """Return the creation time before which open changesets are stale.
+
+    A stale changeset was probably abandoned by its client, so the change
+    feed moves past it rather than waiting for it to be closed.
+    """
+    return now() - timedelta(seconds=settings.CHANGESET_MAX_OPEN_SECONDS)
+
+
+class HistoryCompaction(models.Model):
+    """A run of compact_history that archived older historical records.
+
+    Snapshots before the floor are incomplete after a compaction, so the
+    highest floor is the lowest changeset that can be requested with as_of.
+    """
+
+    created = models.DateTimeField(auto_now_add=True)
+    floor = models.PositiveIntegerField(
+        help_text='Lowest changeset ID with complete history')
+    archive = models.CharField(
+        help_text='Path of the archive of the removed records',
+        max_length=255, blank=True)
+
+
+def start_bulk_changeset(request):
+    """Collect the rest of a request's changes in a single changeset.
+
+    This is used by views that make many changes in one request.  Cache
+    updates are delayed until the changeset is closed by the middleware,
+    so that each changed instance is refreshed once.
+    """
+    request = getattr(request, '_request', request)  # Unwrap DRF request
+    request.bulk_changeset = True
+    request.delay_cache = True
+
+
+def delay_response_cache_invalidation():
+    """Expire cached responses when the current write request is done.
+
+    Return False if there is no write request, and the caller should expire
+    them now.
+    """
+    request = getattr(HistoricalRecords.thread, 'request', None)
+    if getattr(request, 'invalidate_response_cache', None) is None:
+        return False
+    request.invalidate_response_cache = True
+    return True
+
+
+def is_cache_delayed(instance):
+    """Return True if cache updates wait until the changeset is closed."""
+    if getattr(instance, '_delay_cache', False):
+        return True
+    request = getattr(HistoricalRecords.thread, 'request', None)
+    return getattr(request, 'bulk_changeset', False)
+
+
+class HistoricalObjectDescriptor(BaseHistoricalObjectDescriptor):
+    """Construct the historical object, skipping excluded fields.
+
+    The historical object is the object as of the historical record, so
+    current_history_id is the history_id of the record.
+    """
+
+    def __init__(self, model, excluded_fields):
+        super(HistoricalObjectDescriptor, self).__init__(model)
+        self.excluded_fields = excluded_fields
+
+    def __get__(self, instance, owner):
+        values = dict(
+            (f.attname, getattr(instance, f.attname))
+            for f in self.model._meta.fields
+            if f.name not in self.excluded_fields)
+        obj = self.model(**values)
+        if 'current_history_id' in self.excluded_fields:
+            obj.current_history_id = instance.history_id
+        return obj
 
 
 class HistoricalRecords(BaseHistoricalRecords):
@@ -76,14 +162,21 @@ class HistoricalRecords(BaseHistoricalRecords):
 
     Changes from simple_history:
     * Can add additional fields (e.g., preserve relationship order)
+    * Can exclude fields (e.g., denormalized pointers to history)
     * References a history_changeset instead of a history_user
+    * Maintains the current_history_id pointer on the instance
+    * Indexes records by (id, history_changeset), for point-in-time reads
+    * Has a history_archive field for the stored archived representation
     """
 
     additional_fields = {}
+    excluded_fields = ('current_history_id',)
 
     def copy_fields(self, model):
-        """Add additional_fields to the historic model."""
+        """Add additional_fields and drop excluded_fields."""
         fields = super(HistoricalRecords, self).copy_fields(model)
+        for name in self.excluded_fields:
+            fields.pop(name, None)
         for name, field in self.additional_fields.items():
             assert name not in fields
             assert hasattr(self, 'get_%s_value' % name)
@@ -91,14 +184,25 @@ class HistoricalRecords(BaseHistoricalRecords):
         return fields
 
     def get_extra_fields(self, model, fields):
-        """Remove fields moved to changeset."""
+        """Remove fields moved to changeset, add changeset and archive."""
         extra_fields = super(HistoricalRecords, self).get_extra_fields(
             model, fields)
         related_name = 'historical_' + model._meta.verbose_name_plural.lower()
         extra_fields['history_changeset'] = models.ForeignKey(
             'Changeset', related_name=related_name)
+        extra_fields['history_object'] = HistoricalObjectDescriptor(
+            model, self.excluded_fields)
+        extra_fields['history_archive'] = JSONField(
+            help_text='Archived representation, stored on creation.',
+            null=True, blank=True, editable=False)
         return extra_fields
 
+    def get_meta_options(self, model):
+        """Index records by object and changeset, for snapshot queries."""
+        meta_fields = super(HistoricalRecords, self).get_meta_options(model)
+        meta_fields['index_together'] = [('id', 'history_changeset')]
+        return meta_fields
+
     def get_history_changeset(self, instance):
         """Get the changeset from the instance or middleware."""
         # Load user from instance or request
@@ -128,23 +232,52 @@ class HistoricalRecords(BaseHistoricalRecords):
 
         Changes from simple_history:
         * Add data from additional_fields
+        * Omit data from excluded_fields
         * Change history_user to history_changeset
+        * Store the archived representation in history_archive
+        * Update the instance's current_history_id
         """
         history_date = getattr(instance, '_history_date', now())
         history_changeset = self.get_history_changeset(instance)
         manager = getattr(instance, self.manager_name)
         attrs = {}
         for field in instance._meta.fields:
-            attrs[field.attname] = getattr(instance, field.attname)
+            if field.name not in self.excluded_fields:
+                attrs[field.attname] = getattr(instance, field.attname)
 
         for field_name in self.additional_fields:
             loader = getattr(self, 'get_%s_value' % field_name)
             value = loader(instance, type)
             attrs[field_name] = value
 
-        manager.create(
+        historical = manager.model(
             history_date=history_date, history_type=history_type,
             history_changeset=history_changeset, **attrs)
+        historical.history_archive = self.build_history_archive(historical)
+        historical.save(force_insert=True, using=manager.db)
+        if history_type != '-':
+            self.set_current_history(instance, historical.history_id)
+
+    def build_history_archive(self, historical):
+        """Build the archived representation of a new historical record."""
+        from .serializers import HISTORICAL_SERIALIZERS
+        # Values are as assigned (such as date strings), not as loaded
+        for field in historical._meta.fields:
+            value = getattr(historical, field.attname)
+            setattr(historical, field.attname, field.to_python(value))
+        serializer = HISTORICAL_SERIALIZERS[type(historical)]()
+        return serializer.build_archived_representation(historical)
+
+    def set_current_history(self, instance, history_id):
+        """Point the instance at the new historical record.
+
+        This uses an UPDATE rather than a save, so it is part of the same
+        transaction as the historical record, without triggering another
+        round of post_save signals.
+        """
+        instance.current_history_id = history_id
+        type(instance)._default_manager.filter(pk=instance.pk).update(
+            current_history_id=history_id)
 
 
 class HistoryChangesetMiddleware(BaseHistoryRequestMiddleware):
@@ -157,8 +290,11 @@ class HistoryChangesetMiddleware(BaseHistoryRequestMiddleware):
             return
         request.changeset = None
         request.close_changeset = False
+        request.bulk_changeset = False
         # Default is to update cached objects as they are modified
         request.delay_cache = False
+        # Cached responses are expired once, in process_response
+        request.invalidate_response_cache = False
 
         changeset_id = request.GET.get('use_changeset')
         if changeset_id:
@@ -188,8 +324,24 @@ class HistoryChangesetMiddleware(BaseHistoryRequestMiddleware):
         changeset = getattr(request, 'changeset', None)
         close_changeset = getattr(request, 'close_changeset', True)
         update_cache = getattr(request, 'delay_cache', False)
+        request.bulk_changeset = False
         if changeset and close_changeset:
-            # Close changeset, but assume related item caches already updated
             changeset.closed = True
-            changeset.save(update_cache=update_cache)
+            if update_cache:
+                # Refresh the delayed caches of the changed items
+                changeset.save(update_cache=True)
+            else:
+                # Related item caches were updated as they were saved, so
+                # skip the save signals and the walk of related items.
+                from .replicas import update_open_changesets
+                changeset.modified = now()
+                Changeset.objects.filter(pk=changeset.pk).update(
+                    closed=True, modified=changeset.modified)
+                update_open_changesets(changeset)
+        # Expire cached responses once for the changes in the request
+        invalidate = getattr(request, 'invalidate_response_cache', None)
+        request.invalidate_response_cache = None
+        if invalidate:
+            from .response_cache import ResponseCache
+            ResponseCache().invalidate()
         return response
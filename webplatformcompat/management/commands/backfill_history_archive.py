@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""Store archived representations for existing historical records."""
+from __future__ import unicode_literals
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from webplatformcompat.serializers import HISTORICAL_SERIALIZERS
+from webplatformcompat.snapshot import RESOURCES
+
+
+class Command(BaseCommand):
+    """Fill history_archive for historical records created without it.
+
+    New historical records store their archived representation when they
+    are created.  Records created before history_archive was added are
+    serialized on every read, until this command stores their archive.  It
+    can be run repeatedly, and only updates records with an empty archive.
+    """
+
+    help = 'Store archived representations for existing historical records.'
+    batch_size = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, dest='batch_size',
+            default=self.batch_size,
+            help='Records to update per transaction.')
+
+    def handle(self, *args, **options):
+        total = 0
+        for resource_type, (model, _) in RESOURCES.items():
+            count = self.backfill(model, options['batch_size'])
+            if count:
+                self.stdout.write(
+                    '%s: %d historical records.' % (resource_type, count))
+            total += count
+        self.stdout.write(
+            'Stored archives for %d historical records.' % total)
+
+    def backfill(self, model, batch_size):
+        """Store the archives for a model's records, in batches.
+
+        Return is the count of updated records.
+        """
+        historical = model.history.model
+        serializer = HISTORICAL_SERIALIZERS[historical]()
+        missing = historical.objects.filter(history_archive__isnull=True)
+        count, last_id = 0, 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    missing.filter(history_id__gt=last_id)
+                    .order_by('history_id')[:batch_size])
+                for record in batch:
+                    archive = serializer.build_archived_representation(record)
+                    historical.objects.filter(
+                        history_id=record.history_id).update(
+                            history_archive=archive)
+            count += len(batch)
+            if len(batch) < batch_size:
+                return count
+            last_id = batch[-1].history_id
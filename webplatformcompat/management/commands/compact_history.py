@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""Move superseded historical records to a compressed archive file."""
+from __future__ import unicode_literals
+
+from datetime import timedelta
+from functools import reduce
+from gzip import GzipFile
+from json import dumps
+from operator import or_
+
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils.timezone import now
+
+from webplatformcompat.history import Changeset, HistoryCompaction
+from webplatformcompat.snapshot import (
+    RESOURCES, invalidate_history_floor, latest_history_ids)
+from webplatformcompat.tasks import update_cache_for_instances
+
+
+class Command(BaseCommand):
+    """Archive historical records that no longer affect the API.
+
+    Two kinds of historical records can be archived:
+
+    * Records in changesets before the retention floor, except the latest
+      one for each object, by changeset and then history ID.  The kept
+      record is the state of the object as of the floor, so
+      ?as_of=<changeset> is unchanged for changesets at or after the floor.
+    * With --superseded, records followed by another record for the same
+      object in the same closed changeset.  Snapshots are taken at changeset
+      boundaries, so these intermediate states are never visible.  Open
+      changesets are skipped, since their records may still be changing.
+
+    The latest record for each object is always kept, so history_current is
+    unchanged.  Archived records are written as gzipped JSON lines, with one
+    record per line in Django's serialization format.  An existing archive is
+    appended to, as another gzip member.
+
+    The floor is recorded as a HistoryCompaction, and ?as_of=<changeset>
+    requests below the highest recorded floor are rejected.
+    """
+
+    help = 'Archive superseded historical records to a gzipped file.'
+    batch_size = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--before-changeset', type=int, dest='before_changeset',
+            help='Archive records from changesets with a lower ID.')
+        parser.add_argument(
+            '--days', type=int,
+            help='Archive records from changesets older than this many days.')
+        parser.add_argument(
+            '--superseded', action='store_true',
+            help='Archive records superseded in the same changeset.')
+        parser.add_argument(
+            '--archive',
+            help='Path of the gzipped archive to write or append to.')
+        parser.add_argument(
+            '--dry-run', action='store_true', dest='dry_run',
+            help='Report what would be archived, but change nothing.')
+
+    def handle(self, *args, **options):
+        floor = self.get_floor(options['before_changeset'], options['days'])
+        superseded = options['superseded']
+        if floor is None and not superseded:
+            raise CommandError(
+                'Specify --before-changeset, --days, and/or --superseded.')
+        dry_run = options['dry_run']
+        archive_path = options['archive']
+        if not (dry_run or archive_path):
+            raise CommandError('Specify --archive, or use --dry-run.')
+
+        archive = None
+        if not dry_run:
+            archive = GzipFile(archive_path, 'ab')
+        total_count, total_size = 0, 0
+        changed = []
+        try:
+            for resource_type, (model, _) in RESOURCES.items():
+                count, size, changed_ids = self.compact(
+                    model, floor, superseded, archive)
+                changed.extend(
+                    (model.__name__, pk) for pk in sorted(changed_ids))
+                if count:
+                    self.stdout.write(
+                        '%s: %d historical records, %d bytes.' %
+                        (resource_type, count, size))
+                total_count += count
+                total_size += size
+        finally:
+            if archive:
+                archive.close()
+            if archive and changed:
+                # Cached instances include the list of historical IDs
+                update_cache_for_instances.delay(changed)
+
+        if floor is not None and not dry_run:
+            HistoryCompaction.objects.create(floor=floor, archive=archive_path)
+            invalidate_history_floor()
+
+        verb = 'Would archive' if dry_run else 'Archived'
+        self.stdout.write(
+            '%s %d historical records, reclaiming about %d bytes.' %
+            (verb, total_count, total_size))
+
+    def get_floor(self, before_changeset, days):
+        """Return the lowest changeset ID to keep all history for."""
+        floors = []
+        if before_changeset is not None:
+            floors.append(before_changeset)
+        if days is not None:
+            cutoff = now() - timedelta(days=days)
+            newer = Changeset.objects.filter(created__gte=cutoff)
+            first_newer = newer.order_by('id').values_list('id', flat=True)
+            if first_newer:
+                floors.append(first_newer[0])
+            else:
+                last = Changeset.objects.aggregate(last=Max('id'))['last']
+                floors.append((last or 0) + 1)
+        return min(floors) if floors else None
+
+    def get_queryset(self, model, floor, superseded):
+        """Return the historical records to archive."""
+        historical = model.history.model
+        records = historical.objects.order_by()
+        criteria = []
+        if floor is not None:
+            kept = latest_history_ids(
+                records
+                .filter(history_changeset_id__lt=floor)
+                .values('id')
+            ).values_list('current_history_id', flat=True)
+            current = (
+                records
+                .values('id')
+                .annotate(current_id=Max('history_id'))
+                .values_list('current_id', flat=True))
+            kept_ids = Q(history_id__in=kept) | Q(history_id__in=current)
+            criteria.append(Q(history_changeset_id__lt=floor) & ~kept_ids)
+        if superseded:
+            kept = (
+                records
+                .values('id', 'history_changeset_id')
+                .annotate(kept_id=Max('history_id'))
+                .values_list('kept_id', flat=True))
+            criteria.append(
+                Q(history_changeset__closed=True) & ~Q(history_id__in=kept))
+        return historical.objects.filter(
+            reduce(or_, criteria)).order_by('history_id')
+
+    def compact(self, model, floor, superseded, archive):
+        """Archive and delete historical records for a model.
+
+        Records are deleted in batches, each in its own transaction.  A batch
+        is written to the archive after its transaction commits, so a failed
+        batch is not archived, and is left in the database.
+
+        Return is the count of records, the size of their serialized data,
+        and the IDs of the objects with archived records.
+        """
+        historical = model.history.model
+        queryset = self.get_queryset(model, floor, superseded)
+        count, size = 0, 0
+        changed_ids = set()
+        history_ids = list(queryset.values_list('history_id', flat=True))
+        for start in range(0, len(history_ids), self.batch_size):
+            batch_ids = history_ids[start:start + self.batch_size]
+            lines = []
+            with transaction.atomic():
+                batch = historical.objects.filter(
+                    history_id__in=batch_ids).order_by('history_id')
+                for record in serializers.serialize('python', batch):
+                    line = dumps(record, cls=DjangoJSONEncoder) + '\n'
+                    lines.append(line.encode('utf-8'))
+                    changed_ids.add(record['fields']['id'])
+                if archive:
+                    batch.delete()
+            count += len(lines)
+            size += sum(len(line) for line in lines)
+            if archive:
+                archive.write(b''.join(lines))
+                archive.flush()
+        return count, size, changed_ids
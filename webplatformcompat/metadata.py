@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Metadata for OPTIONS requests."""
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+from django.core.exceptions import PermissionDenied
+from django.http import Http404
+from django.utils import translation
+from django.utils.encoding import force_text
+from rest_framework import exceptions
+from rest_framework.metadata import SimpleMetadata
+from rest_framework.relations import ManyRelatedField, RelatedField
+from rest_framework.request import clone_request
+
+
+class CachedMetadata(SimpleMetadata):
+    """Metadata with serializer details cached per process.
+
+    The fields of a serializer only change with the code, so the details for
+    a viewset, API version, serializer, and language are built once.
+    Relations do not include choices, which would load every related
+    resource.
+    """
+
+    serializer_info = {}
+
+    def determine_actions(self, request, view):
+        """Return the fields accepted for PUT and POST, if permitted."""
+        actions = {}
+        for method in {'PUT', 'POST'} & set(view.allowed_methods):
+            view.request = clone_request(request, method)
+            try:
+                # Test global permissions
+                if hasattr(view, 'check_permissions'):
+                    view.check_permissions(view.request)
+                # Test object permissions
+                if method == 'PUT' and hasattr(view, 'get_object'):
+                    view.get_object()
+            except (exceptions.APIException, PermissionDenied, Http404):
+                pass
+            else:
+                actions[method] = self.get_cached_serializer_info(view)
+            finally:
+                view.request = request
+
+        return actions
+
+    def get_cached_serializer_info(self, view):
+        """Return the details of the view's serializer, built once."""
+        key = (
+            type(view), view.request.version, view.get_serializer_class(),
+            translation.get_language())
+        info = self.serializer_info.get(key)
+        if info is None:
+            info = self.get_serializer_info(view.get_serializer())
+            self.serializer_info[key] = info
+        return info
+
+    def get_field_info(self, field):
+        """Return the details of a field, without choices for relations."""
+        if not isinstance(field, (RelatedField, ManyRelatedField)):
+            return super(CachedMetadata, self).get_field_info(field)
+
+        field_info = OrderedDict()
+        field_info['type'] = self.label_lookup[field]
+        field_info['required'] = getattr(field, 'required', False)
+        for attr in ('read_only', 'label', 'help_text'):
+            value = getattr(field, attr, None)
+            if value is not None and value != '':
+                field_info[attr] = force_text(value, strings_only=True)
+        return field_info
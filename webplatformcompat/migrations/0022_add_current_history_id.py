@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# flake8: noqa
+"""Add and populate the denormalized current_history_id pointer."""
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+HISTORY_MODELS = (
+    'Browser', 'Feature', 'Maturity', 'Reference', 'Section',
+    'Specification', 'Support', 'Version')
+
+
+def populate_current_history_id(apps, schema_editor):
+    """Set current_history_id to the most recent historical record."""
+    for name in HISTORY_MODELS:
+        Model = apps.get_model('webplatformcompat', name)
+        Historical = apps.get_model('webplatformcompat', 'Historical' + name)
+        current = {}
+        history = Historical.objects.order_by(
+            'history_date', 'history_id').values_list('id', 'history_id')
+        for obj_id, history_id in history.iterator():
+            current[obj_id] = history_id
+        for obj_id in Model.objects.values_list('id', flat=True):
+            if obj_id in current:
+                Model.objects.filter(id=obj_id).update(
+                    current_history_id=current[obj_id])
+
+
+def clear_current_history_id(apps, schema_editor):
+    """Nothing to do, since the columns are dropped."""
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webplatformcompat', '0021_drop_feature_section_m2m'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='browser',
+            name='current_history_id',
+            field=models.IntegerField(help_text='ID of the current historical record.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='feature',
+            name='current_history_id',
+            field=models.IntegerField(help_text='ID of the current historical record.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='maturity',
+            name='current_history_id',
+            field=models.IntegerField(help_text='ID of the current historical record.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='reference',
+            name='current_history_id',
+            field=models.IntegerField(help_text='ID of the current historical record.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='section',
+            name='current_history_id',
+            field=models.IntegerField(help_text='ID of the current historical record.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='specification',
+            name='current_history_id',
+            field=models.IntegerField(help_text='ID of the current historical record.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='support',
+            name='current_history_id',
+            field=models.IntegerField(help_text='ID of the current historical record.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='version',
+            name='current_history_id',
+            field=models.IntegerField(help_text='ID of the current historical record.', null=True, editable=False, blank=True),
+        ),
+        migrations.RunPython(
+            populate_current_history_id, clear_current_history_id),
+    ]
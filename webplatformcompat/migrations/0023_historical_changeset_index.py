@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# flake8: noqa
+"""Index historical records by (id, history_changeset), for snapshots."""
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webplatformcompat', '0022_add_current_history_id'),
+    ]
+
+    operations = [
+        migrations.AlterIndexTogether(
+            name='historicalbrowser',
+            index_together=set([('id', 'history_changeset')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='historicalfeature',
+            index_together=set([('id', 'history_changeset')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='historicalmaturity',
+            index_together=set([('id', 'history_changeset')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='historicalreference',
+            index_together=set([('id', 'history_changeset')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='historicalsection',
+            index_together=set([('id', 'history_changeset')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='historicalspecification',
+            index_together=set([('id', 'history_changeset')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='historicalsupport',
+            index_together=set([('id', 'history_changeset')]),
+        ),
+        migrations.AlterIndexTogether(
+            name='historicalversion',
+            index_together=set([('id', 'history_changeset')]),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# flake8: noqa
+"""Add history_archive, the stored archived representation."""
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django_extensions.db.fields.json
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webplatformcompat', '0023_historical_changeset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicalbrowser',
+            name='history_archive',
+            field=django_extensions.db.fields.json.JSONField(help_text='Archived representation, stored on creation.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalfeature',
+            name='history_archive',
+            field=django_extensions.db.fields.json.JSONField(help_text='Archived representation, stored on creation.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalmaturity',
+            name='history_archive',
+            field=django_extensions.db.fields.json.JSONField(help_text='Archived representation, stored on creation.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalreference',
+            name='history_archive',
+            field=django_extensions.db.fields.json.JSONField(help_text='Archived representation, stored on creation.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalsection',
+            name='history_archive',
+            field=django_extensions.db.fields.json.JSONField(help_text='Archived representation, stored on creation.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalspecification',
+            name='history_archive',
+            field=django_extensions.db.fields.json.JSONField(help_text='Archived representation, stored on creation.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalsupport',
+            name='history_archive',
+            field=django_extensions.db.fields.json.JSONField(help_text='Archived representation, stored on creation.', null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='historicalversion',
+            name='history_archive',
+            field=django_extensions.db.fields.json.JSONField(help_text='Archived representation, stored on creation.', null=True, editable=False, blank=True),
+        ),
+    ]
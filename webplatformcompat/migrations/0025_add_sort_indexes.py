@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# flake8: noqa
+"""Add expression indexes for sorting on the English names."""
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+SORT_INDEXES = (
+    ('webplatformcompat_browser', 'name', 'en'),
+    ('webplatformcompat_feature', 'name', 'en'),
+    ('webplatformcompat_maturity', 'name', 'en'),
+    ('webplatformcompat_section', 'name', 'en'),
+    ('webplatformcompat_specification', 'name', 'en'),
+)
+
+# Must match the SQL of webplatformcompat.fields.TranslatedValue
+EXPRESSIONS = {
+    'postgresql': "((%(column)s)::json ->> '%(locale)s')",
+    'sqlite': "json_extract(%(column)s, '$.\"%(locale)s\"')",
+}
+
+
+def index_name(table, column, locale):
+    return '%s_%s_%s' % (table, column, locale.replace('-', '_').lower())
+
+
+def add_sort_indexes(apps, schema_editor):
+    """Create the expression indexes, if the database supports them."""
+    template = EXPRESSIONS.get(schema_editor.connection.vendor)
+    if template is None:
+        return
+    for table, column, locale in SORT_INDEXES:
+        expression = template % {'column': column, 'locale': locale}
+        schema_editor.execute('CREATE INDEX %s ON %s (%s)' % (
+            index_name(table, column, locale), table, expression))
+
+
+def drop_sort_indexes(apps, schema_editor):
+    """Drop the expression indexes."""
+    if schema_editor.connection.vendor not in EXPRESSIONS:
+        return
+    for table, column, locale in SORT_INDEXES:
+        schema_editor.execute(
+            'DROP INDEX %s' % index_name(table, column, locale))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webplatformcompat', '0024_historical_archive'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_sort_indexes, drop_sort_indexes),
+    ]
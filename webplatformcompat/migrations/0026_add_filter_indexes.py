@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# flake8: noqa
+"""Index the fields used in v2 API filters."""
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+def create_specification_sort_index(apps, schema_editor):
+    """Create the name.en sort index from 0025, if missing.
+
+    SQLite alters fields by rebuilding the table, which drops expression
+    indexes.
+    """
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS '
+            'webplatformcompat_specification_name_en '
+            'ON webplatformcompat_specification '
+            '(json_extract(name, \'$."en"\'))')
+
+
+def noop(apps, schema_editor):
+    pass
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webplatformcompat', '0025_add_sort_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(noop, create_specification_sort_index),
+        migrations.AlterField(
+            model_name='historicalspecification',
+            name='mdn_key',
+            field=models.CharField(help_text='Key used in the KumaScript macro SpecName', max_length=30, db_index=True, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='historicalversion',
+            name='status',
+            field=models.CharField(default='unknown', max_length=15, db_index=True, choices=[('unknown', 'unknown'), ('current', 'current'), ('future', 'future'), ('retired', 'retired'), ('beta', 'beta'), ('retired beta', 'retired beta')]),
+        ),
+        migrations.AlterField(
+            model_name='historicalversion',
+            name='version',
+            field=models.CharField(help_text='Version string.', max_length=20, db_index=True),
+        ),
+        migrations.AlterField(
+            model_name='specification',
+            name='mdn_key',
+            field=models.CharField(help_text='Key used in the KumaScript macro SpecName', max_length=30, db_index=True, blank=True),
+        ),
+        migrations.AlterField(
+            model_name='version',
+            name='status',
+            field=models.CharField(default='unknown', max_length=15, db_index=True, choices=[('unknown', 'unknown'), ('current', 'current'), ('future', 'future'), ('retired', 'retired'), ('beta', 'beta'), ('retired beta', 'retired beta')]),
+        ),
+        migrations.AlterField(
+            model_name='version',
+            name='version',
+            field=models.CharField(help_text='Version string.', max_length=20, db_index=True),
+        ),
+        migrations.RunPython(create_specification_sort_index, noop),
+    ]
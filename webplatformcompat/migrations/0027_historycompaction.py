@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+# flake8: noqa
+"""Add HistoryCompaction, the record of compact_history runs."""
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('webplatformcompat', '0026_add_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoryCompaction',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('floor', models.PositiveIntegerField(help_text='Lowest changeset ID with complete history')),
+                ('archive', models.CharField(help_text='Path of the archive of the removed records', max_length=255, blank=True)),
+            ],
+        ),
+    ]
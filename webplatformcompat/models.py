@@ -40,10 +40,25 @@ class CachingTreeManager(TreeManager, CachingManagerMixin):
 
 
 class HistoryMixin(object):
-    @property
-    def current_history_id(self):
-        """Return the current history ID, used in many views."""
-        return getattr(self, 'history').only('history_id').latest().history_id
+    """Mixin for models with a history manager.
+
+    This is referenced as a base class in migrations.
+    """
+
+
+class HistoryModel(HistoryMixin, models.Model):
+    """Add a denormalized pointer to the current historical record.
+
+    The pointer is maintained by HistoricalRecords.create_historical_record,
+    so that views can link to the current history without a query.
+    """
+
+    current_history_id = models.IntegerField(
+        help_text='ID of the current historical record.',
+        null=True, blank=True, editable=False)
+
+    class Meta:
+        abstract = True
 
 
 #
@@ -52,7 +67,7 @@ class HistoryMixin(object):
 
 
 @python_2_unicode_compatible
-class Browser(HistoryMixin, models.Model):
+class Browser(HistoryModel):
     """A browser or other web client."""
 
     slug = models.SlugField(
@@ -71,7 +86,7 @@ class Browser(HistoryMixin, models.Model):
 
 
 @python_2_unicode_compatible
-class Feature(HistoryMixin, MPTTModel):
+class Feature(MPTTModel, HistoryModel):
     """A web technology."""
 
     slug = models.SlugField(
@@ -187,7 +202,7 @@ class Feature(HistoryMixin, MPTTModel):
 
 
 @python_2_unicode_compatible
-class Maturity(HistoryMixin, models.Model):
+class Maturity(HistoryModel):
     """Maturity of a specification document."""
 
     slug = models.SlugField(
@@ -208,7 +223,7 @@ class Maturity(HistoryMixin, models.Model):
 
 
 @python_2_unicode_compatible
-class Reference(HistoryMixin, models.Model):
+class Reference(HistoryModel):
     """The reference of a feature to a section of a specification."""
 
     feature = models.ForeignKey('Feature', related_name='references')
@@ -229,7 +244,7 @@ class Reference(HistoryMixin, models.Model):
 
 
 @python_2_unicode_compatible
-class Section(HistoryMixin, models.Model):
+class Section(HistoryModel):
     """A section of a specification document."""
 
     specification = models.ForeignKey('Specification', related_name='sections')
@@ -257,7 +272,7 @@ class Section(HistoryMixin, models.Model):
 
 
 @python_2_unicode_compatible
-class Specification(HistoryMixin, models.Model):
+class Specification(HistoryModel):
     """A Specification document."""
 
     maturity = models.ForeignKey('Maturity', related_name='specifications')
@@ -266,7 +281,7 @@ class Specification(HistoryMixin, models.Model):
         unique=True)
     mdn_key = models.CharField(
         help_text='Key used in the KumaScript macro SpecName',
-        max_length=30, blank=True)
+        max_length=30, blank=True, db_index=True)
     name = TranslatedField(
         help_text='Name of specification')
     uri = TranslatedField(
@@ -279,7 +294,7 @@ class Specification(HistoryMixin, models.Model):
 
 
 @python_2_unicode_compatible
-class Support(HistoryMixin, models.Model):
+class Support(HistoryModel):
     """Detail the support of a browser version for a feature."""
 
     SUPPORT_CHOICES = [(k, k) for k in (
@@ -331,7 +346,7 @@ class Support(HistoryMixin, models.Model):
 
 
 @python_2_unicode_compatible
-class Version(HistoryMixin, models.Model):
+class Version(HistoryModel):
     """A version of a browser."""
 
     STATUS_CHOICES = [(k, k) for k in (
@@ -346,7 +361,7 @@ class Version(HistoryMixin, models.Model):
     browser = models.ForeignKey('Browser', related_name='versions')
     version = models.CharField(
         help_text='Version string.',
-        max_length=20)
+        max_length=20, db_index=True)
     release_day = models.DateField(
         help_text='Day of release to public, ISO 8601 format.',
         blank=True, null=True)
@@ -354,7 +369,8 @@ class Version(HistoryMixin, models.Model):
         help_text='Day this version stopped being supported, ISO 8601 format.',
         blank=True, null=True)
     status = models.CharField(
-        max_length=15, choices=STATUS_CHOICES, default='unknown')
+        max_length=15, choices=STATUS_CHOICES, default='unknown',
+        db_index=True)
     release_notes_uri = TranslatedField(
         help_text='URI of release notes.',
         blank=True, null=True)
@@ -1,11 +1,118 @@
 """Pagination for webplatformcompat viewsets."""
 # -*- coding: utf-8 -*-
 
+from collections import OrderedDict
+
+from drf_cached_instances.models import CachedQueryset
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .exceptions import InvalidQueryParam
 
 
 class Pagination(PageNumberPagination):
-    """Allow overriding the page size."""
+    """Allow overriding the page size, and opt-in cursor pagination.
+
+    With the page[cursor] parameter, the list is ordered by ID, and the
+    cursor is the ID of the last resource of the previous page, or blank for
+    the first page.  Each page is a query on the primary key index, rather
+    than an OFFSET scan, so downloading a full collection is linear in the
+    number of pages.  page[count]=0 skips counting the resources, and the
+    count is null.
+    """
 
     page_size_query_param = 'page_size'
     max_page_size = 1000
+    cursor_query_param = 'page[cursor]'
+    count_query_param = 'page[count]'
+    use_cursor = False
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return super(Pagination, self).paginate_queryset(
+                queryset, request, view)
+
+        self.use_cursor = True
+        self.request = request
+        cursor = self.get_cursor(request)
+        include_count = self.get_include_count(request)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        if isinstance(queryset, CachedQueryset):
+            cache, db_queryset = queryset.cache, queryset.queryset
+        else:
+            cache, db_queryset = None, queryset
+        db_queryset = db_queryset.order_by('pk')
+        self.count = db_queryset.count() if include_count else None
+
+        after = db_queryset
+        if cursor is not None:
+            after = after.filter(pk__gt=cursor)
+        if cache is None:
+            page = list(after[:page_size + 1])
+            has_next = len(page) > page_size
+            page = page[:page_size]
+        else:
+            pks = list(after.values_list('pk', flat=True)[:page_size + 1])
+            has_next = len(pks) > page_size
+            page = list(CachedQueryset(cache, after, pks[:page_size]))
+        self.next_cursor = page[-1].pk if has_next else None
+
+        self.previous_cursor = None
+        if cursor is not None:
+            before = db_queryset.filter(pk__lte=cursor).order_by('-pk')
+            previous = before.values_list('pk', flat=True)[
+                page_size:page_size + 1]
+            self.previous_cursor = previous[0] if previous else ''
+        return page
+
+    def get_cursor(self, request):
+        """Return the ID from the cursor parameter, or None for blank."""
+        value = request.query_params[self.cursor_query_param]
+        if not value:
+            return None
+        try:
+            cursor = int(value)
+        except ValueError:
+            raise InvalidQueryParam(self.cursor_query_param)
+        if cursor < 0:
+            raise InvalidQueryParam(self.cursor_query_param)
+        return cursor
+
+    def get_include_count(self, request):
+        """Return False if page[count] requests skipping the count."""
+        value = request.query_params.get(self.count_query_param, '1')
+        if value not in ('0', '1'):
+            raise InvalidQueryParam(self.count_query_param)
+        return value == '1'
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super(Pagination, self).get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super(Pagination, self).get_next_link()
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.next_cursor)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super(Pagination, self).get_previous_link()
+        if self.previous_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.previous_cursor)
@@ -3,18 +3,71 @@
 from __future__ import unicode_literals
 
 from collections import OrderedDict
+from copy import copy
 from json import loads
 
 from django.template import loader, Context
 from django.utils import translation
+from rest_framework.relations import ManyRelatedField, RelatedField
 from rest_framework.renderers import BrowsableAPIRenderer as BaseAPIRenderer
+from rest_framework.renderers import HTMLFormRenderer as BaseHTMLFormRenderer
 from rest_framework.renderers import TemplateHTMLRenderer
 from rest_framework.status import HTTP_200_OK, HTTP_204_NO_CONTENT
 
 
+class HTMLFormRenderer(BaseHTMLFormRenderer):
+    """Render forms without loading every related resource.
+
+    The select box for a relation offers the selected resources and the
+    first relation_cutoff other resources, instead of the full queryset.
+    """
+
+    relation_cutoff = 50
+
+    def render_field(self, field, parent_style):
+        """Render a field, limiting the options of relations."""
+        if isinstance(field._field, (RelatedField, ManyRelatedField)):
+            field = self.limit_relation_options(field)
+        return super(HTMLFormRenderer, self).render_field(field, parent_style)
+
+    def limit_relation_options(self, field):
+        """Return a bound relation field with a page of options."""
+        form_field = copy(field._field)
+        if isinstance(form_field, ManyRelatedField):
+            relation = copy(form_field.child_relation)
+            form_field.child_relation = relation
+            selected = field.value or []
+        else:
+            relation = form_field
+            selected = [] if field.value in (None, '') else [field.value]
+
+        queryset = relation.get_queryset()
+        if not hasattr(queryset, 'filter'):
+            return field
+        options = []
+        if selected:
+            try:
+                options = list(queryset.filter(pk__in=selected))
+            except (TypeError, ValueError):
+                selected = []
+        others = list(
+            queryset.exclude(pk__in=selected)[:self.relation_cutoff + 1])
+        options.extend(others[:self.relation_cutoff])
+
+        relation.queryset = options
+        if len(others) > self.relation_cutoff:
+            form_field.html_cutoff = len(options)
+        else:
+            form_field.html_cutoff = None
+        return type(field)(
+            form_field, field.value, field.errors, field._prefix)
+
+
 class BrowsableAPIRenderer(BaseAPIRenderer):
     """Jinja2 renderer used to self-document the API."""
 
+    form_renderer_class = HTMLFormRenderer
+
     def render(self, data, accepted_media_type=None, renderer_context=None):
         """
         Render the HTML for the browsable API representation.
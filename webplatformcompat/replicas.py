@@ -0,0 +1,261 @@
+# -*- coding: utf-8 -*-
+"""Route reads to database replicas.
+
+Safe requests (GET, HEAD, and OPTIONS) to API views read from a replica,
+including the instance cache loaders and view_feature reads made while
+handling them.  Writes, unsafe requests, other views, and work outside of a
+request, such as the cache refresh tasks that follow a write, use the
+primary (default) database.
+
+Data read from a replica may be up to REPLICA_MAX_LAG seconds older than
+the primary, so cache entries filled from a replica expire after at most
+REPLICA_CACHE_TIMEOUT seconds, rather than waiting for an invalidation that
+may have already happened.
+
+A user that has just made changes, or has an open changeset, is pinned to
+the primary for their reads, so that they see their own changes.  Both are
+tracked in the cache, so checking a request does not query the database.
+Replicas that lag the primary by more than REPLICA_MAX_LAG seconds are
+skipped.  The measured lag is logged and, when New Relic is installed,
+recorded as a custom metric.
+"""
+
+import logging
+import random
+from threading import local
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from rest_framework.views import APIView
+
+from .history import Changeset
+
+try:
+    import newrelic.agent
+except ImportError:
+    newrelic = None
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# The database alias used for reads by the current thread
+_state = local()
+
+# Seconds to cache a measured replica lag
+LAG_CHECK_SECONDS = 5
+
+# Replication delay on PostgreSQL 9.x replicas, which is 0 when the replica
+# has replayed everything it has received
+PG_LAG_SQL = """\
+SELECT CASE
+  WHEN pg_last_xlog_receive_location() = pg_last_xlog_replay_location()
+  THEN 0
+  ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+END"""
+
+
+def get_read_database():
+    """Return the database alias for reads, or None for the default."""
+    return getattr(_state, 'alias', None)
+
+
+def set_read_database(alias):
+    """Set the database alias for reads, or None for the default."""
+    _state.alias = alias
+
+
+def is_reading_replica():
+    """Return True if reads are from a replica."""
+    return get_read_database() not in (None, DEFAULT_DB_ALIAS)
+
+
+def get_cache_timeout(timeout):
+    """Return the timeout for a cache entry, limited for replica reads."""
+    if not is_reading_replica():
+        return timeout
+    limit = settings.REPLICA_CACHE_TIMEOUT
+    return limit if timeout is None else min(timeout, limit)
+
+
+class ReplicaCacheProxy(object):
+    """A cache that limits the timeout of entries filled from a replica."""
+
+    def __init__(self, cache):
+        self._cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self._cache, name)
+
+    def get_timeout(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self._cache.default_timeout
+        return get_cache_timeout(timeout)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, **kwargs):
+        return self._cache.set(
+            key, value, self.get_timeout(timeout), **kwargs)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, **kwargs):
+        return self._cache.set_many(data, self.get_timeout(timeout), **kwargs)
+
+
+def measure_replica_lag(alias):
+    """Measure the lag of a replica in seconds, or None if unavailable."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(PG_LAG_SQL)
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        logger.exception('Unable to measure lag of replica %s', alias)
+        return None
+    return float(lag or 0)
+
+
+def record_replica_lag(alias, lag):
+    """Report the measured lag of a replica."""
+    logger.info('Replica %s lag is %s seconds', alias, lag)
+    if newrelic is not None and lag is not None:
+        newrelic.agent.record_custom_metric(
+            'Custom/Database/%s/ReplicaLag' % alias, lag)
+
+
+def get_replica_lag(alias):
+    """Return the recently measured lag of a replica, or None."""
+    key = 'replica_lag:%s' % alias
+    lag = cache.get(key)
+    if lag is None:
+        lag = measure_replica_lag(alias)
+        record_replica_lag(alias, lag)
+        # Cache an unavailable replica as infinitely lagged
+        cache.set(key, float('inf') if lag is None else lag, LAG_CHECK_SECONDS)
+    return lag
+
+
+def choose_replica():
+    """Return a replica that is caught up with the primary, or None."""
+    replicas = list(getattr(settings, 'REPLICA_DATABASES', []))
+    random.shuffle(replicas)
+    max_lag = settings.REPLICA_MAX_LAG
+    for alias in replicas:
+        lag = get_replica_lag(alias)
+        if lag is not None and lag <= max_lag:
+            return alias
+    return None
+
+
+def get_pin_key(user_id):
+    return 'replica_pin:%s' % user_id
+
+
+def pin_to_primary(user_id):
+    """Pin a user's reads to the primary after a change."""
+    cache.set(get_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def get_open_changeset_key(user_id):
+    return 'replica_open_changeset:%s' % user_id
+
+
+def update_open_changesets(changeset):
+    """Track if the user of a changeset has an open changeset.
+
+    This is called when a changeset is created or closed.  A new changeset
+    is open, and closing a changeset checks for other open changesets.
+    """
+    if not getattr(settings, 'REPLICA_DATABASES', []):
+        return
+    key = get_open_changeset_key(changeset.user_id)
+    if not changeset.closed:
+        cache.set(key, True, None)
+        return
+    changesets = Changeset.objects.using(DEFAULT_DB_ALIAS)
+    if changesets.filter(user_id=changeset.user_id, closed=False).exists():
+        cache.set(key, True, None)
+    else:
+        cache.delete(key)
+
+
+def is_pinned_to_primary(user_id):
+    """Return True if a user's reads should use the primary."""
+    keys = [get_pin_key(user_id), get_open_changeset_key(user_id)]
+    return any(cache.get_many(keys).values())
+
+
+def is_api_view(view_func):
+    """Return True if a view is a Django REST Framework API view."""
+    view_cls = getattr(view_func, 'cls', None)
+    return isinstance(view_cls, type) and issubclass(view_cls, APIView)
+
+
+class ReplicaRouter(object):
+    """Send reads to the replica chosen for the request."""
+
+    def db_for_read(self, model, **hints):
+        return get_read_database()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Allow relations between the primary and replicas."""
+        databases = set([DEFAULT_DB_ALIAS])
+        databases.update(getattr(settings, 'REPLICA_DATABASES', []))
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model=None, **hints):
+        """Migrate the primary, which the replicas copy."""
+        if db in getattr(settings, 'REPLICA_DATABASES', []):
+            return False
+        return None
+
+
+class ReplicaMiddleware(object):
+    """Choose the database for the reads of an API request."""
+
+    def process_request(self, request):
+        set_read_database(None)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (request.method not in SAFE_METHODS or
+                not getattr(settings, 'REPLICA_DATABASES', []) or
+                not is_api_view(view_func)):
+            return
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated():
+            if is_pinned_to_primary(user.pk):
+                return
+        set_read_database(choose_replica())
+
+    def process_response(self, request, response):
+        user = getattr(request, 'user', None)
+        if (request.method not in SAFE_METHODS and user is not None and
+                getattr(settings, 'REPLICA_DATABASES', []) and
+                user.is_authenticated()):
+            pin_to_primary(user.pk)
+        alias = get_read_database()
+        if alias and response.streaming:
+            # Streamed responses read from the database as they are sent
+            response.streaming_content = self.stream_from(
+                alias, response.streaming_content)
+        set_read_database(None)
+        return response
+
+    def process_exception(self, request, exception):
+        set_read_database(None)
+
+    def stream_from(self, alias, content):
+        """Read from a database while streaming content."""
+        set_read_database(alias)
+        try:
+            for chunk in content:
+                yield chunk
+        finally:
+            set_read_database(None)
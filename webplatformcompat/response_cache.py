@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""Cache of rendered API responses, stored precompressed.
+
+Rendered responses are cached with their gzip (and, if the brotli package is
+installed, brotli) encoded bodies, so a cache hit is served in the encoding
+the client accepts without serializing or compressing again.
+
+Cached responses are keyed on a generation token, which is replaced whenever
+the instance cache is updated, so any change to the API resources expires
+every cached response.
+"""
+
+from gzip import GzipFile
+from hashlib import md5
+from io import BytesIO
+import logging
+
+from django.conf import settings
+from django.core.cache import cache as default_cache
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.encoding import force_bytes
+
+from .replicas import get_cache_timeout
+from .utils import get_generation, new_generation, parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+def get_accepted_encodings(request):
+    """Return the content codings in Accept-Encoding, without q=0."""
+    header = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    return set(parse_accept_header(header))
+
+
+class ResponseCache(object):
+    """Cache rendered responses with precompressed bodies."""
+
+    generation_key = 'response_cache_generation'
+    key_prefix = 'response_cache'
+    # Bodies shorter than this are not worth compressing
+    min_compress_length = 200
+    # Response headers that depend on the chosen encoding
+    encoding_headers = ('content-encoding', 'content-length')
+
+    def __init__(self, cache=None, timeout=None):
+        self.cache = cache or default_cache
+        if timeout is None:
+            timeout = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 3600)
+        self.timeout = timeout
+
+    @property
+    def encodings(self):
+        """Return the supported content codings, in order of preference."""
+        if brotli is None:
+            return ('gzip',)
+        return ('br', 'gzip')
+
+    def invalidate(self):
+        """Expire all cached responses."""
+        new_generation(self.generation_key, self.cache)
+
+    def get_generation(self):
+        """Return the current generation token, creating it if needed."""
+        return get_generation(self.generation_key, self.cache)
+
+    def get_key(self, request):
+        """Return the cache key for a request.
+
+        The rendered response depends on the full URL, including the host
+        used for links, and on the Accept header used to pick a renderer.  A
+        blank lang parameter selects languages with Accept-Language.
+        """
+        uri = request.build_absolute_uri()
+        accept = request.META.get('HTTP_ACCEPT', '')
+        if request.GET.get('lang') == '':
+            accept += '\n' + request.META.get('HTTP_ACCEPT_LANGUAGE', '')
+        digest = md5(force_bytes(uri + '\n' + accept)).hexdigest()
+        return '%s:%s:%s' % (self.key_prefix, self.get_generation(), digest)
+
+    def get(self, request, key=None):
+        """Return the cached response for a request, or None."""
+        entry = self.cache.get(key or self.get_key(request))
+        if entry is None:
+            return None
+        return self.build_response(entry, request)
+
+    def set(self, request, response, key=None):
+        """Cache a rendered response, and return it encoded for the request.
+
+        The key should be the one read before the response was built, so
+        that a response built during an invalidation is stored under the
+        expired generation, rather than served as current.
+
+        Responses that are not successful, are streamed, or are rendered as
+        HTML (which may include the user's name) are returned unchanged.
+        """
+        if not self.is_cacheable(response):
+            return response
+        if isinstance(response, SimpleTemplateResponse):
+            response.render()
+        entry = self.build_entry(response)
+        self.cache.set(
+            key or self.get_key(request), entry,
+            get_cache_timeout(self.timeout))
+        self.log_entry(request, entry)
+        return self.build_response(entry, request)
+
+    def is_cacheable(self, response):
+        """Return True if a response can be served to other requests."""
+        if response.status_code != 200 or response.streaming:
+            return False
+        media_type = getattr(response, 'accepted_media_type', None) or ''
+        return not media_type.startswith('text/html')
+
+    def build_entry(self, response):
+        """Convert a rendered response to a cache entry."""
+        body = response.content
+        bodies = {'identity': body}
+        if len(body) >= self.min_compress_length:
+            for encoding in self.encodings:
+                compressed = self.compress(body, encoding)
+                if len(compressed) < len(body):
+                    bodies[encoding] = compressed
+        headers = [
+            (name, value) for name, value in response.items()
+            if name.lower() not in self.encoding_headers]
+        return {
+            'status': response.status_code,
+            'headers': headers,
+            'bodies': bodies,
+        }
+
+    def compress(self, body, encoding):
+        """Compress a body with a content coding."""
+        if encoding == 'br':
+            return brotli.compress(body)
+        assert encoding == 'gzip', 'Unknown encoding %s' % encoding
+        zbuf = BytesIO()
+        zfile = GzipFile(mode='wb', compresslevel=9, fileobj=zbuf, mtime=0)
+        try:
+            zfile.write(body)
+        finally:
+            zfile.close()
+        return zbuf.getvalue()
+
+    def build_response(self, entry, request):
+        """Return a response for a cache entry, in an accepted encoding."""
+        bodies = entry['bodies']
+        encoding = self.choose_encoding(request, bodies)
+        body = bodies[encoding]
+        response = HttpResponse(body, status=entry['status'])
+        for name, value in entry['headers']:
+            response[name] = value
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+        response['Content-Length'] = str(len(body))
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def choose_encoding(self, request, bodies):
+        """Return the preferred stored encoding accepted by the client."""
+        accepted = get_accepted_encodings(request)
+        for encoding in self.encodings:
+            if encoding in bodies and (
+                    encoding in accepted or '*' in accepted):
+                return encoding
+        return 'identity'
+
+    def log_entry(self, request, entry):
+        """Log the compression ratio of a new cache entry."""
+        bodies = entry['bodies']
+        length = len(bodies['identity'])
+        ratios = [
+            '%s=%.3f' % (encoding, float(len(bodies[encoding])) / length)
+            for encoding in self.encodings if encoding in bodies]
+        logger.info(
+            'Cached response for %s: %d bytes, compression ratio %s',
+            request.get_full_path(), length, ' '.join(ratios) or 'none')
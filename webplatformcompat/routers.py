@@ -56,7 +56,7 @@ class GroupedRouter(DefaultRouter):
 
         Same as rest_framework.routers.BaseRouter.get_urls, but
         - Adds a 'root' view for the API
-        - Asserts each viewset has mapped routes
+        - Asserts each viewset has mapped routes, skipping unmapped ones
         - Adds redirects from URLs ending in slashes
         - Adds format suffix ('.json') versions
         - Adds alternate lookup views
@@ -73,11 +73,15 @@ class GroupedRouter(DefaultRouter):
         for prefix, viewset, basename in self.registry:
             lookup = self.get_lookup_regex(viewset)
             routes = self.get_routes(viewset)
-
-            for route in routes:
-                # Get valid routes for the viewset, or fail
-                mapping = self.get_method_map(viewset, route.mapping)
-                assert mapping, 'viewset %s has no routes.' % viewset
+            mapped_routes = [
+                (route, self.get_method_map(viewset, route.mapping))
+                for route in routes]
+            mapped_routes = [
+                (route, mapping) for route, mapping in mapped_routes
+                if mapping]
+            assert mapped_routes, 'viewset %s has no routes.' % viewset
+
+            for route, mapping in mapped_routes:
 
                 # Build the url pattern
                 regex = route.url.format(
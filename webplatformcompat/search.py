@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""In-memory search index of features.
+
+Features are found by slug, by name (in any language), and by MDN URI.  The
+index is a sorted list of the words in these fields, so a search term is
+matched as a prefix of a word with a binary search, and a whole slug, name,
+or URI is matched exactly with a dictionary lookup.
+
+Each process builds the index on the first search.  When a feature changes,
+a generation token in the cache is replaced, and each process rebuilds the
+index on the next search.  An index built from a read replica, which may
+lag, is also rebuilt after REPLICA_CACHE_TIMEOUT seconds.  A rebuilt index
+replaces the old one in a single assignment, so a concurrent search uses
+either the old or the new index.
+"""
+from __future__ import unicode_literals
+
+from bisect import bisect_left
+from collections import namedtuple
+import re
+from time import time
+
+from django.conf import settings
+from django.utils import six
+
+from .models import Feature
+from .replicas import is_reading_replica
+from .utils import get_generation, new_generation
+
+IndexState = namedtuple(
+    'IndexState',
+    ('generation', 'words', 'entries', 'exact', 'slugs', 'expires'))
+
+
+class FeatureSearchIndex(object):
+    """Prefix index of feature slugs, names, and MDN URIs."""
+
+    generation_key = 'feature_search_generation'
+    word_re = re.compile(r'[^\W_]+', re.UNICODE)
+    # Relative weight of a match in each field
+    weights = {'slug': 3, 'name': 2, 'mdn_uri': 1}
+    # Multiplier for a match of a full word, or of a full field
+    word_bonus = 2
+    exact_bonus = 10
+
+    def __init__(self):
+        self.state = IndexState(None, [], [], {}, {}, None)
+
+    @property
+    def generation(self):
+        return self.state.generation
+
+    def invalidate(self):
+        """Rebuild the index in each process on the next search."""
+        new_generation(self.generation_key)
+
+    def normalize(self, text):
+        """Normalize a full slug, name, or URI for an exact match."""
+        return text.strip().lower().rstrip('/')
+
+    def split_words(self, text, is_uri=False):
+        """Split text into lowercase words.
+
+        The words of an MDN URI are the path after /docs/, to skip the words
+        (such as developer, mozilla, and en-US) shared by every feature.
+        """
+        text = text.lower()
+        if is_uri:
+            text = text.split('/docs/', 1)[-1]
+        return self.word_re.findall(text)
+
+    def build(self, generation=None):
+        """Load the features and return a new index state."""
+        entries = []
+        exact = {}
+        slugs = {}
+
+        def add(pk, field, text, is_uri=False):
+            weight = self.weights[field]
+            key = self.normalize(text)
+            matches = exact.setdefault(key, {})
+            matches[pk] = max(matches.get(pk, 0), weight)
+            for word in self.split_words(text, is_uri):
+                entries.append((word, pk, weight))
+
+        features = Feature.objects.only('id', 'slug', 'name', 'mdn_uri')
+        for feature in features:
+            pk = feature.pk
+            slugs[pk] = feature.slug
+            add(pk, 'slug', feature.slug)
+            for text in (feature.name or {}).values():
+                add(pk, 'name', text)
+            for text in (feature.mdn_uri or {}).values():
+                add(pk, 'mdn_uri', text, is_uri=True)
+        entries.sort()
+        words = [entry[0] for entry in entries]
+        # A replica may lag the primary, so rebuild after a short time
+        expires = None
+        if is_reading_replica():
+            expires = time() + settings.REPLICA_CACHE_TIMEOUT
+        return IndexState(generation, words, entries, exact, slugs, expires)
+
+    def refresh(self):
+        """Return the index state, rebuilt if features have changed."""
+        state = self.state
+        generation = get_generation(self.generation_key)
+        if (generation != state.generation or
+                (state.expires is not None and time() > state.expires)):
+            state = self.build(generation)
+            self.state = state
+        return state
+
+    def search(self, query):
+        """Return the IDs of features matching a query, best first.
+
+        A feature matches if each word of the query starts a word of the
+        slug, a name, or the MDN URI.  Matches in the slug rank above the
+        name, which rank above the URI, and full words rank above prefixes.
+        A feature with a slug, name, or URI equal to the query ranks first.
+        """
+        state = self.refresh()
+        scores = {}
+        for pk, weight in state.exact.get(self.normalize(query), {}).items():
+            scores[pk] = weight * self.exact_bonus
+
+        is_uri = '://' in query
+        terms = set(self.split_words(query, is_uri))
+        matched = None
+        term_scores = {}
+        for term in terms:
+            hits = {}
+            start = bisect_left(state.words, term)
+            end = bisect_left(state.words, term + six.unichr(0xffff))
+            for word, pk, weight in state.entries[start:end]:
+                if word == term:
+                    weight *= self.word_bonus
+                hits[pk] = max(hits.get(pk, 0), weight)
+            for pk, score in hits.items():
+                term_scores[pk] = term_scores.get(pk, 0) + score
+            if matched is None:
+                matched = set(hits)
+            else:
+                matched &= set(hits)
+        for pk in matched or ():
+            scores[pk] = scores.get(pk, 0) + term_scores[pk]
+        return sorted(scores, key=lambda pk: (-scores[pk], state.slugs[pk]))
+
+
+feature_index = FeatureSearchIndex()
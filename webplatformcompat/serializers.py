@@ -1,19 +1,20 @@
 # -*- coding: utf-8 -*-
 """API Serializers."""
 from collections import OrderedDict
-from copy import deepcopy
+from copy import copy, deepcopy
 
 from django.db.models import CharField
 from django.contrib.auth.models import User
 from rest_framework.serializers import (
-    CurrentUserDefault, DateTimeField, IntegerField,
+    CurrentUserDefault, DateTimeField, Field, IntegerField,
     ModelSerializer, SerializerMethodField, ValidationError)
 
 from . import fields
+from .backends import get_permission_snapshot
 from .drf_fields import (
     CurrentHistoryField, HistoricalObjectField, HistoryField,
     MPTTRelationField, OptionalCharField, OptionalIntegerField,
-    PrimaryKeyRelatedField, TranslatedTextField)
+    PrimaryKeyRelatedField, TranslatedTextField, prune_languages)
 from .history import Changeset
 from .models import (
     Browser, Feature, Maturity, Reference, Section, Specification, Support,
@@ -24,8 +25,58 @@ from .validators import VersionAndStatusValidator
 #
 # "Regular" Serializers
 #
+class CachedFieldsMixin(object):
+    """Build the serializer fields once per serializer class.
+
+    ModelSerializer.get_fields introspects the model and builds every field
+    for each serializer instance.  Instead, the fields are built once, and
+    each instance gets new fields, constructed with the same arguments, as
+    DRF does when copying declared fields.  Mixins that adjust fields for a
+    request change these new fields.
+    """
+
+    _field_prototypes = {}
+
+    def get_fields(self):
+        cls = type(self)
+        prototypes = self._field_prototypes.get(cls)
+        if prototypes is None:
+            prototypes = super(CachedFieldsMixin, self).get_fields()
+            self._field_prototypes[cls] = prototypes
+        return OrderedDict(
+            (name, copy_field(field)) for name, field in prototypes.items())
+
+
+def copy_field(field):
+    """Construct a new field with the arguments of an unbound field.
+
+    This is a lighter version of Field.__deepcopy__.  Querysets are cloned
+    when used, so they are shared.  Nested fields, such as the child of a
+    many-related field, are copied the same way.  Validators and defaults
+    such as UniqueValidator and CurrentUserDefault store the serializer
+    state in set_context, so each field gets its own copies.
+    """
+    kwargs = dict(
+        (key, copy_field_argument(key, value))
+        for key, value in field._kwargs.items())
+    return field.__class__(*field._args, **kwargs)
+
+
+def copy_field_argument(key, value):
+    """Copy a field argument that holds per-instance state."""
+    if isinstance(value, Field):
+        return copy_field(value)
+    if key == 'validators':
+        return [copy(validator) for validator in value]
+    if hasattr(value, 'set_context'):
+        return copy(value)
+    return value
+
+
 class WriteRestrictedMixin(object):
 
+    _write_restricted_names = {}
+
     def get_fields(self):
         """Add read_only flag for write-restricted fields."""
         fields = super(WriteRestrictedMixin, self).get_fields()
@@ -41,19 +92,31 @@ class WriteRestrictedMixin(object):
 
         # Set fields to read-only based on view action
         if set_to_readonly:
-            fields_extra = getattr(self.Meta, 'fields_extra', {})
-            for field_name, field in fields.items():
-                field_extra = fields_extra.get(field_name, {})
-                writable = field_extra.get('writable', True)
-                if writable == set_to_readonly:
-                    assert not field.read_only, (
-                        ('%s was requested to be set read-only for %s,'
-                         ' but is already read-only by default.')
-                        % (field_name, view and view.action or 'unknown'))
-                    field.read_only = True
+            names = self.get_write_restricted_names(set_to_readonly)
+            for field_name in names:
+                field = fields.get(field_name)
+                if field is None:
+                    continue
+                assert not field.read_only, (
+                    ('%s was requested to be set read-only for %s,'
+                     ' but is already read-only by default.')
+                    % (field_name, view and view.action or 'unknown'))
+                field.read_only = True
 
         return fields
 
+    @classmethod
+    def get_write_restricted_names(cls, writable):
+        """Return the names of fields with a fields_extra writable value."""
+        key = (cls, writable)
+        if key not in cls._write_restricted_names:
+            fields_extra = getattr(cls.Meta, 'fields_extra', {})
+            cls._write_restricted_names[key] = [
+                field_name for field_name in cls.Meta.fields
+                if fields_extra.get(field_name, {}).get('writable') ==
+                writable]
+        return cls._write_restricted_names[key]
+
 
 class FieldMapMixin(object):
     """Automatically handle fields used by this project."""
@@ -85,7 +148,7 @@ class FieldsExtraMixin(object):
 
 class HistoricalModelSerializer(
         WriteRestrictedMixin, FieldMapMixin, FieldsExtraMixin,
-        ModelSerializer):
+        CachedFieldsMixin, ModelSerializer):
     """Model serializer with history manager."""
 
     omit_historical_fields = (
@@ -120,8 +183,7 @@ class HistoricalModelSerializer(
         if data and 'history_current' in data:
             if data['history_current'] is not None:
                 history_id = int(data['history_current'])
-                current_history = self.instance.history.all()[0]
-                if current_history.history_id != history_id:
+                if self.instance.current_history_id != history_id:
                     try:
                         historical = self.instance.history.get(
                             history_id=history_id)
@@ -531,7 +593,8 @@ class VersionSerializer(HistoricalModelSerializer):
 # Change control object serializers
 #
 
-class ChangesetSerializer(FieldsExtraMixin, ModelSerializer):
+class ChangesetSerializer(
+        FieldsExtraMixin, CachedFieldsMixin, ModelSerializer):
     """Changeset Serializer."""
 
     target_resource_type = OptionalCharField(required=False)
@@ -601,7 +664,7 @@ class ChangesetSerializer(FieldsExtraMixin, ModelSerializer):
         }
 
 
-class UserSerializer(FieldsExtraMixin, ModelSerializer):
+class UserSerializer(FieldsExtraMixin, CachedFieldsMixin, ModelSerializer):
     """User Serializer."""
 
     created = DateTimeField(source='date_joined', read_only=True)
@@ -622,7 +685,7 @@ class UserSerializer(FieldsExtraMixin, ModelSerializer):
             #  cache.user_v1_serializer) have this property
             return obj.group_names
         except AttributeError:
-            return sorted(obj.groups.values_list('name', flat=True))
+            return get_permission_snapshot(obj)['groups']
 
     class Meta:
         model = User
@@ -647,33 +710,44 @@ class UserSerializer(FieldsExtraMixin, ModelSerializer):
 
 
 class ArchiveMixin(object):
+
+    _archive_changes = {}
+
     def get_fields(self):
         """Modify fields when loading or preparing an archive."""
         fields = super(ArchiveMixin, self).get_fields()
-        fields_extra = getattr(self.Meta, 'fields_extra', {})
-        to_delete = []
-        append_id = []
-        for field_name, field in fields.items():
-            field_extra = fields_extra.get(field_name, {})
-            archive = field_extra.get('archive')
-            link = field_extra.get('link')
-            if archive == 'omit':
-                # Does not appear in archived representation
-                to_delete.append(field_name)
-            elif link in ('from_one', 'from_many'):
-                # Defer loading until HistoricalObjectSerializer.get_archive
-                to_delete.append(field_name)
-            elif link == 'to_one':
-                # Use the name_id field
-                append_id.append(field_name)
+        to_delete, append_id = self.get_archive_changes(fields)
         for field_name in to_delete:
             del fields[field_name]
         for field_name in append_id:
             fields[field_name].source = field_name + '_id'
         return fields
 
+    @classmethod
+    def get_archive_changes(cls, fields):
+        """Return the fields to delete, and the fields to load by ID."""
+        if cls not in cls._archive_changes:
+            fields_extra = getattr(cls.Meta, 'fields_extra', {})
+            to_delete = []
+            append_id = []
+            for field_name in fields:
+                field_extra = fields_extra.get(field_name, {})
+                archive = field_extra.get('archive')
+                link = field_extra.get('link')
+                if archive == 'omit':
+                    # Does not appear in archived representation
+                    to_delete.append(field_name)
+                elif link in ('from_one', 'from_many'):
+                    # Deferred until HistoricalObjectSerializer.get_archive
+                    to_delete.append(field_name)
+                elif link == 'to_one':
+                    # Use the name_id field
+                    append_id.append(field_name)
+            cls._archive_changes[cls] = (to_delete, append_id)
+        return cls._archive_changes[cls]
+
 
-class HistoricalObjectSerializer(ModelSerializer):
+class HistoricalObjectSerializer(CachedFieldsMixin, ModelSerializer):
     """Common serializer attributes for Historical models."""
 
     id = IntegerField(source='history_id')
@@ -690,11 +764,25 @@ class HistoricalObjectSerializer(ModelSerializer):
         '-': 'deleted',
     }
 
+    # Shared between classes
+    _fields_extra = {}
+    _translated_names = {}
+
     def get_event(self, obj):
         return self.EVENT_CHOICES[obj.history_type]
 
     @classmethod
     def get_fields_extra(cls):
+        """Return fields_extra, completed with the archive_extra values.
+
+        This is computed once per class, and should not be modified.
+        """
+        if cls not in cls._fields_extra:
+            cls._fields_extra[cls] = cls.build_fields_extra()
+        return cls._fields_extra[cls]
+
+    @classmethod
+    def build_fields_extra(cls):
         extra = deepcopy(cls.Meta.fields_extra)
         archive_extra = cls.Meta.archive_extra
         extra['id']['resource'] = archive_extra['history_resource']
@@ -711,7 +799,57 @@ class HistoricalObjectSerializer(ModelSerializer):
         extra['archived_representation']['name'] = object_resource
         return extra
 
+    @classmethod
+    def get_translated_names(cls):
+        """Return the names of the translated archived attributes."""
+        if cls not in cls._translated_names:
+            fields = cls.ArchivedObject().fields
+            cls._translated_names[cls] = tuple(
+                name for name, field in fields.items()
+                if isinstance(field, TranslatedTextField))
+        return cls._translated_names[cls]
+
     def get_archived_representation(self, obj):
+        """Return the stored archived representation, or compute it.
+
+        Translated attributes are limited to the requested languages, like
+        the current representation.
+        """
+        stored = getattr(obj, 'history_archive', None)
+        if stored:
+            data = self.load_archived_representation(stored, obj)
+        else:
+            data = self.build_archived_representation(obj)
+        languages = self.context.get('languages')
+        if languages is not None:
+            for name in self.get_translated_names():
+                if isinstance(data.get(name), dict):
+                    data[name] = prune_languages(data[name], languages)
+        return data
+
+    def load_archived_representation(self, stored, obj):
+        """Restore a stored archived representation.
+
+        The field order is restored, and the links to the historical record
+        are added, since the archive is stored before the record has an ID.
+        """
+        fields = self.ArchivedObject.Meta.fields
+        position = dict((name, pos) for pos, name in enumerate(fields))
+
+        def field_order(item):
+            return position.get(item[0], len(fields))
+
+        data = OrderedDict(sorted(stored.items(), key=field_order))
+        data['links'] = OrderedDict(
+            sorted(stored.get('links', {}).items(), key=field_order))
+        fields_extra = getattr(self.ArchivedObject.Meta, 'fields_extra', {})
+        for name in fields:
+            if fields_extra.get(name, {}).get('archive') == 'history_id':
+                data['links'][name] = str(obj.history_id)
+        return data
+
+    def build_archived_representation(self, obj):
+        """Serialize the archived representation of a historical record."""
         serializer = self.ArchivedObject(obj)
         raw_data = serializer.data
         data = OrderedDict()
@@ -736,10 +874,14 @@ class HistoricalObjectSerializer(ModelSerializer):
                     links[name] = value
                 else:
                     assert link == 'from_many', 'Unhandled link "%s"' % link
-                    related = getattr(obj, name)
-                    links[name] = [str(rel.pk) for rel in related]
+                    # Stored as a list of primary keys by additional_fields
+                    related_pks = getattr(obj, name)
+                    links[name] = [str(pk) for pk in related_pks]
             elif archive == 'history_id':
-                links[name] = str(obj.history_id)
+                if obj.history_id is None:
+                    links[name] = None
+                else:
+                    links[name] = str(obj.history_id)
             else:
                 assert archive == 'omit', (
                     'Unknown value "%s" for fields_extra["%s"]["archive"]'
@@ -768,6 +910,10 @@ class HistoricalObjectSerializer(ModelSerializer):
                 'archived_resource': True,
             },
         }
+        # Columns read by method fields, for loading sparse fieldsets
+        field_sources = {
+            'event': ('history_type',),
+        }
 
 
 class HistoricalBrowserSerializer(HistoricalObjectSerializer):
@@ -876,3 +1022,12 @@ class HistoricalVersionSerializer(HistoricalObjectSerializer):
             'history_resource': 'historical_versions',
             'object_resource': 'versions',
         }
+
+
+# Historical serializers by historical model, for storing archives
+HISTORICAL_SERIALIZERS = dict(
+    (serializer_cls.Meta.model, serializer_cls) for serializer_cls in (
+        HistoricalBrowserSerializer, HistoricalFeatureSerializer,
+        HistoricalMaturitySerializer, HistoricalReferenceSerializer,
+        HistoricalSectionSerializer, HistoricalSpecificationSerializer,
+        HistoricalSupportSerializer, HistoricalVersionSerializer))
@@ -5,6 +5,11 @@ from __future__ import unicode_literals
 
 from django.contrib.auth.models import Group
 
+from .backends import (
+    invalidate_permission_snapshot, invalidate_permission_snapshots)
+from .history import is_cache_delayed
+from .replicas import update_open_changesets
+from .slugs import get_saved_slug, invalidate_slug, update_slug
 from .tasks import update_cache_for_instance
 
 
@@ -15,19 +20,70 @@ def add_user_to_change_resource_group(
         instance.groups.add(Group.objects.get(name='change-resource'))
 
 
+def invalidate_group_permissions(sender, instance, **kwargs):
+    """Drop all permission snapshots when a group or its permissions change."""
+    action = kwargs.get('action')
+    if action in (None, 'post_add', 'post_remove', 'post_clear'):
+        invalidate_permission_snapshots()
+
+
+def invalidate_slug_lookup(sender, instance, **kwargs):
+    """Drop the cached ID lookup when an instance is deleted."""
+    invalidate_slug(sender, instance.slug)
+
+
+def is_slug_saved(update_fields):
+    """Return True if a save with these update_fields can change the slug."""
+    return update_fields is None or 'slug' in update_fields
+
+
+def pre_save_slug_lookup(sender, instance, update_fields=None, **kwargs):
+    """Load the slug of an instance before it is saved."""
+    if is_slug_saved(update_fields):
+        instance._saved_slug = get_saved_slug(sender, instance.pk)
+
+
+def post_save_slug_lookup(sender, instance, update_fields=None, **kwargs):
+    """Drop the cached ID lookups for the new and old slugs."""
+    if is_slug_saved(update_fields):
+        old_slug = getattr(instance, '_saved_slug', None)
+        update_slug(sender, instance.slug, old_slug)
+
+
+def m2m_changed_user_permissions(
+        sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop permission snapshots when a user's groups or permissions change.
+
+    The group names are part of the cached user, which is updated as well.
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_permission_snapshot(instance.pk)
+        update_cache_for_instance('User', instance.pk, instance)
+    elif pk_set is None:
+        invalidate_permission_snapshots()
+    else:
+        for pk in pk_set:
+            invalidate_permission_snapshot(pk)
+            update_cache_for_instance('User', pk)
+
+
 def post_delete_update_cache(sender, instance, **kwargs):
     """Invalidate the cache when an instance is deleted."""
     name = sender.__name__
-    delay_cache = getattr(instance, '_delay_cache', False)
-    if not delay_cache:
+    if not is_cache_delayed(instance):
         update_cache_for_instance(name, instance.pk, instance)
 
 
 def post_save_changeset(sender, instance, created, raw, **kwargs):
-    """Invalidate the user cache after a changeset is created."""
-    if raw or not created:
+    """Track open changesets, and update the user cache on creation."""
+    if raw:
         return
-    update_cache_for_instance('User', instance.user.pk, instance.user)
+    if created or instance.closed:
+        update_open_changesets(instance)
+    if created:
+        update_cache_for_instance('User', instance.user.pk, instance.user)
 
 
 def post_save_update_cache(sender, instance, created, raw, **kwargs):
@@ -37,6 +93,12 @@ def post_save_update_cache(sender, instance, created, raw, **kwargs):
     name = sender.__name__
     if name == 'User' and created:
         return
-    delay_cache = getattr(instance, '_delay_cache', False)
-    if not delay_cache:
+    if not is_cache_delayed(instance):
         update_cache_for_instance(name, instance.pk, instance)
+
+
+def post_save_user_permissions(sender, instance, created, raw, **kwargs):
+    """Drop the permission snapshot when a user is updated."""
+    if raw or created:
+        return
+    invalidate_permission_snapshot(instance.pk)
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""Cached lookup of resource IDs by slug.
+
+The ID for a slug is cached for SLUG_CACHE_TIMEOUT seconds on the first
+lookup.  When a resource is saved or deleted, the lookups of its old and new
+slugs are dropped.  They are not filled on save, because the save may be
+rolled back, and the next lookup reads the committed slug.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .replicas import get_cache_timeout
+
+
+def get_slug_key(model, slug):
+    return 'slug_pk:%s:%s' % (model.__name__, slug)
+
+
+def get_pk_by_slug(model, slug):
+    """Return the ID of the resource with a slug, or None."""
+    slug_key = get_slug_key(model, slug)
+    pk = cache.get(slug_key)
+    if pk is None:
+        try:
+            pk = model.objects.only('pk').get(slug=slug).pk
+        except model.DoesNotExist:
+            return None
+        cache.set(
+            slug_key, pk, get_cache_timeout(settings.SLUG_CACHE_TIMEOUT))
+    return pk
+
+
+def get_saved_slug(model, pk):
+    """Return the slug of a resource in the database, or None."""
+    if pk is None:
+        return None
+    slugs = model.objects.filter(pk=pk).values_list('slug', flat=True)
+    return slugs.first()
+
+
+def update_slug(model, slug, old_slug=None):
+    """Drop the cached lookups of the new and old slugs of a resource."""
+    keys = [get_slug_key(model, slug)]
+    if old_slug is not None and old_slug != slug:
+        keys.append(get_slug_key(model, old_slug))
+    cache.delete_many(keys)
+
+
+def invalidate_slug(model, slug):
+    """Drop the cached lookup of a deleted resource."""
+    cache.delete(get_slug_key(model, slug))
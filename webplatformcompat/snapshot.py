@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""Point-in-time snapshots, changeset diffs, and the change feed."""
+
+from collections import OrderedDict, namedtuple
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.db.models import (
+    BigIntegerField, ExpressionWrapper, F, Max, Min, Q, Value)
+
+from .history import Changeset, HistoryCompaction, get_stale_cutoff
+from .models import (
+    Browser, Feature, Maturity, Reference, Section, Specification, Support,
+    Version)
+from .serializers import (
+    HistoricalBrowserSerializer, HistoricalFeatureSerializer,
+    HistoricalMaturitySerializer, HistoricalReferenceSerializer,
+    HistoricalSectionSerializer, HistoricalSpecificationSerializer,
+    HistoricalSupportSerializer, HistoricalVersionSerializer)
+
+RESOURCES = OrderedDict((
+    ('browsers', (Browser, HistoricalBrowserSerializer)),
+    ('versions', (Version, HistoricalVersionSerializer)),
+    ('features', (Feature, HistoricalFeatureSerializer)),
+    ('supports', (Support, HistoricalSupportSerializer)),
+    ('specifications', (Specification, HistoricalSpecificationSerializer)),
+    ('maturities', (Maturity, HistoricalMaturitySerializer)),
+    ('sections', (Section, HistoricalSectionSerializer)),
+    ('references', (Reference, HistoricalReferenceSerializer)),
+))
+
+history_floor_key = 'history_floor'
+
+# Historical record IDs are below this, so it orders by changeset first
+CHANGESET_ORDER = 2 ** 31
+
+
+def latest_history_ids(records):
+    """Annotate the latest history_id per object in grouped records.
+
+    records is a queryset of historical records, grouped by values().  The
+    latest record for an object is the last record in its last changeset,
+    ordered by (history_changeset_id, history_id).  Changesets can be open
+    at the same time, so the highest history_id may be in an earlier
+    changeset.  The order is combined into one bigint, so that the
+    aggregate is a single subquery.
+    """
+    position = ExpressionWrapper(
+        F('history_changeset_id') * Value(CHANGESET_ORDER) +
+        F('history_id'), output_field=BigIntegerField())
+    return (
+        records
+        .annotate(
+            latest_position=Max(position),
+            latest_changeset_id=Max('history_changeset_id'))
+        .annotate(current_history_id=ExpressionWrapper(
+            F('latest_position') -
+            F('latest_changeset_id') * Value(CHANGESET_ORDER),
+            output_field=BigIntegerField())))
+
+
+def get_history_floor():
+    """Return the lowest changeset ID with complete history, or 0.
+
+    Historical records before the floor were archived by compact_history, so
+    snapshots of earlier changesets are incomplete.
+    """
+    floor = cache.get(history_floor_key)
+    if floor is None:
+        floor = HistoryCompaction.objects.aggregate(
+            floor=Max('floor'))['floor'] or 0
+        cache.set(history_floor_key, floor, None)
+    return floor
+
+
+def invalidate_history_floor():
+    """Drop the cached history floor after a compaction."""
+    cache.delete(history_floor_key)
+
+
+class Snapshot(object):
+    """The API resources as of a changeset.
+
+    The state of an object as of changeset N is its latest historical
+    record in a changeset with an ID of N or less, ordered by changeset ID,
+    then history_id.  Objects where that record is a deletion are omitted
+    from the snapshot.
+    """
+
+    resources = RESOURCES
+    chunk_size = 1000
+
+    def __init__(self, changeset_id):
+        self.changeset_id = changeset_id
+
+    def history_ids(self, model):
+        """Return a subquery of the current history IDs for a model.
+
+        This is one "latest row per object" query, using the index on
+        (id, history_changeset_id).
+        """
+        historical = model.history.model
+        current = latest_history_ids(
+            historical.objects
+            .filter(history_changeset_id__lte=self.changeset_id)
+            .order_by()
+            .values('id'))
+        return current.values_list('current_history_id', flat=True)
+
+    def get_queryset(self, model):
+        """Return the historical records of a model as of the changeset."""
+        historical = model.history.model
+        return (
+            historical.objects
+            .filter(history_id__in=self.history_ids(model))
+            .exclude(history_type='-')
+            .order_by('id'))
+
+    def iter_records(self, model):
+        """Yield the historical records of a model as of the changeset.
+
+        Records are loaded chunk_size objects at a time, in ID order.  Each
+        chunk is a limited "latest row per object" query after the last ID,
+        so that memory use does not grow with the number of objects.
+        """
+        historical = model.history.model
+        last_id = 0
+        while True:
+            current = latest_history_ids(
+                historical.objects
+                .filter(
+                    history_changeset_id__lte=self.changeset_id,
+                    id__gt=last_id)
+                .order_by('id')
+                .values('id')
+            ).values_list('id', 'current_history_id')
+            chunk = list(current[:self.chunk_size])
+            if not chunk:
+                return
+            last_id = chunk[-1][0]
+            records = (
+                historical.objects
+                .filter(history_id__in=[pair[1] for pair in chunk])
+                .exclude(history_type='-')
+                .order_by('id'))
+            for record in records:
+                yield record
+            if len(chunk) < self.chunk_size:
+                return
+
+    def archived_representations(self, resource_type):
+        """Yield the archived representations of a resource type."""
+        model, serializer_cls = self.resources[resource_type]
+        serializer = serializer_cls()
+        for historical in self.iter_records(model):
+            yield serializer.get_archived_representation(historical)
+
+
+class ChangesetDiff(object):
+    """The before and after state of the objects changed in a changeset.
+
+    The "after" state of an object is the last historical record for it in
+    the changeset.  The "before" state is the latest historical record for
+    it before its first record in the changeset, or None if the object was
+    created in the changeset.  Objects are loaded chunk_size at a time, with
+    four queries per chunk.
+    """
+
+    resources = RESOURCES
+    chunk_size = 100
+
+    def __init__(self, changeset_id):
+        self.changeset_id = changeset_id
+
+    def changes(self, resource_type):
+        """Yield (id, change, before, after) for a resource type.
+
+        change is 'created', 'updated', or 'deleted', and before and after are
+        archived representations, or None if the object did not exist.
+        Objects both created and deleted in the changeset are omitted.
+        """
+        model, serializer_cls = self.resources[resource_type]
+        historical = model.history.model
+        serializer = serializer_cls()
+        last_id = 0
+        while True:
+            bounds = (
+                historical.objects
+                .filter(
+                    history_changeset_id=self.changeset_id, id__gt=last_id)
+                .order_by('id')
+                .values('id')
+                .annotate(
+                    first_id=Min('history_id'), after_id=Max('history_id'))
+                .values_list('id', 'first_id', 'after_id'))
+            chunk = list(bounds[:self.chunk_size])
+            if not chunk:
+                return
+            last_id = chunk[-1][0]
+            for change in self.chunk_changes(historical, serializer, chunk):
+                yield change
+            if len(chunk) < self.chunk_size:
+                return
+
+    def chunk_changes(self, historical, serializer, chunk):
+        """Yield the changes for a chunk of (id, first_id, after_id)."""
+        earlier = reduce(or_, (
+            Q(id=pk, history_id__lt=first_id) for pk, first_id, _ in chunk))
+        before_ids = (
+            historical.objects
+            .filter(earlier)
+            .order_by()
+            .values('id')
+            .annotate(before_id=Max('history_id'))
+            .values_list('before_id', flat=True))
+        befores = dict(
+            (before.id, before) for before in
+            historical.objects
+            .filter(history_id__in=before_ids)
+            .exclude(history_type='-'))
+        afters = historical.objects.filter(
+            history_id__in=[after_id for _, _, after_id in chunk]
+        ).order_by('id')
+
+        for after in afters:
+            before = befores.get(after.id)
+            if before is not None:
+                before_data = serializer.get_archived_representation(before)
+            else:
+                before_data = None
+
+            if after.history_type == '-':
+                if before_data is None:
+                    continue
+                change = 'deleted'
+                after_data = None
+            else:
+                change = 'updated' if before_data else 'created'
+                after_data = serializer.get_archived_representation(after)
+            yield after.id, change, before_data, after_data
+
+
+Change = namedtuple(
+    'Change', (
+        'changeset_id', 'type_index', 'history_id', 'resource_type', 'id',
+        'event'))
+
+
+class ChangeFeed(object):
+    """The historical records created after a changeset.
+
+    Records are ordered by changeset ID, then resource type, then history ID.
+    The position in the feed is a cursor of these three values for the last
+    record read.  Open changesets can still get new records, so the feed
+    stops before the oldest open changeset.  Stale open changesets, created
+    more than CHANGESET_MAX_OPEN_SECONDS ago, do not stop the feed.  Records
+    added to them after the feed moves past are not listed.
+    """
+
+    resources = RESOURCES
+    EVENTS = {
+        '+': 'created',
+        '~': 'changed',
+        '-': 'deleted',
+    }
+
+    def __init__(self, since=0, cursor=None):
+        """Start the feed after a changeset, or at a cursor."""
+        self.cursor = cursor or (since, len(self.resources), 0)
+
+    @staticmethod
+    def get_horizon():
+        """Return the ID of the oldest open changeset, or None.
+
+        Stale open changesets are skipped.  Records before the horizon are
+        final, and records at or after it may still be added.
+        """
+        open_changesets = Changeset.objects.filter(
+            closed=False, created__gte=get_stale_cutoff())
+        return open_changesets.aggregate(horizon=Min('id'))['horizon']
+
+    @staticmethod
+    def format_cursor(cursor):
+        return '%d.%d.%d' % tuple(cursor)
+
+    @staticmethod
+    def parse_cursor(value):
+        """Parse a cursor string, or raise ValueError."""
+        cursor = tuple(int(part) for part in value.split('.'))
+        if len(cursor) != 3:
+            raise ValueError('Expected 3 cursor parts, got %d' % len(cursor))
+        return cursor
+
+    def page(self, limit):
+        """Return up to limit Changes after the cursor.
+
+        Each resource type takes one query, with a limit, using the index on
+        history_changeset_id.
+        """
+        changeset_id, type_index, history_id = self.cursor
+        horizon = self.get_horizon()
+        changes = []
+        resources = enumerate(self.resources.items())
+        for index, (resource_type, (model, _)) in resources:
+            later = Q(history_changeset_id__gt=changeset_id)
+            if index > type_index:
+                later |= Q(history_changeset_id=changeset_id)
+            elif index == type_index:
+                later |= Q(
+                    history_changeset_id=changeset_id,
+                    history_id__gt=history_id)
+            records = model.history.model.objects.filter(later)
+            if horizon is not None:
+                records = records.filter(history_changeset_id__lt=horizon)
+            rows = (
+                records
+                .order_by('history_changeset_id', 'history_id')
+                .values_list(
+                    'history_changeset_id', 'history_id', 'id',
+                    'history_type')[:limit])
+            for row_changeset_id, row_history_id, pk, history_type in rows:
+                changes.append(Change(
+                    row_changeset_id, index, row_history_id, resource_type,
+                    pk, self.EVENTS[history_type]))
+        changes.sort()
+        return changes[:limit]
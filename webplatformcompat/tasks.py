@@ -1,8 +1,31 @@
 """API background tasks."""
+from collections import deque
+
 from celery import shared_task
 from django.conf import settings
 
 from .cache import Cache
+from .history import delay_response_cache_invalidation
+from .response_cache import ResponseCache
+from .search import feature_index
+
+# Models that appear in cached responses.  Users are only in uncached views.
+RESPONSE_CACHE_MODELS = frozenset((
+    'Browser', 'Feature', 'Maturity', 'Reference', 'Section',
+    'Specification', 'Support', 'Version'))
+
+
+def invalidate_for_models(model_names):
+    """Expire the cached responses and indexes that include changed models.
+
+    During a write request, cached responses are expired once, when the
+    request is done.
+    """
+    if 'Feature' in model_names:
+        feature_index.invalidate()
+    if RESPONSE_CACHE_MODELS.intersection(model_names):
+        if not delay_response_cache_invalidation():
+            ResponseCache().invalidate()
 
 
 @shared_task(ignore_result=True)
@@ -12,9 +35,40 @@ def update_cache_for_instance(
     cache = Cache()
     invalid = cache.update_instance(
         model_name, instance_pk, instance, version, update_only=update_only)
+    invalidate_for_models([model_name])
     DRF_INSTANCE_CACHE_POPULATE_COLD = getattr(
         settings, 'DRF_INSTANCE_CACHE_POPULATE_COLD', True)
     for invalid_name, invalid_pk, invalid_version in invalid:
         update_cache_for_instance.delay(
             invalid_name, invalid_pk, version=invalid_version,
             update_only=not DRF_INSTANCE_CACHE_POPULATE_COLD)
+
+
+@shared_task(ignore_result=True)
+def update_cache_for_instances(instances):
+    """Update the caches of instances changed together, such as a changeset.
+
+    instances is a list of (model name, pk) pairs.  Related instances are
+    updated in the same task, rather than in new tasks, so that cached
+    responses are expired once, after every instance is updated.
+    """
+    cache = Cache()
+    DRF_INSTANCE_CACHE_POPULATE_COLD = getattr(
+        settings, 'DRF_INSTANCE_CACHE_POPULATE_COLD', True)
+    pending = deque(
+        (model_name, pk, None, False) for model_name, pk in instances)
+    queued = set((model_name, pk) for model_name, pk in instances)
+    model_names = set()
+    while pending:
+        model_name, pk, version, update_only = pending.popleft()
+        queued.discard((model_name, pk))
+        model_names.add(model_name)
+        invalid = cache.update_instance(
+            model_name, pk, None, version, update_only=update_only)
+        for invalid_name, invalid_pk, invalid_version in invalid:
+            if (invalid_name, invalid_pk) not in queued:
+                queued.add((invalid_name, invalid_pk))
+                pending.append((
+                    invalid_name, invalid_pk, invalid_version,
+                    not DRF_INSTANCE_CACHE_POPULATE_COLD))
+    invalidate_for_models(model_names)
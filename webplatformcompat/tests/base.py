@@ -1,4 +1,6 @@
 """Common functionality for testing the API."""
+from contextlib import contextmanager
+
 from django.contrib.auth.models import Group, User
 from django.core.cache import cache
 from django.core.urlresolvers import reverse
@@ -7,6 +9,7 @@ from django.utils import encoding, six
 
 from rest_framework.test import APITestCase as BaseAPITestCase
 
+from webplatformcompat.budgets import RequestStats
 from webplatformcompat.history import Changeset
 
 
@@ -22,6 +25,21 @@ class TestMixin(object):
         """Create a path to a namespaced API view."""
         return reverse('%s:%s' % (self.namespace, viewname), kwargs=kwargs)
 
+    @contextmanager
+    def assertWithinBudget(self, **budget):
+        """Assert the queries, cache calls, and tasks of a block.
+
+        The budget uses the same limits as settings.REQUEST_BUDGETS, such as
+        queries=5 or cache_sets=0.  Requests in the block are also held to
+        the REQUEST_BUDGETS of their endpoints.
+        """
+        with self.settings(REQUEST_BUDGETS_STRICT=True), \
+                RequestStats() as stats:
+            yield stats
+        over = stats.over_budget(budget)
+        if over:
+            self.fail('Budget exceeded: %s' % ', '.join(over))
+
     def login_user(self, groups=None):
         """Create and login a user, saving to self.user.
 
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat/backends.py."""
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import Group, Permission, User
+from django.test.utils import override_settings
+import mock
+
+from webplatformcompat.backends import (
+    CachedModelBackend, get_permission_snapshot)
+
+from .base import TestCase
+
+
+class TestCachedModelBackend(TestCase):
+    def setUp(self):
+        self.backend = CachedModelBackend()
+        self.user = User.objects.create(username='user')
+        self.change_browser = 'webplatformcompat.change_browser'
+        self.delete_browser = 'webplatformcompat.delete_browser'
+
+    def fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_permissions_cached(self):
+        self.assertTrue(
+            self.backend.has_perm(self.fresh_user(), self.change_browser))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(self.backend.has_perm(user, self.change_browser))
+            self.assertEqual(
+                ['change-resource'], get_permission_snapshot(user)['groups'])
+
+    def test_group_added(self):
+        self.assertFalse(
+            self.backend.has_perm(self.fresh_user(), self.delete_browser))
+        self.user.groups.add(Group.objects.get(name='delete-resource'))
+        self.assertTrue(
+            self.backend.has_perm(self.fresh_user(), self.delete_browser))
+
+    def test_group_removed_reverse(self):
+        self.assertTrue(
+            self.backend.has_perm(self.fresh_user(), self.change_browser))
+        group = Group.objects.get(name='change-resource')
+        group.user_set.remove(self.user)
+        self.assertFalse(
+            self.backend.has_perm(self.fresh_user(), self.change_browser))
+
+    def test_group_permission_removed(self):
+        self.assertTrue(
+            self.backend.has_perm(self.fresh_user(), self.change_browser))
+        group = Group.objects.get(name='change-resource')
+        group.permissions.remove(
+            Permission.objects.get(codename='change_browser'))
+        self.assertFalse(
+            self.backend.has_perm(self.fresh_user(), self.change_browser))
+
+    def test_group_renamed(self):
+        self.assertEqual(
+            ['change-resource'],
+            get_permission_snapshot(self.fresh_user())['groups'])
+        group = Group.objects.get(name='change-resource')
+        group.name = 'changers'
+        group.save()
+        self.assertEqual(
+            ['changers'], get_permission_snapshot(self.fresh_user())['groups'])
+
+    @override_settings(PERMISSION_SNAPSHOT_TIMEOUT=60)
+    def test_timeout(self):
+        with mock.patch('webplatformcompat.backends.cache') as mock_cache:
+            mock_cache.get.return_value = None
+            get_permission_snapshot(self.fresh_user())
+        self.assertEqual(60, mock_cache.set.call_args[0][2])
+
+    def test_user_permission_added(self):
+        self.user.user_permissions.add(
+            Permission.objects.get(codename='delete_browser'))
+        self.assertTrue(
+            self.backend.has_perm(self.fresh_user(), self.delete_browser))
+
+    def test_superuser(self):
+        self.backend.has_perm(self.fresh_user(), self.delete_browser)
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertTrue(
+            self.backend.has_perm(self.fresh_user(), self.delete_browser))
+
+    def test_inactive(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(
+            self.backend.has_perm(self.fresh_user(), self.change_browser))
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""Tests for the backfill_history_archive management command."""
+from __future__ import unicode_literals
+
+from django.core.management import call_command
+from django.utils.six import StringIO
+
+from webplatformcompat.models import Browser, Feature
+from webplatformcompat.serializers import HistoricalBrowserSerializer
+
+from .base import TestCase
+
+
+class TestBackfillHistoryArchive(TestCase):
+    def setUp(self):
+        self.browser = self.create(
+            Browser, slug='browser', name={'en': 'Browser'})
+        self.browser.name = {'en': 'Renamed'}
+        self.browser.save()
+        self.feature = self.create(Feature, slug='feature')
+        Browser.history.model.objects.update(history_archive=None)
+
+    def call(self, *args):
+        out = StringIO()
+        call_command('backfill_history_archive', *args, stdout=out)
+        return out.getvalue()
+
+    def test_backfill(self):
+        out = self.call('--batch-size', '1')
+        self.assertEqual(
+            'browsers: 2 historical records.\n'
+            'Stored archives for 2 historical records.\n', out)
+        serializer = HistoricalBrowserSerializer()
+        for record in self.browser.history.all():
+            self.assertTrue(record.history_archive)
+            self.assertEqual(
+                serializer.build_archived_representation(record),
+                serializer.get_archived_representation(record))
+
+    def test_nothing_to_backfill(self):
+        self.call()
+        self.assertEqual(
+            'Stored archives for 0 historical records.\n', self.call())
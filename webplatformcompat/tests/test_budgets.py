@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat/budgets.py."""
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+import mock
+
+from webplatformcompat.budgets import BudgetExceeded, RequestStats
+from webplatformcompat.models import Browser, Feature
+from webplatformcompat.tasks import update_cache_for_instance
+
+from .base import APITestCase, TestCase
+
+
+class TestRequestStats(TestCase):
+    def test_queries(self):
+        with RequestStats() as stats:
+            list(Browser.objects.all())
+            Browser.objects.count()
+        self.assertEqual(2, stats.counts['queries'])
+        self.assertGreaterEqual(stats.counts['query_time'], 0)
+
+    def test_cache_calls(self):
+        with RequestStats() as stats:
+            cache.set('key', 'value')
+            cache.get('key')
+            cache.get_many(['key', 'other'])
+        self.assertEqual(2, stats.counts['cache_gets'])
+        self.assertEqual(1, stats.counts['cache_sets'])
+
+    def test_not_counting(self):
+        with RequestStats() as stats:
+            pass
+        cache.get('key')
+        Browser.objects.count()
+        self.assertEqual(0, stats.counts['queries'])
+        self.assertEqual(0, stats.counts['cache_gets'])
+
+    def test_tasks(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        with RequestStats() as stats:
+            update_cache_for_instance('Browser', browser.pk, browser)
+            update_cache_for_instance.delay('Browser', browser.pk)
+        self.assertEqual(1, stats.counts['tasks'])
+
+    def test_over_budget(self):
+        stats = RequestStats()
+        stats.counts['queries'] = 3
+        stats.counts['cache_gets'] = 2
+        self.assertEqual([], stats.over_budget({'queries': 3}))
+        self.assertEqual(
+            ['queries=3 (limit 2)', 'cache_gets=2 (limit 0)'],
+            stats.over_budget({'queries': 2, 'cache_gets': 0, 'tasks': 0}))
+
+    def test_str(self):
+        self.assertEqual(
+            'queries=0 query_time=0.000 cache_gets=0 cache_sets=0'
+            ' cache_time=0.000 tasks=0', str(RequestStats()))
+
+    def test_assert_within_budget(self):
+        with self.assertWithinBudget(queries=1):
+            Browser.objects.count()
+        with self.assertRaises(AssertionError):
+            with self.assertWithinBudget(queries=0):
+                Browser.objects.count()
+
+
+class TestRequestStatsMiddleware(APITestCase):
+    def setUp(self):
+        self.url = reverse('v2:browser-list')
+
+    @override_settings(
+        REQUEST_BUDGETS={'v2:browser-list.list': {'queries': 0}})
+    def test_over_budget_strict(self):
+        with self.assertRaises(BudgetExceeded) as context:
+            with self.assertWithinBudget():
+                self.client.get(self.url)
+        self.assertIn(
+            'Request budget exceeded for v2:browser-list.list: queries=',
+            str(context.exception))
+
+    @override_settings(
+        REQUEST_BUDGETS={'v2:browser-list': {'queries': 0}})
+    @mock.patch('webplatformcompat.budgets.logger')
+    def test_over_budget_logged(self, mock_logger):
+        response = self.client.get(self.url)
+        self.assertEqual(200, response.status_code)
+        message = mock_logger.warning.call_args[0][0]
+        self.assertTrue(message.startswith(
+            'Request budget exceeded for v2:browser-list.list: queries='))
+
+    @override_settings(
+        REQUEST_BUDGETS={'v2:browser-list.create': {'queries': 0}})
+    @mock.patch('webplatformcompat.budgets.logger')
+    def test_within_budget(self, mock_logger):
+        response = self.client.get(self.url)
+        self.assertEqual(200, response.status_code)
+        self.assertFalse(mock_logger.warning.called)
+        args = mock_logger.info.call_args[0]
+        self.assertEqual(
+            ('Request stats for %s.%s: %s', 'v2:browser-list', 'list'),
+            args[:3])
+
+    def test_view_feature_budget(self):
+        feature = self.create(Feature, slug='feature')
+        url = reverse('v2:viewfeatures-detail', kwargs={'pk': feature.pk})
+        self.client.get(url)
+        with self.assertWithinBudget():
+            response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+
+    @override_settings(USE_REQUEST_STATS=False)
+    @mock.patch('webplatformcompat.budgets.logger')
+    def test_disabled(self, mock_logger):
+        self.client.get(self.url)
+        self.assertFalse(mock_logger.info.called)
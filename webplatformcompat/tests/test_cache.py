@@ -9,6 +9,7 @@ from django.test.utils import override_settings
 
 from webplatformcompat.cache import Cache
 from webplatformcompat.history import Changeset
+from webplatformcompat.replicas import ReplicaCacheProxy, set_read_database
 from webplatformcompat.models import (
     Browser, Feature, Maturity, Reference, Section, Specification, Support,
     Version)
@@ -21,6 +22,18 @@ class TestCache(TestCase):
         self.cache = Cache()
         self.login_user(groups=['change-resource'])
 
+    @override_settings(REPLICA_CACHE_TIMEOUT=60)
+    def test_replica_cache_timeout(self):
+        self.assertNotIsInstance(self.cache.cache, ReplicaCacheProxy)
+        set_read_database('replica1')
+        try:
+            proxy = self.cache.cache
+            self.assertIsInstance(proxy, ReplicaCacheProxy)
+            self.assertEqual(60, proxy.get_timeout(None))
+            self.assertEqual(30, proxy.get_timeout(30))
+        finally:
+            set_read_database(None)
+
     def test_browser_v1_serializer(self):
         browser = self.create(Browser)
         out = self.cache.browser_v1_serializer(browser)
@@ -695,7 +708,8 @@ class TestCache(TestCase):
 
     def test_user_v1_loader(self):
         user = self.create(User)
-        with self.assertNumQueries(3):
+        # Group names are in the permission snapshot, cached on group change
+        with self.assertNumQueries(2):
             obj = self.cache.user_v1_loader(user.pk)
         with self.assertNumQueries(0):
             serialized = self.cache.user_v1_serializer(obj)
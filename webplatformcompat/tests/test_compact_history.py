@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""Tests for the compact_history management command."""
+from __future__ import unicode_literals
+from gzip import GzipFile
+from json import loads
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import DatabaseError
+from django.db.models.query import QuerySet
+from django.utils.six import StringIO
+import mock
+
+from webplatformcompat.history import Changeset, HistoryCompaction
+from webplatformcompat.models import Browser
+from webplatformcompat.snapshot import Snapshot, get_history_floor
+
+from .base import TestCase
+
+
+class TestCompactHistory(TestCase):
+    """Test compact_history against a three-changeset history."""
+
+    def setUp(self):
+        self.browser = self.create(
+            Browser, slug='browser', name={'en': 'First'})
+        self.browser.name = {'en': 'Second'}
+        self.browser.save()
+        self.first = self.changeset
+        self.first.closed = True
+        self.first.save(update_cache=False)
+
+        self.second = Changeset.objects.create(user=self.user)
+        self.browser._history_changeset = self.second
+        self.browser.name = {'en': 'Third'}
+        self.browser.save()
+
+        self.third = Changeset.objects.create(user=self.user)
+        self.browser._history_changeset = self.third
+        self.browser.name = {'en': 'Fourth'}
+        self.browser.save()
+
+        self.tempdir = tempfile.mkdtemp()
+        self.archive = os.path.join(self.tempdir, 'archive.json.gz')
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+        super(TestCompactHistory, self).tearDown()
+
+    def call(self, *args):
+        out = StringIO()
+        patcher = mock.patch(
+            'webplatformcompat.management.commands.compact_history.'
+            'update_cache_for_instances')
+        with patcher as self.mock_update:
+            call_command('compact_history', *args, stdout=out)
+        return out.getvalue()
+
+    def history_names(self):
+        return [h.name['en'] for h in self.browser.history.order_by('pk')]
+
+    def archived_names(self):
+        with GzipFile(self.archive, 'rb') as archive:
+            lines = archive.read().decode('utf-8').splitlines()
+        records = [loads(line) for line in lines]
+        return [loads(r['fields']['name'])['en'] for r in records]
+
+    def test_before_changeset(self):
+        as_of = Snapshot(self.third.id).get_queryset(Browser).get()
+        out = self.call(
+            '--before-changeset', str(self.third.id),
+            '--archive', self.archive)
+        self.assertIn('Archived 2 historical records', out)
+        self.assertEqual(['Third', 'Fourth'], self.history_names())
+        self.assertEqual(['First', 'Second'], self.archived_names())
+        self.mock_update.delay.assert_called_once_with(
+            [('Browser', self.browser.pk)])
+
+        self.browser.refresh_from_db()
+        current = self.browser.history.get(
+            history_id=self.browser.current_history_id)
+        self.assertEqual({'en': 'Fourth'}, current.name)
+        new_as_of = Snapshot(self.third.id).get_queryset(Browser).get()
+        self.assertEqual(as_of.history_id, new_as_of.history_id)
+
+    def test_before_changeset_interleaved(self):
+        # Two open changesets, where the later one changes the browser first
+        fourth = Changeset.objects.create(user=self.user)
+        fifth = Changeset.objects.create(user=self.user)
+        self.browser._history_changeset = fifth
+        self.browser.name = {'en': 'Fifth'}
+        self.browser.save()
+        self.browser._history_changeset = fourth
+        self.browser.name = {'en': 'Late Fourth'}
+        self.browser.save()
+        as_of = Snapshot(fifth.id).get_queryset(Browser).get()
+        self.assertEqual({'en': 'Fifth'}, as_of.name)
+
+        self.call(
+            '--before-changeset', str(fifth.id + 1),
+            '--archive', self.archive)
+        self.assertEqual(['Fifth', 'Late Fourth'], self.history_names())
+        new_as_of = Snapshot(fifth.id).get_queryset(Browser).get()
+        self.assertEqual(as_of.history_id, new_as_of.history_id)
+        self.browser.refresh_from_db()
+        self.assertTrue(self.browser.history.filter(
+            history_id=self.browser.current_history_id).exists())
+
+    def test_floor_recorded(self):
+        self.assertEqual(0, get_history_floor())
+        self.call(
+            '--before-changeset', str(self.third.id),
+            '--archive', self.archive)
+        compaction = HistoryCompaction.objects.get()
+        self.assertEqual(self.third.id, compaction.floor)
+        self.assertEqual(self.archive, compaction.archive)
+        self.assertEqual(self.third.id, get_history_floor())
+
+    def test_appends_to_archive(self):
+        self.call('--superseded', '--archive', self.archive)
+        self.call(
+            '--before-changeset', str(self.third.id),
+            '--archive', self.archive)
+        self.assertEqual(['First', 'Second'], self.archived_names())
+
+    def test_superseded(self):
+        out = self.call('--superseded', '--archive', self.archive)
+        self.assertIn('Archived 1 historical records', out)
+        self.assertEqual(['Second', 'Third', 'Fourth'], self.history_names())
+        self.assertEqual(['First'], self.archived_names())
+
+    def test_superseded_skips_open_changeset(self):
+        self.browser.name = {'en': 'Fifth'}
+        self.browser.save()
+        self.call('--superseded', '--archive', self.archive)
+        self.assertEqual(
+            ['Second', 'Third', 'Fourth', 'Fifth'], self.history_names())
+        self.assertEqual(['First'], self.archived_names())
+
+    def test_failed_batch_not_archived(self):
+        patcher = mock.patch.object(
+            QuerySet, 'delete', side_effect=DatabaseError('failed'))
+        with patcher, self.assertRaises(DatabaseError):
+            self.call('--superseded', '--archive', self.archive)
+        self.assertEqual(
+            ['First', 'Second', 'Third', 'Fourth'], self.history_names())
+        self.assertEqual([], self.archived_names())
+
+    def test_dry_run(self):
+        out = self.call('--days', '0', '--dry-run')
+        self.assertIn('Would archive 3 historical records', out)
+        self.assertEqual(4, self.browser.history.count())
+        self.assertFalse(self.mock_update.delay.called)
+        self.assertFalse(HistoryCompaction.objects.exists())
+
+    def test_requires_criteria(self):
+        self.assertRaises(
+            CommandError, self.call, '--archive', self.archive)
+
+    def test_requires_archive(self):
+        self.assertRaises(CommandError, self.call, '--superseded')
@@ -65,6 +65,21 @@ class TestTranslatedTextField(SharedTranslatedTextFieldTests, TestCase):
         data = {'zxx': 'canonical'}
         self.assertEqual(None, self.ttf.to_representation(data))
 
+    def test_to_representation_languages(self):
+        # Languages in the serializer context prune other languages
+        self.ttf._context = {'languages': frozenset(('en', 'zxx', 'pt-br'))}
+        data = {'de': 'Deutsch', 'en': 'English', 'pt-BR': u'Portugu\xeas'}
+        expected = OrderedDict((
+            ('en', 'English'), ('pt-BR', u'Portugu\xeas')))
+        self.assertEqual(expected, self.ttf.to_representation(data))
+
+    def test_to_representation_languages_none_found(self):
+        # Without a requested language, all languages are returned
+        self.ttf._context = {'languages': frozenset(('en', 'zxx', 'fr'))}
+        data = {'de': 'Deutsch', 'es': u'Espa\xf1ol'}
+        expected = OrderedDict((('de', 'Deutsch'), ('es', u'Espa\xf1ol')))
+        self.assertEqual(expected, self.ttf.to_representation(data))
+
     def test_to_internal_value_string(self):
         # Converting from serialized form, string remains string, validation
         # will raise an error
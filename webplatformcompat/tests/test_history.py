@@ -4,11 +4,19 @@
 from json import dumps, loads
 
 from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.test import RequestFactory
+import mock
 
-from webplatformcompat.history import Changeset
+from webplatformcompat.history import (
+    Changeset, HistoricalRecords, HistoryChangesetMiddleware,
+    start_bulk_changeset)
 from webplatformcompat.models import Browser
+from webplatformcompat.response_cache import ResponseCache
+from webplatformcompat.tasks import (
+    update_cache_for_instance, update_cache_for_instances)
 
-from .base import APITestCase
+from .base import APITestCase, TestCase
 
 
 class TestBaseMiddleware(APITestCase):
@@ -67,6 +75,17 @@ class TestBaseMiddleware(APITestCase):
                 'changeset': 'Changeset %s is closed.' % changeset.id}}
         self.assertDataEqual(expected, loads(response.content.decode('utf-8')))
 
+    def test_post_with_auto_changeset(self):
+        self.login_user()
+        url = self.api_reverse('browser-list')
+        with mock.patch.object(update_cache_for_instance, 'delay') as delay:
+            response = self.client.post(
+                url, dumps(self.api_data()), content_type=self.content_type)
+        self.assertEqual(201, response.status_code, response.data)
+        history = Browser.objects.get().history.get()
+        self.assertTrue(history.history_changeset.closed)
+        self.assertFalse(delay.called)
+
     def test_post_with_error_not_json_api(self):
         self.login_user()
         changeset = Changeset.objects.create(user=self.user, closed=True)
@@ -76,3 +95,84 @@ class TestBaseMiddleware(APITestCase):
         self.assertEqual(400, response.status_code)
         expected = 'Changeset %s is closed.' % changeset.id
         self.assertDataEqual(expected, response.content.decode('utf-8'))
+
+
+class TestBulkChangeset(TestCase):
+    """Test collecting a request's changes in a bulk changeset."""
+
+    def setUp(self):
+        self.login_user()
+        self.middleware = HistoryChangesetMiddleware()
+        self.request = RequestFactory().post('/')
+        self.request.user = self.user
+        self.middleware.process_request(self.request)
+
+    def tearDown(self):
+        del HistoricalRecords.thread.request
+        super(TestBulkChangeset, self).tearDown()
+
+    @mock.patch('webplatformcompat.signals.update_cache_for_instance')
+    def test_bulk_changeset(self, mock_update):
+        start_bulk_changeset(self.request)
+        browser = Browser.objects.create(slug='firefox', name={'en': 'Fx'})
+        browser.name = {'en': 'Firefox'}
+        browser.save()
+        mock_update.assert_called_once_with('User', self.user.pk, self.user)
+        self.assertEqual(1, Changeset.objects.count())
+
+        with mock.patch.object(update_cache_for_instances, 'delay') as delay:
+            self.middleware.process_response(self.request, HttpResponse())
+        delay.assert_called_once_with([('Browser', browser.pk)])
+        changeset = Changeset.objects.get()
+        self.assertTrue(changeset.closed)
+        self.assertEqual(2, changeset.historical_browsers.count())
+        self.assertFalse(self.request.bulk_changeset)
+
+    @mock.patch('webplatformcompat.signals.update_cache_for_instance')
+    def test_auto_changeset(self, mock_update):
+        browser = Browser.objects.create(slug='firefox', name={'en': 'Fx'})
+        mock_update.assert_called_with('Browser', browser.pk, browser)
+        with mock.patch.object(update_cache_for_instance, 'delay') as delay:
+            self.middleware.process_response(self.request, HttpResponse())
+        self.assertFalse(delay.called)
+        self.assertTrue(Changeset.objects.get().closed)
+
+    def test_response_cache_invalidated_once(self):
+        with mock.patch.object(ResponseCache, 'invalidate') as invalidate:
+            Browser.objects.create(slug='firefox', name={'en': 'Firefox'})
+            Browser.objects.create(slug='chrome', name={'en': 'Chrome'})
+            self.assertFalse(invalidate.called)
+            self.middleware.process_response(self.request, HttpResponse())
+        invalidate.assert_called_once_with()
+        self.assertIsNone(self.request.invalidate_response_cache)
+
+
+class TestCurrentHistory(TestCase):
+    """Test the denormalized current_history_id pointer."""
+
+    def test_create_sets_current_history(self):
+        browser = self.create(Browser, slug='firefox', name={'en': 'Firefox'})
+        history_id = browser.history.get().history_id
+        self.assertEqual(history_id, browser.current_history_id)
+        browser = Browser.objects.get(id=browser.id)
+        self.assertEqual(history_id, browser.current_history_id)
+
+    def test_update_sets_current_history(self):
+        browser = self.create(Browser, slug='firefox', name={'en': 'Firefox'})
+        old_history_id = browser.current_history_id
+        browser.name = {'en': 'Mozilla Firefox'}
+        browser.save()
+        new_history_id = browser.history.all()[0].history_id
+        self.assertNotEqual(old_history_id, new_history_id)
+        self.assertEqual(new_history_id, browser.current_history_id)
+        browser = Browser.objects.get(id=browser.id)
+        self.assertEqual(new_history_id, browser.current_history_id)
+
+    def test_not_in_historical_record(self):
+        browser = self.create(Browser, slug='firefox', name={'en': 'Firefox'})
+        historical = browser.history.get()
+        field_names = [f.name for f in historical._meta.fields]
+        self.assertNotIn('current_history_id', field_names)
+        self.assertEqual(
+            historical.history_id,
+            historical.history_object.current_history_id)
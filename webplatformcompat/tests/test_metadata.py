@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat/metadata.py."""
+from __future__ import unicode_literals
+
+from json import loads
+
+from django.core.urlresolvers import reverse
+
+from webplatformcompat.metadata import CachedMetadata
+from webplatformcompat.models import Browser, Feature
+
+from .base import APITestCase
+
+
+class TestCachedMetadata(APITestCase):
+    def setUp(self):
+        self.login_user()
+        CachedMetadata.serializer_info.clear()
+        self.url = reverse('v2:support-list')
+
+    def options(self):
+        response = self.client.options(self.url)
+        self.assertEqual(200, response.status_code)
+        return loads(response.content.decode('utf8'))['meta']
+
+    def test_cached(self):
+        first = self.options()
+        with self.assertNumQueries(1):  # Load the user
+            second = self.options()
+        self.assertEqual(first, second)
+        self.assertEqual(['POST'], list(second['actions']))
+
+    def test_relation_without_choices(self):
+        self.create(Feature, slug='feature')
+        feature = self.options()['actions']['POST']['feature']
+        self.assertEqual(
+            {'type': 'field', 'required': True, 'read_only': False,
+             'label': 'Feature'}, feature)
+
+    def test_choices(self):
+        support = self.options()['actions']['POST']['support']
+        self.assertIn(
+            {'value': 'yes', 'display_name': 'yes'}, support['choices'])
+
+    def test_permissions_checked(self):
+        browser = self.create(Browser, slug='browser')
+        url = reverse('v2:browser-detail', kwargs={'pk': browser.pk})
+        response = self.client.options(url)
+        self.assertEqual(
+            ['PUT'], list(loads(response.content.decode('utf8'))['meta'][
+                'actions']))
+        self.client.logout()
+        response = self.client.options(url)
+        self.assertNotIn(
+            'actions', loads(response.content.decode('utf8'))['meta'])
@@ -5,7 +5,9 @@ import mock
 import unittest
 
 from django.core.exceptions import ValidationError
+from django.db import connection
 
+from webplatformcompat.fields import TranslatedValue
 from webplatformcompat.history import Changeset
 from webplatformcompat.models import (
     Browser, Feature, Maturity, Reference, Section, Specification, Support,
@@ -153,3 +155,28 @@ class TestVersion(TestCase):
         browser = Browser(slug='browser')
         version = Version(version='text', browser=browser)
         self.assertRaises(ValidationError, version.clean)
+
+
+class TestTranslatedValue(TestCase):
+    def test_order_by(self):
+        self.create(Browser, slug='b', name={'en': 'Second'})
+        self.create(Browser, slug='c', name={'en': 'First'})
+        self.create(Browser, slug='a', name={'fr': 'Premier'})
+        browsers = Browser.objects.order_by(
+            TranslatedValue('name', 'en').asc(), 'id')
+        self.assertEqual(
+            ['a', 'c', 'b'], list(browsers.values_list('slug', flat=True)))
+
+    @unittest.skipUnless(
+        connection.vendor == 'sqlite', 'Query plan is SQLite-specific')
+    def test_uses_index(self):
+        browsers = Browser.objects.order_by(TranslatedValue('name', 'en'))
+        sql, params = browsers.query.sql_with_params()
+        cursor = connection.cursor()
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        plan = ' '.join(str(row) for row in cursor.fetchall())
+        self.assertIn('webplatformcompat_browser_name_en', plan)
+
+    def test_invalid_locale(self):
+        self.assertRaises(
+            AssertionError, TranslatedValue, 'name', "en') OR 1=1 --")
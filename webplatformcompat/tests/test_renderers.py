@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat/renderers.py."""
+from __future__ import unicode_literals
+
+from django.core.urlresolvers import reverse
+
+from webplatformcompat.models import Browser, Feature, Support, Version
+from webplatformcompat.renderers import HTMLFormRenderer
+
+from .base import APITestCase
+
+
+class TestHTMLFormRenderer(APITestCase):
+    def setUp(self):
+        self.login_user()
+        self.browser = self.create(Browser, slug='browser')
+        self.version = self.create(
+            Version, browser=self.browser, version='1.0')
+        self.features = [
+            self.create(Feature, slug='feature%d' % num) for num in range(4)]
+
+    def get_html(self, url):
+        response = self.client.get(url, HTTP_ACCEPT='text/html')
+        self.assertEqual(200, response.status_code)
+        return response.content.decode('utf8')
+
+    def feature_option(self, feature, selected=False):
+        return '<option value="%s" %s >%s</option>' % (
+            feature.pk, 'selected' if selected else '', feature.slug)
+
+    def patch_cutoff(self, cutoff):
+        original = HTMLFormRenderer.relation_cutoff
+        HTMLFormRenderer.relation_cutoff = cutoff
+        self.addCleanup(
+            setattr, HTMLFormRenderer, 'relation_cutoff', original)
+
+    def test_relation_options_limited(self):
+        self.patch_cutoff(2)
+        html = self.get_html(reverse('v2:support-list'))
+        self.assertIn(self.feature_option(self.features[0]), html)
+        self.assertIn(self.feature_option(self.features[1]), html)
+        self.assertNotIn(self.feature_option(self.features[2]), html)
+        self.assertIn('More than 2 items...', html)
+
+    def test_relation_options_all(self):
+        html = self.get_html(reverse('v2:support-list'))
+        for feature in self.features:
+            self.assertIn(self.feature_option(feature), html)
+        self.assertNotIn('More than', html)
+
+    def test_selected_option_included(self):
+        self.patch_cutoff(2)
+        support = self.create(
+            Support, version=self.version, feature=self.features[3])
+        html = self.get_html(
+            reverse('v2:support-detail', kwargs={'pk': support.pk}))
+        self.assertIn(self.feature_option(self.features[3], True), html)
+        self.assertIn(self.feature_option(self.features[0]), html)
+        self.assertNotIn(self.feature_option(self.features[2]), html)
@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat/replicas.py."""
+from __future__ import unicode_literals
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from django.test.utils import override_settings
+import mock
+
+from webplatformcompat.history import Changeset, HistoryChangesetMiddleware
+from webplatformcompat.models import Browser
+from webplatformcompat.replicas import (
+    ReplicaMiddleware, ReplicaRouter, choose_replica, get_read_database,
+    get_cache_timeout, measure_replica_lag, pin_to_primary,
+    set_read_database)
+from webplatformcompat.v2.viewsets import BrowserViewSet
+from webplatformcompat.views import ViewFeature
+
+from .base import TestCase
+
+
+class ReplicaTestCase(TestCase):
+    def tearDown(self):
+        cache.clear()
+        set_read_database(None)
+
+
+class TestReplicaRouter(ReplicaTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    def test_db_for_read_default(self):
+        self.assertIsNone(self.router.db_for_read(Browser))
+
+    def test_db_for_read_replica(self):
+        set_read_database('replica1')
+        self.assertEqual('replica1', self.router.db_for_read(Browser))
+
+    def test_db_for_write(self):
+        set_read_database('replica1')
+        self.assertEqual('default', self.router.db_for_write(Browser))
+
+    @override_settings(REPLICA_CACHE_TIMEOUT=60)
+    def test_get_cache_timeout(self):
+        self.assertEqual(3600, get_cache_timeout(3600))
+        self.assertIsNone(get_cache_timeout(None))
+        set_read_database('replica1')
+        self.assertEqual(60, get_cache_timeout(3600))
+        self.assertEqual(60, get_cache_timeout(None))
+        self.assertEqual(30, get_cache_timeout(30))
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_allow_relation(self):
+        browser = Browser()
+        browser._state.db = 'default'
+        other = Browser()
+        other._state.db = 'replica1'
+        self.assertTrue(self.router.allow_relation(browser, other))
+        other._state.db = 'other'
+        self.assertIsNone(self.router.allow_relation(browser, other))
+
+    @override_settings(REPLICA_DATABASES=['replica1'])
+    def test_allow_migrate(self):
+        self.assertIsNone(
+            self.router.allow_migrate('default', 'webplatformcompat'))
+        self.assertFalse(
+            self.router.allow_migrate('replica1', 'webplatformcompat'))
+
+
+@override_settings(REPLICA_DATABASES=['replica1'], REPLICA_MAX_LAG=10)
+@mock.patch('webplatformcompat.replicas.measure_replica_lag')
+class TestChooseReplica(ReplicaTestCase):
+    def test_caught_up(self, mock_measure):
+        mock_measure.return_value = 2.0
+        self.assertEqual('replica1', choose_replica())
+
+    def test_lagging(self, mock_measure):
+        mock_measure.return_value = 30.0
+        self.assertIsNone(choose_replica())
+
+    def test_unavailable(self, mock_measure):
+        mock_measure.return_value = None
+        self.assertIsNone(choose_replica())
+        self.assertIsNone(choose_replica())
+        mock_measure.assert_called_once_with('replica1')
+
+    def test_lag_cached(self, mock_measure):
+        mock_measure.return_value = 0.0
+        self.assertEqual('replica1', choose_replica())
+        self.assertEqual('replica1', choose_replica())
+        mock_measure.assert_called_once_with('replica1')
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas(self, mock_measure):
+        self.assertIsNone(choose_replica())
+        self.assertFalse(mock_measure.called)
+
+    @mock.patch('webplatformcompat.replicas.newrelic')
+    def test_lag_metric(self, mock_newrelic, mock_measure):
+        mock_measure.return_value = 1.5
+        choose_replica()
+        mock_newrelic.agent.record_custom_metric.assert_called_once_with(
+            'Custom/Database/replica1/ReplicaLag', 1.5)
+
+    def test_measure_not_postgresql(self, mock_measure):
+        self.assertEqual(0.0, measure_replica_lag('default'))
+
+
+@override_settings(REPLICA_DATABASES=['replica1'])
+@mock.patch(
+    'webplatformcompat.replicas.choose_replica', return_value='replica1')
+class TestReplicaMiddleware(ReplicaTestCase):
+    def setUp(self):
+        self.middleware = ReplicaMiddleware()
+        self.factory = RequestFactory()
+
+    def get_request(self, method='get', user=None):
+        request = getattr(self.factory, method)('/api/v2/browsers')
+        request.user = user or AnonymousUser()
+        return request
+
+    def process(self, request, view=None):
+        self.middleware.process_request(request)
+        view = view or BrowserViewSet.as_view({'get': 'list'})
+        self.middleware.process_view(request, view, (), {})
+
+    def test_get_anonymous(self, mock_choose):
+        self.process(self.get_request())
+        self.assertEqual('replica1', get_read_database())
+
+    def test_post(self, mock_choose):
+        request = self.get_request('post', self.login_user())
+        self.process(request)
+        self.assertIsNone(get_read_database())
+        self.middleware.process_response(request, HttpResponse())
+        request = self.get_request(user=self.user)
+        self.process(request)
+        self.assertIsNone(get_read_database())
+
+    def test_get_user(self, mock_choose):
+        request = self.get_request(user=self.login_user())
+        self.process(request)
+        self.assertEqual('replica1', get_read_database())
+
+    def test_get_user_pinned(self, mock_choose):
+        user = self.login_user()
+        pin_to_primary(user.pk)
+        self.process(self.get_request(user=user))
+        self.assertIsNone(get_read_database())
+
+    def test_get_user_open_changeset(self, mock_choose):
+        user = self.login_user()
+        changeset = Changeset.objects.create(user=user)
+        with self.assertNumQueries(0):
+            self.process(self.get_request(user=user))
+        self.assertIsNone(get_read_database())
+
+        changeset.closed = True
+        changeset.save(update_cache=False)
+        self.process(self.get_request(user=user))
+        self.assertEqual('replica1', get_read_database())
+
+    def test_get_user_closed_by_middleware(self, mock_choose):
+        user = self.login_user()
+        request = self.get_request('post', user)
+        HistoryChangesetMiddleware().process_request(request)
+        request.changeset = Changeset.objects.create(user=user)
+        request.close_changeset = True
+        HistoryChangesetMiddleware().process_response(request, HttpResponse())
+        self.process(self.get_request(user=user))
+        self.assertEqual('replica1', get_read_database())
+
+    def test_get_non_api_view(self, mock_choose):
+        self.process(self.get_request(), ViewFeature.as_view())
+        self.assertIsNone(get_read_database())
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_no_replicas(self, mock_choose):
+        request = self.get_request(user=self.login_user())
+        with self.assertNumQueries(0):
+            self.process(request)
+        self.assertIsNone(get_read_database())
+        self.assertFalse(mock_choose.called)
+
+    def test_response_resets(self, mock_choose):
+        request = self.get_request()
+        self.process(request)
+        self.middleware.process_response(request, HttpResponse())
+        self.assertIsNone(get_read_database())
+
+    def test_exception_resets(self, mock_choose):
+        request = self.get_request()
+        self.process(request)
+        self.middleware.process_exception(request, ValueError())
+        self.assertIsNone(get_read_database())
+
+    def test_streaming_response(self, mock_choose):
+        request = self.get_request()
+        self.process(request)
+
+        def content():
+            yield get_read_database() or 'default'
+
+        response = self.middleware.process_response(
+            request, StreamingHttpResponse(content()))
+        self.assertIsNone(get_read_database())
+        self.assertEqual(b'replica1', b''.join(response.streaming_content))
+        self.assertIsNone(get_read_database())
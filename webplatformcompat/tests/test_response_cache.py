@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat/response_cache.py."""
+from __future__ import unicode_literals
+
+from gzip import GzipFile
+from io import BytesIO
+
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+import mock
+
+from webplatformcompat.response_cache import ResponseCache
+
+from .base import TestCase
+
+
+def gunzip(body):
+    return GzipFile(fileobj=BytesIO(body)).read()
+
+
+class TestResponseCache(TestCase):
+    def setUp(self):
+        self.cache = LocMemCache('test_response_cache', {})
+        self.response_cache = ResponseCache(cache=self.cache, timeout=60)
+        self.factory = RequestFactory()
+        self.body = (
+            b'{"data": [' + b', '.join([b'"compressible"'] * 50) + b']}')
+
+    def tearDown(self):
+        self.cache.clear()
+
+    def get_request(self, path='/api/v2/browsers', **extra):
+        return self.factory.get(path, HTTP_ACCEPT='application/json', **extra)
+
+    def get_response(self, body=None, status=200):
+        response = HttpResponse(
+            self.body if body is None else body, status=status,
+            content_type='application/json')
+        response['Allow'] = 'GET, HEAD, OPTIONS'
+        return response
+
+    def test_miss(self):
+        self.assertIsNone(self.response_cache.get(self.get_request()))
+
+    def test_set_identity(self):
+        request = self.get_request()
+        response = self.response_cache.set(request, self.get_response())
+        self.assertEqual(self.body, response.content)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(str(len(self.body)), response['Content-Length'])
+        self.assertEqual('GET, HEAD, OPTIONS', response['Allow'])
+        self.assertEqual('Accept-Encoding', response['Vary'])
+
+    def test_get_gzip(self):
+        self.response_cache.set(self.get_request(), self.get_response())
+        request = self.get_request(HTTP_ACCEPT_ENCODING='gzip, deflate')
+        response = self.response_cache.get(request)
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertLess(len(response.content), len(self.body))
+        self.assertEqual(self.body, gunzip(response.content))
+        self.assertEqual('application/json', response['Content-Type'])
+
+    def test_get_gzip_refused(self):
+        self.response_cache.set(self.get_request(), self.get_response())
+        request = self.get_request(HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        response = self.response_cache.get(request)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(self.body, response.content)
+
+    def test_get_any_encoding(self):
+        self.response_cache.set(self.get_request(), self.get_response())
+        request = self.get_request(HTTP_ACCEPT_ENCODING='*')
+        response = self.response_cache.get(request)
+        self.assertIn(response['Content-Encoding'], ('br', 'gzip'))
+
+    def test_get_brotli(self):
+        mock_brotli = mock.Mock(spec_set=['compress'])
+        mock_brotli.compress.return_value = b'brotli'
+        with mock.patch(
+                'webplatformcompat.response_cache.brotli', mock_brotli):
+            self.response_cache.set(self.get_request(), self.get_response())
+            request = self.get_request(HTTP_ACCEPT_ENCODING='gzip, br')
+            response = self.response_cache.get(request)
+        self.assertEqual('br', response['Content-Encoding'])
+        self.assertEqual(b'brotli', response.content)
+        mock_brotli.compress.assert_called_once_with(self.body)
+
+    def test_get_without_brotli(self):
+        with mock.patch('webplatformcompat.response_cache.brotli', None):
+            self.response_cache.set(self.get_request(), self.get_response())
+            request = self.get_request(HTTP_ACCEPT_ENCODING='br')
+            response = self.response_cache.get(request)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_short_body_not_compressed(self):
+        self.response_cache.set(
+            self.get_request(), self.get_response(body=b'{}'))
+        request = self.get_request(HTTP_ACCEPT_ENCODING='gzip')
+        response = self.response_cache.get(request)
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(b'{}', response.content)
+
+    def test_key_varies_on_accept(self):
+        self.response_cache.set(self.get_request(), self.get_response())
+        request = self.factory.get('/api/v2/browsers', HTTP_ACCEPT='text/csv')
+        self.assertIsNone(self.response_cache.get(request))
+
+    def test_key_varies_on_query(self):
+        self.response_cache.set(self.get_request(), self.get_response())
+        request = self.get_request('/api/v2/browsers?page=2')
+        self.assertIsNone(self.response_cache.get(request))
+
+    def test_invalidate(self):
+        self.response_cache.set(self.get_request(), self.get_response())
+        self.response_cache.invalidate()
+        self.assertIsNone(self.response_cache.get(self.get_request()))
+
+    def test_invalidate_while_building(self):
+        request = self.get_request()
+        key = self.response_cache.get_key(request)
+        self.assertIsNone(self.response_cache.get(request, key))
+        self.response_cache.invalidate()
+        self.response_cache.set(request, self.get_response(), key)
+        self.assertIsNone(self.response_cache.get(self.get_request()))
+
+    @mock.patch('webplatformcompat.replicas.is_reading_replica',
+                return_value=True)
+    def test_set_from_replica(self, mock_replica):
+        response_cache = ResponseCache(cache=self.cache, timeout=3600)
+        with mock.patch.object(self.cache, 'set') as mock_set:
+            response_cache.set(self.get_request(), self.get_response())
+        self.assertEqual(60, mock_set.call_args[0][2])
+
+    def test_error_not_cached(self):
+        response = self.get_response(status=404)
+        self.assertIs(
+            response, self.response_cache.set(self.get_request(), response))
+        self.assertIsNone(self.response_cache.get(self.get_request()))
+
+    def test_html_not_cached(self):
+        response = self.get_response()
+        response.accepted_media_type = 'text/html'
+        self.assertIs(
+            response, self.response_cache.set(self.get_request(), response))
+        self.assertIsNone(self.response_cache.get(self.get_request()))
+
+    def test_streaming_not_cached(self):
+        response = StreamingHttpResponse(iter([self.body]))
+        self.assertIs(
+            response, self.response_cache.set(self.get_request(), response))
+        self.assertIsNone(self.response_cache.get(self.get_request()))
+
+    @mock.patch('webplatformcompat.response_cache.logger')
+    def test_logs_compression_ratio(self, mock_logger):
+        with mock.patch('webplatformcompat.response_cache.brotli', None):
+            self.response_cache.set(self.get_request(), self.get_response())
+        args = mock_logger.info.call_args[0]
+        self.assertEqual('/api/v2/browsers', args[1])
+        self.assertEqual(len(self.body), args[2])
+        self.assertTrue(args[3].startswith('gzip=0.'), args[3])
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat/search.py."""
+from __future__ import unicode_literals
+
+from webplatformcompat.models import Feature
+from webplatformcompat.search import FeatureSearchIndex
+
+from .base import TestCase
+
+
+class TestFeatureSearchIndex(TestCase):
+    def setUp(self):
+        self.index = FeatureSearchIndex()
+        self.display = self.create(
+            Feature, slug='web-css-display', name={'zxx': 'display'},
+            mdn_uri={
+                'en': ('https://developer.mozilla.org/en-US/docs/'
+                       'Web/CSS/display')})
+        self.flex = self.create(
+            Feature, slug='web-css-display-flex', name={'zxx': 'flex'})
+        self.grid = self.create(
+            Feature, slug='css-grid', name={
+                'en': 'Grid layout', 'fr': 'Disposition en grille'})
+
+    def search(self, query):
+        return self.index.search(query)
+
+    def test_slug_exact(self):
+        self.assertEqual([self.grid.pk], self.search('css-grid'))
+
+    def test_slug_prefix_ranked(self):
+        self.assertEqual(
+            [self.display.pk, self.flex.pk], self.search('display'))
+
+    def test_words_all_match(self):
+        self.assertEqual([self.flex.pk], self.search('css flex'))
+        self.assertEqual([], self.search('css table'))
+
+    def test_name_prefix(self):
+        self.assertEqual([self.grid.pk], self.search('Lay'))
+
+    def test_name_translation(self):
+        self.assertEqual([self.grid.pk], self.search('grille'))
+
+    def test_uri_exact(self):
+        url = 'https://developer.mozilla.org/en-US/docs/Web/CSS/display/'
+        self.assertEqual(self.display.pk, self.search(url)[0])
+
+    def test_uri_common_words_skipped(self):
+        self.assertEqual([], self.search('mozilla'))
+
+    def test_no_match(self):
+        self.assertEqual([], self.search('zzz'))
+
+    def test_rebuilt_on_invalidate(self):
+        self.assertEqual([], self.search('table'))
+        table = self.create(Feature, slug='web-css-table', name={'en': 'T'})
+        self.assertEqual([table.pk], self.search('table'))
+
+    def test_not_rebuilt_without_change(self):
+        self.search('display')
+        generation = self.index.generation
+        Feature.objects.filter(pk=self.grid.pk).update(slug='css-table')
+        self.assertEqual([], self.search('table'))
+        self.assertEqual(generation, self.index.generation)
+
+    def test_rebuild_replaces_state(self):
+        self.search('display')
+        state = self.index.state
+        self.create(Feature, slug='web-css-table', name={'en': 'T'})
+        self.search('table')
+        self.assertIsNot(state, self.index.state)
+        self.assertNotIn('table', state.words)
@@ -2,16 +2,82 @@
 """Tests for API serializers."""
 
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.serializers import ModelSerializer
+from rest_framework.validators import UniqueValidator
+import mock
 
 from webplatformcompat.models import (
     Browser, Feature, Maturity, Reference, Section, Specification, Version)
 from webplatformcompat.serializers import (
-    BrowserSerializer, FeatureSerializer, HistoricalFeatureSerializer,
+    BrowserSerializer, CachedFieldsMixin, FeatureSerializer,
+    HistoricalBrowserSerializer, HistoricalFeatureSerializer,
     HistoricalMaturitySerializer, SpecificationSerializer, UserSerializer)
 
 from .base import TestCase
 
 
+class TestCachedFields(TestCase):
+    """Test that fields are built once per serializer class."""
+
+    def setUp(self):
+        self.old_prototypes = CachedFieldsMixin._field_prototypes.copy()
+        CachedFieldsMixin._field_prototypes.clear()
+
+    def tearDown(self):
+        CachedFieldsMixin._field_prototypes.clear()
+        CachedFieldsMixin._field_prototypes.update(self.old_prototypes)
+
+    def test_fields_built_once(self):
+        get_fields = ModelSerializer.get_fields
+        with mock.patch.object(
+                ModelSerializer, 'get_fields', autospec=True,
+                side_effect=get_fields) as mock_get_fields:
+            first = BrowserSerializer().fields
+            second = BrowserSerializer().fields
+        self.assertEqual(1, mock_get_fields.call_count)
+        self.assertEqual(list(first.keys()), list(second.keys()))
+        self.assertIsNot(first['slug'], second['slug'])
+        self.assertIsNot(
+            first['versions'].child_relation,
+            second['versions'].child_relation)
+
+    def test_validators_per_instance(self):
+        first = BrowserSerializer().fields['slug']
+        second = BrowserSerializer().fields['slug']
+        self.assertTrue(any(
+            isinstance(validator, UniqueValidator)
+            for validator in first.validators))
+        first_ids = set(id(validator) for validator in first.validators)
+        second_ids = set(id(validator) for validator in second.validators)
+        self.assertFalse(first_ids & second_ids)
+
+    def test_write_restricted_per_instance(self):
+        list_view = mock.Mock(action='list')
+        update_view = mock.Mock(action='update')
+        listed = BrowserSerializer(context={'view': list_view}).fields
+        updated = BrowserSerializer(context={'view': update_view}).fields
+        self.assertTrue(listed['versions'].read_only)
+        self.assertFalse(listed['slug'].read_only)
+        self.assertFalse(updated['versions'].read_only)
+        self.assertTrue(updated['slug'].read_only)
+
+    def test_archive_fields(self):
+        fields = HistoricalBrowserSerializer.ArchivedObject().fields
+        again = HistoricalBrowserSerializer.ArchivedObject().fields
+        self.assertNotIn('versions', fields)
+        self.assertNotIn('history', fields)
+        self.assertEqual(list(fields.keys()), list(again.keys()))
+
+    def test_historical_fields_extra_memoized(self):
+        fields_extra = HistoricalBrowserSerializer.get_fields_extra()
+        self.assertIs(
+            fields_extra, HistoricalBrowserSerializer.get_fields_extra())
+        self.assertNotIn(
+            'resource', HistoricalBrowserSerializer.Meta.fields_extra['id'])
+
+
 class TestBrowserSerializer(TestCase):
     """Test BrowserSerializer and common historical functionality."""
 
@@ -306,6 +372,52 @@ class TestHistoricalFeatureSerializer(TestCase):
         links = representation['archived_representation']['links']
         self.assertEqual(links['parent'], str(parent.pk))
 
+    def test_archive_stored_on_create(self):
+        feature = self.create(
+            Feature, slug='the_feature', name={'en': 'The Feature'})
+        history = feature.history.all()[0]
+        serializer = HistoricalFeatureSerializer()
+        self.assertEqual('the_feature', history.history_archive['slug'])
+        history_id = history.history_id
+        history.history_archive = None
+        expected = serializer.get_archived_representation(history)
+        history = feature.history.get(history_id=history_id)
+        self.assertEqual(
+            expected, serializer.get_archived_representation(history))
+        self.assertEqual(
+            str(history_id), expected['links']['history_current'])
+
+    def test_archive_stored_in_insert(self):
+        with CaptureQueriesContext(connection) as context:
+            self.create(Feature, slug='the_feature')
+        updates = [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].startswith(
+                'UPDATE "webplatformcompat_historicalfeature"')]
+        self.assertEqual([], updates)
+
+    def test_to_representation_uses_stored_archive(self):
+        feature = self.create(
+            Feature, slug='the_feature', name={'en': 'The Feature'})
+        history = feature.history.all()[0]
+        history.history_archive['slug'] = 'stored'
+        serializer = HistoricalFeatureSerializer()
+        representation = serializer.to_representation(history)
+        archive = representation['archived_representation']
+        self.assertEqual('stored', archive['slug'])
+        self.assertEqual('id', list(archive.keys())[0])
+        self.assertEqual('links', list(archive.keys())[-1])
+
+    def test_to_representation_without_stored_archive(self):
+        feature = self.create(
+            Feature, slug='the_feature', name={'en': 'The Feature'})
+        history = feature.history.all()[0]
+        history.history_archive = None
+        serializer = HistoricalFeatureSerializer()
+        representation = serializer.to_representation(history)
+        archive = representation['archived_representation']
+        self.assertEqual('the_feature', archive['slug'])
+
 
 class TestHistoricalMaturitySerializer(TestCase):
     """Test HistoricalMaturitySerializer."""
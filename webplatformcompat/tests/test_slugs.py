@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat/slugs.py."""
+from __future__ import unicode_literals
+
+from django.core.cache import cache
+from django.test.utils import override_settings
+import mock
+
+from webplatformcompat.models import Browser, Feature
+from webplatformcompat.slugs import get_pk_by_slug, get_slug_key
+
+from .base import TestCase
+
+
+class TestGetPkBySlug(TestCase):
+    def setUp(self):
+        self.feature = self.create(Feature, slug='feature')
+
+    def test_cached(self):
+        self.assertEqual(self.feature.pk, get_pk_by_slug(Feature, 'feature'))
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.feature.pk, get_pk_by_slug(Feature, 'feature'))
+
+    def test_not_found(self):
+        self.assertIsNone(get_pk_by_slug(Feature, 'missing'))
+
+    def test_per_model(self):
+        browser = self.create(Browser, slug='feature')
+        self.assertEqual(self.feature.pk, get_pk_by_slug(Feature, 'feature'))
+        self.assertEqual(browser.pk, get_pk_by_slug(Browser, 'feature'))
+
+    def test_slug_changed(self):
+        get_pk_by_slug(Feature, 'feature')
+        self.feature.slug = 'renamed'
+        self.feature.save()
+        self.assertIsNone(get_pk_by_slug(Feature, 'feature'))
+        self.assertEqual(self.feature.pk, get_pk_by_slug(Feature, 'renamed'))
+
+    def test_new_slug_dropped_on_save(self):
+        cache.set(get_slug_key(Feature, 'renamed'), 0)
+        self.feature.slug = 'renamed'
+        self.feature.save()
+        self.assertIsNone(cache.get(get_slug_key(Feature, 'renamed')))
+        self.assertEqual(self.feature.pk, get_pk_by_slug(Feature, 'renamed'))
+
+    def test_not_cached_on_save(self):
+        # The save may be rolled back, so the lookup is filled on next use
+        self.feature.slug = 'renamed'
+        self.feature.save()
+        self.assertIsNone(cache.get(get_slug_key(Feature, 'renamed')))
+
+    def test_save_without_slug(self):
+        get_pk_by_slug(Feature, 'feature')
+        patcher = mock.patch('webplatformcompat.signals.get_saved_slug')
+        with patcher as mock_get_saved_slug:
+            self.feature.save(update_fields=['mdn_uri'])
+        self.assertFalse(mock_get_saved_slug.called)
+        self.assertEqual(
+            self.feature.pk, cache.get(get_slug_key(Feature, 'feature')))
+
+    def test_old_slug_dropped_on_save(self):
+        cache.set(get_slug_key(Feature, 'feature'), self.feature.pk)
+        self.feature.slug = 'renamed'
+        self.feature.save()
+        self.assertIsNone(cache.get(get_slug_key(Feature, 'feature')))
+
+    @override_settings(SLUG_CACHE_TIMEOUT=60)
+    def test_timeout(self):
+        with mock.patch('webplatformcompat.slugs.cache') as mock_cache:
+            mock_cache.get.return_value = None
+            get_pk_by_slug(Feature, 'feature')
+        mock_cache.set.assert_called_once_with(
+            get_slug_key(Feature, 'feature'), self.feature.pk, 60)
+
+    def test_slug_reused(self):
+        get_pk_by_slug(Feature, 'feature')
+        self.feature.delete()
+        feature = self.create(Feature, slug='feature')
+        self.assertEqual(feature.pk, get_pk_by_slug(Feature, 'feature'))
@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat.snapshot."""
+from __future__ import unicode_literals
+from datetime import timedelta
+
+from django.utils.timezone import now
+
+from webplatformcompat.history import Changeset
+from webplatformcompat.models import Browser, Version
+from webplatformcompat.snapshot import ChangeFeed, ChangesetDiff, Snapshot
+
+from .base import TestCase
+
+
+class TestSnapshot(TestCase):
+    """Test Snapshot against a three-changeset history."""
+
+    def setUp(self):
+        self.browser = self.create(
+            Browser, slug='browser', name={'en': 'Old Name'})
+        self.version = self.create(
+            Version, browser=self.browser, version='1.0')
+        self.first = self.changeset
+
+        self.second = Changeset.objects.create(user=self.user)
+        self.browser.name = {'en': 'New Name'}
+        self.browser._history_changeset = self.second
+        self.browser.save()
+
+        self.third = Changeset.objects.create(user=self.user)
+        self.version._history_changeset = self.third
+        self.version.delete()
+
+    def test_get_queryset_first(self):
+        snapshot = Snapshot(self.first.id)
+        browsers = list(snapshot.get_queryset(Browser))
+        self.assertEqual(1, len(browsers))
+        self.assertEqual({'en': 'Old Name'}, browsers[0].name)
+        versions = list(snapshot.get_queryset(Version))
+        self.assertEqual(['1.0'], [v.version for v in versions])
+
+    def test_get_queryset_second(self):
+        snapshot = Snapshot(self.second.id)
+        browsers = list(snapshot.get_queryset(Browser))
+        self.assertEqual(1, len(browsers))
+        self.assertEqual({'en': 'New Name'}, browsers[0].name)
+        self.assertEqual(1, snapshot.get_queryset(Version).count())
+
+    def test_get_queryset_omits_deleted(self):
+        snapshot = Snapshot(self.third.id)
+        self.assertEqual(1, snapshot.get_queryset(Browser).count())
+        self.assertFalse(snapshot.get_queryset(Version).exists())
+
+    def test_get_queryset_before_history(self):
+        snapshot = Snapshot(self.first.id - 1)
+        self.assertFalse(snapshot.get_queryset(Browser).exists())
+
+    def test_get_queryset_interleaved_changesets(self):
+        # Two open changesets, where the later one changes the browser first
+        fourth = Changeset.objects.create(user=self.user)
+        fifth = Changeset.objects.create(user=self.user)
+        self.browser.name = {'en': 'Fifth Name'}
+        self.browser._history_changeset = fifth
+        self.browser.save()
+        self.browser.name = {'en': 'Fourth Name'}
+        self.browser._history_changeset = fourth
+        self.browser.save()
+
+        snapshot = Snapshot(fourth.id)
+        self.assertEqual(
+            {'en': 'Fourth Name'}, snapshot.get_queryset(Browser).get().name)
+        snapshot = Snapshot(fifth.id)
+        self.assertEqual(
+            {'en': 'Fifth Name'}, snapshot.get_queryset(Browser).get().name)
+        records = list(snapshot.iter_records(Browser))
+        self.assertEqual([{'en': 'Fifth Name'}], [r.name for r in records])
+
+    def test_archived_representations(self):
+        snapshot = Snapshot(self.first.id)
+        archived = list(snapshot.archived_representations('browsers'))
+        self.assertEqual(1, len(archived))
+        self.assertEqual(str(self.browser.id), archived[0]['id'])
+        self.assertEqual({'en': 'Old Name'}, archived[0]['name'])
+
+    def test_iter_records_in_chunks(self):
+        other = self.create(Browser, slug='other')
+        third = self.create(Browser, slug='third')
+        snapshot = Snapshot(self.third.id)
+        snapshot.chunk_size = 2
+        with self.assertNumQueries(4):
+            records = list(snapshot.iter_records(Browser))
+        self.assertEqual(
+            [self.browser.id, other.id, third.id],
+            [record.id for record in records])
+        self.assertEqual({'en': 'New Name'}, records[0].name)
+
+    def test_iter_records_omits_deleted(self):
+        snapshot = Snapshot(self.third.id)
+        snapshot.chunk_size = 1
+        self.assertEqual([], list(snapshot.iter_records(Version)))
+
+
+class TestChangesetDiff(TestCase):
+    """Test ChangesetDiff against a three-changeset history."""
+
+    def setUp(self):
+        self.browser = self.create(
+            Browser, slug='browser', name={'en': 'Old Name'})
+        self.version = self.create(
+            Version, browser=self.browser, version='1.0')
+        self.first = self.changeset
+
+        self.second = Changeset.objects.create(user=self.user)
+        self.browser.name = {'en': 'Newer Name'}
+        self.browser._history_changeset = self.second
+        self.browser.save()
+        self.browser.name = {'en': 'Newest Name'}
+        self.browser.save()
+        self.version_id = self.version.id
+        self.version._history_changeset = self.second
+        self.version.delete()
+
+    def test_created(self):
+        diff = ChangesetDiff(self.first.id)
+        changes = list(diff.changes('browsers'))
+        self.assertEqual(1, len(changes))
+        pk, change, before, after = changes[0]
+        self.assertEqual(self.browser.id, pk)
+        self.assertEqual('created', change)
+        self.assertIsNone(before)
+        self.assertEqual({'en': 'Old Name'}, after['name'])
+
+    def test_updated(self):
+        diff = ChangesetDiff(self.second.id)
+        changes = list(diff.changes('browsers'))
+        self.assertEqual(1, len(changes))
+        pk, change, before, after = changes[0]
+        self.assertEqual('updated', change)
+        self.assertEqual({'en': 'Old Name'}, before['name'])
+        self.assertEqual({'en': 'Newest Name'}, after['name'])
+        self.assertEqual([str(self.version_id)], after['links']['versions'])
+
+    def test_deleted(self):
+        diff = ChangesetDiff(self.second.id)
+        changes = list(diff.changes('versions'))
+        self.assertEqual(1, len(changes))
+        pk, change, before, after = changes[0]
+        self.assertEqual(self.version_id, pk)
+        self.assertEqual('deleted', change)
+        self.assertEqual('1.0', before['version'])
+        self.assertIsNone(after)
+
+    def test_unchanged_resource(self):
+        diff = ChangesetDiff(self.second.id)
+        self.assertEqual([], list(diff.changes('features')))
+
+    def test_interleaved_changeset(self):
+        other = self.create(Browser, slug='other', name={'en': 'Other'})
+        third = Changeset.objects.create(user=self.user)
+        other.name = {'en': 'Third Name'}
+        other._history_changeset = third
+        other.save()
+        other.name = {'en': 'Second Name'}
+        other._history_changeset = self.second
+        other.save()
+
+        diff = ChangesetDiff(self.second.id)
+        changes = dict(
+            (pk, (before, after))
+            for pk, _, before, after in diff.changes('browsers'))
+        before, after = changes[other.id]
+        self.assertEqual({'en': 'Third Name'}, before['name'])
+        self.assertEqual({'en': 'Second Name'}, after['name'])
+        self.assertEqual(
+            {'en': 'Old Name'}, changes[self.browser.id][0]['name'])
+
+    def test_chunks(self):
+        version = self.create(Version, browser=self.browser, version='2.0')
+        version.note = {'en': 'Note'}
+        version._history_changeset = self.second
+        version.save()
+        diff = ChangesetDiff(self.second.id)
+        diff.chunk_size = 1
+        changes = list(diff.changes('versions'))
+        self.assertEqual(
+            [(self.version_id, 'deleted'), (version.id, 'updated')],
+            [(pk, change) for pk, change, _, _ in changes])
+
+
+class TestChangeFeed(TestCase):
+    """Test ChangeFeed against a two-changeset history."""
+
+    def setUp(self):
+        self.browser = self.create(
+            Browser, slug='browser', name={'en': 'Browser'})
+        self.version = self.create(
+            Version, browser=self.browser, version='1.0')
+        self.first = self.changeset
+        self.first.closed = True
+        self.first.save(update_cache=False)
+
+        self.second = Changeset.objects.create(user=self.user)
+        self.browser.name = {'en': 'New Name'}
+        self.browser._history_changeset = self.second
+        self.browser.save()
+
+    def summary(self, changes):
+        return [
+            (c.changeset_id, c.resource_type, c.id, c.event) for c in changes]
+
+    def test_page_stops_at_open_changeset(self):
+        changes = ChangeFeed().page(10)
+        expected = [
+            (self.first.id, 'browsers', self.browser.id, 'created'),
+            (self.first.id, 'versions', self.version.id, 'created'),
+        ]
+        self.assertEqual(expected, self.summary(changes))
+
+    def test_page_after_close(self):
+        self.second.closed = True
+        self.second.save(update_cache=False)
+        changes = ChangeFeed(since=self.first.id).page(10)
+        expected = [(self.second.id, 'browsers', self.browser.id, 'changed')]
+        self.assertEqual(expected, self.summary(changes))
+
+    def test_page_skips_stale_changeset(self):
+        Changeset.objects.filter(pk=self.second.pk).update(
+            created=now() - timedelta(days=2))
+        changes = ChangeFeed(since=self.first.id).page(10)
+        expected = [(self.second.id, 'browsers', self.browser.id, 'changed')]
+        self.assertEqual(expected, self.summary(changes))
+
+    def test_page_with_cursor(self):
+        first_page = ChangeFeed().page(1)
+        self.assertEqual('browsers', first_page[0].resource_type)
+        cursor = first_page[0][:3]
+        changes = ChangeFeed(cursor=cursor).page(10)
+        expected = [(self.first.id, 'versions', self.version.id, 'created')]
+        self.assertEqual(expected, self.summary(changes))
+
+    def test_parse_cursor(self):
+        self.assertEqual((1, 2, 3), ChangeFeed.parse_cursor('1.2.3'))
+        self.assertEqual('1.2.3', ChangeFeed.format_cursor((1, 2, 3)))
+        self.assertRaises(ValueError, ChangeFeed.parse_cursor, '1.2')
+        self.assertRaises(ValueError, ChangeFeed.parse_cursor, 'a.b.c')
@@ -5,7 +5,9 @@ from django.test.utils import override_settings
 import mock
 
 from webplatformcompat.models import Maturity, Specification
-from webplatformcompat.tasks import update_cache_for_instance
+from webplatformcompat.response_cache import ResponseCache
+from webplatformcompat.tasks import (
+    update_cache_for_instance, update_cache_for_instances)
 
 from .base import TestCase
 
@@ -46,3 +48,74 @@ class TestUpdateCacheForInstance(TestCase):
             mock.call('Maturity', self.mat.id, None, 'v1', update_only=False)]
         actual_calls = self.mock_cache.update_instance.call_args_list
         self.assertEqual(expected_calls, actual_calls)
+
+    @mock.patch.object(ResponseCache, 'invalidate')
+    def test_response_cache_invalidated(self, mock_invalidate):
+        self.mock_cache.update_instance.return_value = []
+        update_cache_for_instance('Maturity', self.mat.id)
+        mock_invalidate.assert_called_once_with()
+
+    @mock.patch.object(ResponseCache, 'invalidate')
+    def test_user_skips_response_cache(self, mock_invalidate):
+        self.mock_cache.update_instance.return_value = []
+        update_cache_for_instance('User', self.user.id)
+        self.assertFalse(mock_invalidate.called)
+
+
+class TestUpdateCacheForInstances(TestCase):
+    def setUp(self):
+        self.mat = self.create(Maturity, slug='maturity')
+        self.spec = self.create(Specification, maturity=self.mat)
+        self.patcher = mock.patch('webplatformcompat.tasks.Cache')
+        self.mock_cache = mock.Mock(spec_set=['update_instance'])
+        self.mock_cache_class = self.patcher.start()
+        self.mock_cache_class.return_value = self.mock_cache
+
+    def tearDown(self):
+        self.patcher.stop()
+
+    @override_settings(DRF_INSTANCE_CACHE_POPULATE_COLD=True)
+    @mock.patch.object(ResponseCache, 'invalidate')
+    def test_update_caches(self, mock_invalidate):
+        results = [
+            [('Maturity', self.mat.id, 'v1')],
+            [],
+            [],
+        ]
+
+        def side_effect(*args, **kwargs):
+            return results.pop(0)
+
+        self.mock_cache.update_instance.side_effect = side_effect
+        update_cache_for_instances([
+            ('Specification', self.spec.id), ('Maturity', self.mat.id)])
+        expected_calls = [
+            mock.call(
+                'Specification', self.spec.id, None, None, update_only=False),
+            mock.call('Maturity', self.mat.id, None, None, update_only=False),
+        ]
+        actual_calls = self.mock_cache.update_instance.call_args_list
+        self.assertEqual(expected_calls, actual_calls)
+        mock_invalidate.assert_called_once_with()
+
+    @override_settings(DRF_INSTANCE_CACHE_POPULATE_COLD=False)
+    @mock.patch.object(ResponseCache, 'invalidate')
+    def test_update_related_caches(self, mock_invalidate):
+        results = [
+            [('Maturity', self.mat.id, 'v1')],
+            [],
+        ]
+
+        def side_effect(*args, **kwargs):
+            return results.pop(0)
+
+        self.mock_cache.update_instance.side_effect = side_effect
+        update_cache_for_instances([('Specification', self.spec.id)])
+        expected_calls = [
+            mock.call(
+                'Specification', self.spec.id, None, None, update_only=False),
+            mock.call('Maturity', self.mat.id, None, 'v1', update_only=True),
+        ]
+        actual_calls = self.mock_cache.update_instance.call_args_list
+        self.assertEqual(expected_calls, actual_calls)
+        mock_invalidate.assert_called_once_with()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Tests for webplatformcompat/utils.py."""
+from __future__ import unicode_literals
+
+from django.test import RequestFactory
+from rest_framework.request import Request
+
+from webplatformcompat.exceptions import InvalidQueryParam
+from webplatformcompat.utils import (
+    get_requested_languages, parse_accept_header)
+
+from .base import TestCase
+
+
+class TestParseAcceptHeader(TestCase):
+    def test_values(self):
+        self.assertEqual(
+            ['gzip', 'br'], parse_accept_header('gzip, BR;q=0.5'))
+
+    def test_quality_zero(self):
+        self.assertEqual(
+            ['identity'], parse_accept_header('gzip;q=0, identity'))
+
+    def test_quality_invalid(self):
+        self.assertEqual(['br'], parse_accept_header('gzip;q=high, br'))
+
+    def test_empty(self):
+        self.assertEqual([], parse_accept_header(''))
+
+
+class TestGetRequestedLanguages(TestCase):
+    def get_languages(self, *args, **kwargs):
+        request = RequestFactory().get('/api/v2/browsers', *args, **kwargs)
+        return get_requested_languages(Request(request))
+
+    def test_not_requested(self):
+        self.assertIsNone(self.get_languages())
+
+    def test_lang(self):
+        languages = self.get_languages({'lang': 'fr,pt-BR'})
+        expected = set(('en', 'zxx', 'fr', 'pt', 'pt-br'))
+        self.assertEqual(expected, languages)
+
+    def test_lang_invalid(self):
+        self.assertRaises(
+            InvalidQueryParam, self.get_languages, {'lang': 'fr,'})
+
+    def test_accept_language(self):
+        languages = self.get_languages(
+            {'lang': ''},
+            HTTP_ACCEPT_LANGUAGE='fr-CA, de;q=0, es;q=0.5, *;q=0.1')
+        expected = set(('en', 'zxx', 'fr', 'fr-ca', 'es'))
+        self.assertEqual(expected, languages)
+
+    def test_accept_language_missing(self):
+        self.assertEqual(
+            set(('en', 'zxx')), self.get_languages({'lang': ''}))
@@ -221,6 +221,31 @@ class TestBaseViewFeatureViewSet(TestCase):
         compat_table = representation['_view_extra']['meta']['compat_table']
         self.assertEqual(compat_table['languages'], ['en'])
 
+    def test_languages_requested(self):
+        """Requested languages limit the translations and languages list."""
+        resources = self.setup_minimal()
+        feature = resources['feature']
+        browser = resources['browser']
+        self.changeset = Changeset.objects.create(user=self.user)
+        browser.name = {'en': 'Browser', 'de': 'Browser', 'fr': 'Navigateur'}
+        browser._history_user = self.user
+        browser._history_changeset = self.changeset
+        browser.save()
+        self.changeset.closed = True
+        self.changeset.save()
+        feature = Feature.objects.get(pk=feature.pk)
+        url = self.api_reverse('viewfeatures-detail', pk=feature.pk)
+        context = self.make_context(
+            url, languages=frozenset(('en', 'zxx', 'fr')))
+        serializer = ViewFeatureSerializer(context=context)
+        representation = serializer.to_representation(feature)
+        extra = representation['_view_extra']
+        self.assertEqual(
+            {'en': 'Browser', 'fr': 'Navigateur'},
+            extra['browsers'][0]['name'])
+        compat_table = extra['meta']['compat_table']
+        self.assertEqual(['en', 'fr'], compat_table['languages'])
+
     def test_multiple_versions(self):
         """Meta section spells out significant versions."""
         feature = self.create(Feature, slug='feature')
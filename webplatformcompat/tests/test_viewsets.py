@@ -3,6 +3,7 @@
 from __future__ import unicode_literals
 
 from django.http import Http404
+from django.test.utils import override_settings
 from rest_framework.request import Request
 from rest_framework.test import APIRequestFactory
 
@@ -193,3 +194,26 @@ class TestViewFeatureBaseViewset(APITestCase):
         url = self.api_reverse('viewfeatures-by-slug', slug='666') + '.html'
         response = self.client.get(url)
         self.assertEqual(404, response.status_code)
+
+    @override_settings(SERVE_SLUG_URLS=True)
+    def test_feature_served_by_slug(self):
+        feature = self.create(Feature, slug='feature')
+        url = self.api_reverse('viewfeatures-by-slug', slug=feature.slug)
+        real_url = self.api_reverse('viewfeatures-detail', pk=feature.pk)
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            'http://testserver' + real_url, response['Content-Location'])
+        self.assertEqual(feature.pk, int(response.data['id']))
+
+    def test_browser_found_by_slug(self):
+        browser = self.create(Browser, slug='firefox')
+        url = self.api_reverse('browser-by-slug', slug=browser.slug)
+        real_url = self.api_reverse('browser-detail', pk=browser.pk)
+        response = self.client.get(url)
+        self.assertRedirects(response, real_url)
+
+    def test_browser_not_found_by_slug(self):
+        url = self.api_reverse('browser-by-slug', slug='missing')
+        response = self.client.get(url)
+        self.assertEqual(404, response.status_code)
@@ -130,6 +130,23 @@ class TestBrowserViewset(APITestCase):
         actual_content = loads(response.content.decode('utf-8'))
         self.assertDataEqual(expected_content, actual_content)
 
+    def test_get_browser_list_cursor(self):
+        browsers = [
+            self.create(Browser, slug=slug, name={'en': slug})
+            for slug in ('a', 'b', 'c')]
+        url = self.api_reverse('browser-list')
+        response = self.client.get(
+            url, {'page[cursor]': '', 'page_size': 2, 'page[count]': 0})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf-8'))
+        self.assertEqual(
+            ['a', 'b'], [item['slug'] for item in actual['browsers']])
+        pagination = actual['meta']['pagination']['browsers']
+        self.assertIsNone(pagination['count'])
+        self.assertIsNone(pagination['previous'])
+        self.assertIn(
+            'page%%5Bcursor%%5D=%d' % browsers[1].pk, pagination['next'])
+
     def test_get_browsable_api(self):
         browser = self.create(Browser)
         url = self.api_reverse('browser-list')
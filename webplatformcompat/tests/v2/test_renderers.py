@@ -2,7 +2,10 @@
 """Tests for API renderers."""
 from __future__ import unicode_literals
 
+from json import dumps
+
 from django.test import RequestFactory
+from django.test.utils import override_settings
 from rest_framework.serializers import ListSerializer
 from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
 import mock
@@ -13,6 +16,13 @@ from webplatformcompat.serializers import (
     BrowserSerializer, FeatureSerializer, HistoricalBrowserSerializer)
 
 
+def fast_dumps(data):
+    """Encode JSON for testing JSON_API_FAST_DUMPS."""
+    if data.get('meta', {}).get('unsupported'):
+        raise TypeError('Unsupported')
+    return dumps(data, separators=(',', ':'), ensure_ascii=False) + ' '
+
+
 class TestJsonApiV10Renderer(TestCase):
     media_type = 'application/vnd.api+json'
     base_url = 'http://testserver/api/v2/'
@@ -687,3 +697,59 @@ class TestJsonApiV10Renderer(TestCase):
             'historical_browsers', '100', {})
         expected = 'http://testserver/api/v2/historical_browsers/100'
         self.assertEqual(expected, uri)
+
+    def render_browser(self, media_type=None, meta=None):
+        data = ReturnDict((
+            ('id', 1),
+            ('slug', 'firefox'),
+            ('name', {'en': 'Firefox\u2028'}),
+            ('note', None),
+            ('history', [1]),
+            ('history_current', 1),
+            ('versions', []),
+        ), serializer=BrowserSerializer())
+        if meta:
+            data['_view_extra'] = {'meta': meta}
+        url = self.full_api_reverse('browser-detail', pk=1)
+        context = self.make_context(url=url, serializer=BrowserSerializer)
+        return self.renderer.render(
+            data, media_type or self.media_type, context).decode('utf8')
+
+    def test_compact_by_default(self):
+        output = self.render_browser()
+        self.assertNotIn('\n', output)
+        self.assertIn('"slug":"firefox"', output)
+        self.assertIn('Firefox\\u2028', output)
+
+    def test_indent_requested(self):
+        output = self.render_browser(self.media_type + '; indent=4')
+        self.assertIn('\n    ', output)
+
+    @override_settings(JSON_API_FAST_DUMPS=(
+        'webplatformcompat.tests.v2.test_renderers.fast_dumps'))
+    def test_fast_dumps(self):
+        output = self.render_browser()
+        self.assertTrue(output.endswith(' '))
+        self.assertIn('Firefox\\u2028', output)
+
+    @override_settings(JSON_API_FAST_DUMPS=(
+        'webplatformcompat.tests.v2.test_renderers.fast_dumps'))
+    def test_fast_dumps_unsupported(self):
+        output = self.render_browser(meta={'unsupported': True})
+        self.assertFalse(output.endswith(' '))
+
+    @override_settings(JSON_API_FAST_DUMPS=(
+        'webplatformcompat.tests.v2.test_renderers.fast_dumps'))
+    def test_fast_dumps_not_indented(self):
+        output = self.render_browser(self.media_type + '; indent=4')
+        self.assertIn('\n    ', output)
+        self.assertFalse(output.endswith(' '))
+
+    def test_construct_resource_uri_reuses_path(self):
+        self.renderer.request = RequestFactory().get('/')
+        uri = self.renderer.construct_resource_uri('browsers', '1', {})
+        self.assertEqual('http://testserver/api/v2/browsers/1', uri)
+        with mock.patch('webplatformcompat.v2.renderers.reverse') as reverse:
+            uri = self.renderer.construct_resource_uri('browsers', '2', {})
+        self.assertEqual('http://testserver/api/v2/browsers/2', uri)
+        reverse.assert_not_called()
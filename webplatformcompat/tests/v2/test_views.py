@@ -21,6 +21,8 @@ class TestViews(TestCase):
                 'versions': self.full_api_reverse('version-list'),
             },
             'change_control': {
+                'bulk': self.full_api_reverse('bulk-list'),
+                'changes': self.full_api_reverse('change-list'),
                 'changesets': self.full_api_reverse('changeset-list'),
                 'users': self.full_api_reverse('user-list'),
             },
@@ -44,6 +46,7 @@ class TestViews(TestCase):
             },
             'views': {
                 'view_features': self.full_api_reverse('viewfeatures-list'),
+                'export': self.full_api_reverse('export-list'),
             },
         }
         actual = loads(response.content.decode('utf-8'))
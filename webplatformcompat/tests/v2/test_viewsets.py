@@ -2,14 +2,20 @@
 """Tests for v1 API viewsets."""
 from __future__ import unicode_literals
 from datetime import datetime
+from gzip import GzipFile
+from io import BytesIO
 from json import dumps, loads
 from pytz import UTC
 
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
 import mock
 
-from webplatformcompat.history import Changeset
-from webplatformcompat.models import Browser, Feature, Version
-from webplatformcompat.v2.viewsets import ViewFeaturesViewSet
+from webplatformcompat.history import Changeset, HistoryCompaction
+from webplatformcompat.models import Browser, Feature, Support, Version
+from webplatformcompat.v2.viewsets import (
+    BrowserViewSet, HistoricalBrowserViewSet, ViewFeaturesViewSet)
 
 from .base import APITestCase, NamespaceMixin
 from ..test_viewsets import (
@@ -253,6 +259,39 @@ class TestBrowserViewset(APITestCase):
         actual_content = response.content.decode('utf-8')
         self.assertJSONEqual(actual_content, expected_content)
 
+    def test_get_related_versions_costs_filtered_list(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        self.create(Version, browser=browser, version='1.0')
+        self.create(Version, browser=browser, version='2.0')
+        related_url = self.api_reverse('browser-versions', pk=browser.pk)
+        list_url = self.api_reverse('version-list')
+        self.client.get(related_url)  # Warm the instance cache
+        with CaptureQueriesContext(connection) as related_queries:
+            related = self.client.get(related_url)
+        with CaptureQueriesContext(connection) as list_queries:
+            filtered = self.client.get(
+                list_url, {'filter[browser]': browser.pk})
+        self.assertEqual(
+            loads(filtered.content.decode('utf8'))['data'],
+            loads(related.content.decode('utf8'))['data'])
+        self.assertEqual(len(list_queries), len(related_queries))
+
+    def test_get_related_history_current_skips_parent_load(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        url = self.api_reverse('browser-history-current', pk=browser.pk)
+        with mock.patch.object(BrowserViewSet, 'get_object') as get_object:
+            response = self.client.get(url)
+        self.assertEqual(200, response.status_code, response.content)
+        get_object.assert_not_called()
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            str(browser.current_history_id), actual['data']['id'])
+
+    def test_get_related_not_found(self):
+        url = self.api_reverse('browser-history-current', pk=666)
+        response = self.client.get(url)
+        self.assertEqual(404, response.status_code, response.content)
+
     def test_get_relationship_versions_empty(self):
         browser = self.create(Browser)
         url = self.full_api_reverse(
@@ -556,44 +595,380 @@ class TestBrowserViewset(APITestCase):
         self.assertEqual(200, response.status_code, response.content)
         self.assertEqual(5, response.data['count'])
 
-    def assert_param_not_implemented(self, key, value):
-        """Assert that a valid but optional parameter is not implemented."""
+    def test_page_cursor(self):
+        browsers = [
+            self.create(Browser, slug=slug, name={'en': slug})
+            for slug in ('a', 'b', 'c', 'd', 'e')]
+        url = self.full_api_reverse('browser-list')
+        response = self.client.get(url, {'page[cursor]': '', 'page_size': 2})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            [str(browser.pk) for browser in browsers[:2]],
+            [item['id'] for item in actual['data']])
+        self.assertEqual(5, actual['meta']['count'])
+        self.assertIsNone(actual['links']['prev'])
+        next_url = actual['links']['next']
+        self.assertIn('page%%5Bcursor%%5D=%d' % browsers[1].pk, next_url)
+
+        with self.assertNumQueries(4):
+            # User, count, page, and previous cursor
+            response = self.client.get(next_url)
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            [str(browser.pk) for browser in browsers[2:4]],
+            [item['id'] for item in actual['data']])
+        self.assertIn('page%5Bcursor%5D=&', actual['links']['prev'])
+
+        response = self.client.get(actual['links']['next'])
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            [str(browsers[4].pk)], [item['id'] for item in actual['data']])
+        self.assertIsNone(actual['links']['next'])
+        self.assertIn(
+            'page%%5Bcursor%%5D=%d' % browsers[1].pk, actual['links']['prev'])
+
+    def test_page_cursor_skip_count(self):
+        self.create(Browser, slug='browser', name={'en': 'Browser'})
+        url = self.api_reverse('browser-list')
+        response = self.client.get(url, {'page[cursor]': '', 'page[count]': 0})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertIsNone(actual['meta']['count'])
+        self.assertEqual(1, len(actual['data']))
+
+    def test_page_cursor_related_list(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        self.create(Version, browser=browser, version='1.0')
+        version2 = self.create(Version, browser=browser, version='2.0')
+        url = self.api_reverse('browser-versions', pk=browser.pk)
+        response = self.client.get(url, {'page[cursor]': '', 'page_size': 1})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        response = self.client.get(actual['links']['next'])
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            [str(version2.pk)], [item['id'] for item in actual['data']])
+        self.assertIsNone(actual['links']['next'])
+
+    def test_page_cursor_invalid(self):
+        url = self.api_reverse('browser-list')
+        for params, key in (
+                ({'page[cursor]': 'first'}, 'page[cursor]'),
+                ({'page[cursor]': '', 'page[count]': 'no'}, 'page[count]'),
+                ({'page[cursor]': '', 'sort': 'slug'}, 'sort')):
+            response = self.client.get(url, params)
+            self.assertEqual(400, response.status_code, response.content)
+            expected = {
+                'errors': [{
+                    'status': '400',
+                    'detail': 'Query parameter "%s" is invalid.' % key,
+                    'source': {'parameter': key}
+                }]
+            }
+            self.assertEqual(
+                expected, loads(response.content.decode('utf8')))
+
+    def test_param_include(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        version1 = self.create(Version, browser=browser, version='1.0')
+        version2 = self.create(Version, browser=browser, version='2.0')
+        url = self.api_reverse('browser-list')
+        response = self.client.get(url, {'include': 'versions'})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            [('versions', str(version1.pk)), ('versions', str(version2.pk))],
+            [(item['type'], item['id']) for item in actual['included']])
+        self.assertEqual(
+            '1.0', actual['included'][0]['attributes']['version'])
+        self.assertEqual(
+            self.full_api_reverse('version-detail', pk=version1.pk),
+            actual['included'][0]['links']['self'])
+
+    def test_param_include_nested(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        version1 = self.create(Version, browser=browser, version='1.0')
+        version2 = self.create(Version, browser=browser, version='2.0')
+        feature = self.create(Feature, slug='feature', name={'en': 'Feature'})
+        support1 = self.create(Support, version=version1, feature=feature)
+        support2 = self.create(Support, version=version2, feature=feature)
+        url = self.api_reverse('feature-detail', pk=feature.pk)
+        response = self.client.get(
+            url, {'include': 'supports.version.browser,supports'})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        expected = [
+            ('supports', str(support1.pk)),
+            ('supports', str(support2.pk)),
+            ('versions', str(version1.pk)),
+            ('versions', str(version2.pk)),
+            ('browsers', str(browser.pk)),
+        ]
+        self.assertEqual(
+            expected,
+            [(item['type'], item['id']) for item in actual['included']])
+
+    def test_param_include_skips_primary_data(self):
+        parent = self.create(Feature, slug='parent', name={'en': 'Parent'})
+        self.create(Feature, slug='child', name={'en': 'Child'}, parent=parent)
+        url = self.api_reverse('feature-list')
+        response = self.client.get(url, {'include': 'parent,children'})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertNotIn('included', actual)
+
+    def test_param_include_invalid(self):
         url = self.api_reverse('browser-list')
-        response = self.client.get(url, {key: value})
+        response = self.client.get(url, {'include': 'versions.unknown'})
         self.assertEqual(400, response.status_code, response.content)
         expected = {
             'errors': [{
                 'status': '400',
-                'detail': 'Query parameter "%s" is not implemented.' % key,
-                'source': {'parameter': key}
+                'detail': 'Query parameter "include" is invalid.',
+                'source': {'parameter': 'include'}
             }]
         }
         self.assertEqual(expected, loads(response.content.decode('utf8')))
 
-    def test_param_include_not_implemented(self):
-        """
-        Confirm parameter include is unimplemented.
+    def test_param_fields(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        version = self.create(Version, browser=browser, version='1.0')
+        url = self.api_reverse('browser-detail', pk=browser.pk)
+        response = self.client.get(url, {'fields[browsers]': 'slug,versions'})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))['data']
+        self.assertEqual({'slug': 'browser'}, actual['attributes'])
+        self.assertEqual(['versions'], list(actual['relationships'].keys()))
+        self.assertEqual(
+            [{'type': 'versions', 'id': str(version.pk)}],
+            actual['relationships']['versions']['data'])
 
-        TODO: bug 1243190, use param 'include' for included resources.
-        """
-        self.assert_param_not_implemented('include', 'versions')
+    def test_param_fields_included(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        self.create(Version, browser=browser, version='1.0')
+        url = self.api_reverse('browser-list')
+        response = self.client.get(url, {
+            'include': 'versions', 'fields[browsers]': 'versions',
+            'fields[versions]': 'version'})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertNotIn('attributes', actual['data'][0])
+        included = actual['included'][0]
+        self.assertEqual({'version': '1.0'}, included['attributes'])
+        self.assertNotIn('relationships', included)
 
-    def test_param_fields_unimplemented(self):
-        """
-        Confirm JSON API v1.0 parameter 'fields' is unimplemented.
+    def test_param_fields_invalid(self):
+        url = self.api_reverse('browser-list')
+        for key, value in (
+                ('fields', 'name'),
+                ('fields[browsers]', 'slug,unknown'),
+                ('fields[unknown]', 'name')):
+            response = self.client.get(url, {key: value})
+            self.assertEqual(400, response.status_code, response.content)
+            expected = {
+                'errors': [{
+                    'status': '400',
+                    'detail': 'Query parameter "%s" is invalid.' % key,
+                    'source': {'parameter': key}
+                }]
+            }
+            self.assertEqual(
+                expected, loads(response.content.decode('utf8')))
 
-        TODO: bug 1252973, use param 'fields' for sparse fieldsets.
-        """
-        self.assert_param_not_implemented('fields', 'name')
-        self.assert_param_not_implemented('fields[browsers]', 'slug,name')
+    def test_param_sort(self):
+        self.create(Browser, slug='b', name={'en': 'Second'})
+        self.create(Browser, slug='c', name={'en': 'First'})
+        self.create(Browser, slug='a', name={'en': 'Third'})
+        url = self.api_reverse('browser-list')
+        for sort, expected in (
+                ('slug', ['a', 'b', 'c']),
+                ('-slug', ['c', 'b', 'a']),
+                ('name.en', ['c', 'b', 'a']),
+                ('-name.en,id', ['a', 'b', 'c']),
+                ('-id', ['a', 'c', 'b'])):
+            response = self.client.get(url, {'sort': sort})
+            self.assertEqual(200, response.status_code, response.content)
+            actual = loads(response.content.decode('utf8'))
+            slugs = [item['attributes']['slug'] for item in actual['data']]
+            self.assertEqual(expected, slugs, sort)
+
+    def test_param_sort_related_list(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        version1 = self.create(Version, browser=browser, version='1.0')
+        version2 = self.create(Version, browser=browser, version='2.0')
+        url = self.api_reverse('browser-versions', pk=browser.pk)
+        response = self.client.get(url, {'sort': '-id'})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            [str(version2.pk), str(version1.pk)],
+            [item['id'] for item in actual['data']])
 
-    def test_param_sort_unimplemented(self):
-        """
-        Confirm JSON API v1.0 parameter 'sort' is unimplemented.
+    def test_param_sort_invalid(self):
+        url = self.api_reverse('browser-list')
+        for value in ('note', 'name', 'name.fr', 'slug,-slug'):
+            response = self.client.get(url, {'sort': value})
+            self.assertEqual(400, response.status_code, response.content)
+            expected = {
+                'errors': [{
+                    'status': '400',
+                    'detail': 'Query parameter "sort" is invalid.',
+                    'source': {'parameter': 'sort'}
+                }]
+            }
+            self.assertEqual(
+                expected, loads(response.content.decode('utf8')), value)
 
-        TODO: bug 1252973, use param 'fields' for sparse fieldsets.
-        """
-        self.assert_param_not_implemented('sort', 'name')
+    def test_param_lang(self):
+        self.create(
+            Browser, slug='firefox',
+            name={'en': 'Firefox', 'de': 'Firefox', 'fr': 'Firefox'},
+            note={'de': 'Notiz', 'es': 'Nota'})
+        url = self.api_reverse('browser-list')
+        response = self.client.get(url, {'lang': 'fr'})
+        self.assertEqual(200, response.status_code, response.content)
+        item = loads(response.content.decode('utf8'))['data'][0]
+        attributes = item['attributes']
+        self.assertEqual(
+            {'en': 'Firefox', 'fr': 'Firefox'}, attributes['name'])
+        self.assertEqual({'de': 'Notiz', 'es': 'Nota'}, attributes['note'])
+
+    def test_param_lang_accept_language(self):
+        self.create(
+            Browser, slug='firefox',
+            name={'en': 'Firefox', 'de': 'Firefox', 'fr': 'Firefox'})
+        url = self.api_reverse('browser-list')
+        response = self.client.get(
+            url, {'lang': ''}, HTTP_ACCEPT_LANGUAGE='de-DE,de;q=0.8')
+        self.assertEqual(200, response.status_code, response.content)
+        self.assertIn('Accept-Language', response['Vary'])
+        item = loads(response.content.decode('utf8'))['data'][0]
+        self.assertEqual(
+            {'en': 'Firefox', 'de': 'Firefox'}, item['attributes']['name'])
+
+    def test_param_lang_invalid(self):
+        url = self.api_reverse('browser-list')
+        response = self.client.get(url, {'lang': 'français'})
+        self.assertEqual(400, response.status_code, response.content)
+        expected = {
+            'errors': [{
+                'status': '400',
+                'detail': 'Query parameter "lang" is invalid.',
+                'source': {'parameter': 'lang'}
+            }]
+        }
+        self.assertEqual(expected, loads(response.content.decode('utf8')))
+
+    @override_settings(USE_RESPONSE_CACHE=True)
+    def test_list_response_cache(self):
+        cache.clear()
+        self.create(Browser, slug='firefox', name={'en': 'Firefox'})
+        url = self.api_reverse('browser-list')
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(200, response.status_code, response.content)
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        body = GzipFile(fileobj=BytesIO(response.content)).read()
+        actual = loads(body.decode('utf8'))
+        self.assertEqual(['firefox'], [
+            item['attributes']['slug'] for item in actual['data']])
+
+        with self.assertWithinBudget(queries=0, cache_gets=2):
+            cached = self.client.get(url)
+        self.assertEqual(200, cached.status_code)
+        self.assertNotIn('Content-Encoding', cached)
+        self.assertEqual(body, cached.content)
+
+        self.create(Browser, slug='chrome', name={'en': 'Chrome'})
+        response = self.client.get(url)
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(['firefox', 'chrome'], [
+            item['attributes']['slug'] for item in actual['data']])
+
+    @override_settings(USE_RESPONSE_CACHE=True)
+    def test_list_response_cache_key_read_once(self):
+        self.create(Browser, slug='firefox', name={'en': 'Firefox'})
+        url = self.api_reverse('browser-list')
+        patcher = mock.patch(
+            'webplatformcompat.response_cache.ResponseCache.get_generation',
+            return_value='generation')
+        with patcher as mock_get_generation:
+            response = self.client.get(url)
+        self.assertEqual(200, response.status_code, response.content)
+        mock_get_generation.assert_called_once_with()
+
+    @override_settings(USE_RESPONSE_CACHE=True)
+    def test_detail_not_response_cached(self):
+        cache.clear()
+        browser = self.create(Browser, slug='firefox')
+        url = self.api_reverse('browser-detail', pk=browser.pk)
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(200, response.status_code, response.content)
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_param_as_of(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Old'})
+        old_changeset = self.changeset
+        browser._history_changeset = Changeset.objects.create(user=self.user)
+        browser.name = {'en': 'New'}
+        browser.save()
+        self.changeset = browser._history_changeset
+        self.create(Browser, slug='later', name={'en': 'Later'})
+
+        url = self.api_reverse('browser-list')
+        response = self.client.get(url, {'as_of': old_changeset.id})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(1, actual['meta']['count'])
+        item = actual['data'][0]
+        self.assertEqual('historical_browsers', item['type'])
+        self.assertEqual(str(self.history_pks(browser)[-1]), item['id'])
+        archive = item['attributes']['archive_data']
+        self.assertEqual({'en': 'Old'}, archive['attributes']['name'])
+
+    def test_param_as_of_lang(self):
+        browser = self.create(
+            Browser, slug='browser',
+            name={'en': 'Browser', 'de': 'Browser', 'fr': 'Navigateur'})
+        url = self.api_reverse('browser-list')
+        response = self.client.get(
+            url, {'as_of': self.changeset.id, 'lang': 'fr'})
+        self.assertEqual(200, response.status_code, response.content)
+        item = loads(response.content.decode('utf8'))['data'][0]
+        self.assertEqual(str(self.history_pks(browser)[-1]), item['id'])
+        archive = item['attributes']['archive_data']
+        self.assertEqual(
+            {'en': 'Browser', 'fr': 'Navigateur'},
+            archive['attributes']['name'])
+
+    def test_param_as_of_invalid(self):
+        url = self.api_reverse('browser-list')
+        response = self.client.get(url, {'as_of': 'yesterday'})
+        self.assertEqual(400, response.status_code, response.content)
+        expected = {
+            'errors': [{
+                'status': '400',
+                'detail': 'Query parameter "as_of" is invalid.',
+                'source': {'parameter': 'as_of'}
+            }]
+        }
+        self.assertEqual(expected, loads(response.content.decode('utf8')))
+
+    def test_param_as_of_before_floor(self):
+        self.create(Browser, slug='browser', name={'en': 'Browser'})
+        old_changeset = self.changeset
+        self.changeset = Changeset.objects.create(user=self.user)
+        HistoryCompaction.objects.create(floor=self.changeset.id)
+
+        url = self.api_reverse('browser-list')
+        response = self.client.get(url, {'as_of': old_changeset.id})
+        self.assertEqual(400, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            {'parameter': 'as_of'}, actual['errors'][0]['source'])
+        response = self.client.get(url, {'as_of': self.changeset.id})
+        self.assertEqual(200, response.status_code, response.content)
 
 
 class TestFeatureViewSet(APITestCase):
@@ -634,6 +1009,118 @@ class TestFeatureViewSet(APITestCase):
         self.assertEqual(parent.id, response.data['results'][0]['id'])
         self.assertEqual(other.id, response.data['results'][1]['id'])
 
+    def test_filter_by_name(self):
+        self.create(Feature, slug='feature', name={'en': 'A Feature'})
+        other = self.create(Feature, slug='other', name={'en': 'Other'})
+        response = self.client.get(
+            self.api_reverse('feature-list'), {'filter[name.en]': 'Other'})
+        self.assertEqual(200, response.status_code, response.data)
+        self.assertEqual(1, response.data['count'])
+        self.assertEqual(other.id, response.data['results'][0]['id'])
+
+    def test_filter_by_slug_in(self):
+        feature1 = self.create(Feature, slug='f1', name={'en': 'Feature 1'})
+        self.create(Feature, slug='f2', name={'en': 'Feature 2'})
+        feature3 = self.create(Feature, slug='f3', name={'en': 'Feature 3'})
+        response = self.client.get(
+            self.api_reverse('feature-list'), {'filter[slug__in]': 'f1,f3'})
+        self.assertEqual(200, response.status_code, response.data)
+        self.assertEqual(
+            [feature1.id, feature3.id],
+            [item['id'] for item in response.data['results']])
+
+    def test_filter_applied_once(self):
+        parent = self.create(Feature, slug='parent', name={'en': 'Parent'})
+        feature = self.create(
+            Feature, slug='feature', parent=parent, name={'en': 'A Feature'})
+        response = self.client.get(
+            self.api_reverse('feature-list'),
+            {'filter[parent]': str(parent.id), 'filter[slug]': 'feature'})
+        self.assertEqual(200, response.status_code, response.data)
+        self.assertEqual(
+            [feature.id], [item['id'] for item in response.data['results']])
+
+    def test_search(self):
+        grid = self.create(Feature, slug='css-grid', name={'en': 'Grid'})
+        display = self.create(
+            Feature, slug='web-css-display', name={'zxx': 'display'})
+        self.create(Feature, slug='web-css-float', name={'zxx': 'float'})
+        url = self.api_reverse('feature-search')
+        self.assertEqual('/api/v2/features/search', url)
+        response = self.client.get(url, {'q': 'css d', 'page_size': 1})
+        self.assertEqual(200, response.status_code, response.data)
+        self.assertEqual(1, response.data['count'])
+        self.assertEqual(display.id, response.data['results'][0]['id'])
+        response = self.client.get(url, {'q': 'css', 'page_size': 1})
+        self.assertEqual(3, response.data['count'])
+        self.assertEqual(grid.id, response.data['results'][0]['id'])
+        self.assertTrue(response.data['next'])
+
+    def test_search_json_api(self):
+        feature = self.create(
+            Feature, slug='web-css-display', name={'zxx': 'display'})
+        response = self.client.get(
+            self.api_reverse('feature-search'), {'q': 'display'},
+            HTTP_ACCEPT='application/vnd.api+json')
+        self.assertEqual(200, response.status_code, response.content)
+        data = loads(response.content.decode('utf8'))['data']
+        self.assertEqual(
+            [('features', str(feature.id))],
+            [(item['type'], item['id']) for item in data])
+
+    def test_search_without_query(self):
+        response = self.client.get(self.api_reverse('feature-search'))
+        self.assertEqual(400, response.status_code, response.data)
+
+    def test_search_cursor(self):
+        response = self.client.get(
+            self.api_reverse('feature-search'),
+            {'q': 'css', 'page[cursor]': ''})
+        self.assertEqual(400, response.status_code, response.data)
+
+    def test_search_unsupported_params(self):
+        for param, value in (
+                ('as_of', '1'), ('filter[slug]', 'css-grid'),
+                ('sort', 'slug')):
+            response = self.client.get(
+                self.api_reverse('feature-search'), {'q': 'css', param: value},
+                HTTP_ACCEPT='application/vnd.api+json')
+            self.assertEqual(400, response.status_code, param)
+            actual = loads(response.content.decode('utf8'))
+            self.assertEqual(
+                {'parameter': param}, actual['errors'][0]['source'])
+
+    def test_filter_by_undeclared_field(self):
+        """Test that filtering by an unindexed field is an error."""
+        response = self.client.get(
+            self.api_reverse('feature-list'), {'filter[experimental]': '1'})
+        self.assertEqual(400, response.status_code, response.data)
+        expected_content = {
+            'errors': [{
+                'detail': 'Unknown filter "experimental" requested.',
+                'status': '400'
+            }]
+        }
+        actual_content = response.content.decode('utf-8')
+        self.assertJSONEqual(actual_content, expected_content)
+
+    def test_filter_by_invalid_value(self):
+        for key, value in (
+                ('filter[parent]', 'first'),
+                ('filter[parent__in]', '1,,2')):
+            response = self.client.get(
+                self.api_reverse('feature-list'), {key: value})
+            self.assertEqual(400, response.status_code, response.data)
+            expected = {
+                'errors': [{
+                    'status': '400',
+                    'detail': 'Query parameter "%s" is invalid.' % key,
+                    'source': {'parameter': key}
+                }]
+            }
+            self.assertEqual(
+                expected, loads(response.content.decode('utf8')))
+
     def test_filter_by_unknown_param(self):
         """Test that filtering by an unknown parameter is an error."""
         response = self.client.get(
@@ -914,6 +1401,345 @@ class TestFeatureViewSet(APITestCase):
         self.assertJSONEqual(response.content.decode('utf8'), expected)
 
 
+class TestChangesetViewSet(APITestCase):
+    """Test ChangesetViewSet."""
+
+    def test_snapshot(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        version = self.create(Version, browser=browser, version='1.0')
+        url = self.full_api_reverse('changeset-snapshot', pk=self.changeset.pk)
+        first_changeset = self.changeset
+        self.changeset = Changeset.objects.create(user=self.user)
+        self.create(Browser, slug='later', name={'en': 'Later'})
+        self.changeset = first_changeset
+
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('application/vnd.api+json', response['Content-Type'])
+        content = b''.join(response.streaming_content)
+        actual = loads(content.decode('utf8'))
+        self.assertEqual({'self': url}, actual['links'])
+        self.assertEqual({'as_of': self.changeset.pk}, actual['meta'])
+        items = [(item['type'], item['id']) for item in actual['data']]
+        expected = [
+            ('browsers', str(browser.pk)), ('versions', str(version.pk))]
+        self.assertEqual(expected, items)
+        version_links = actual['data'][1]['relationships']['browser']
+        self.assertEqual(
+            {'type': 'browsers', 'id': str(browser.pk)},
+            version_links['data'])
+
+    def test_diff(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Old'})
+        browser._history_changeset = Changeset.objects.create(user=self.user)
+        browser.name = {'en': 'New'}
+        browser.save()
+        url = self.full_api_reverse(
+            'changeset-diff', pk=browser._history_changeset.pk)
+
+        response = self.client.get(url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('application/vnd.api+json', response['Content-Type'])
+        content = b''.join(response.streaming_content)
+        actual = loads(content.decode('utf8'))
+        self.assertEqual({'self': url}, actual['links'])
+        self.assertEqual(
+            {'changeset': browser._history_changeset.pk}, actual['meta'])
+        self.assertEqual(1, len(actual['data']))
+        item = actual['data'][0]
+        self.assertEqual('browsers', item['type'])
+        self.assertEqual(str(browser.pk), item['id'])
+        attributes = item['attributes']
+        self.assertEqual('updated', attributes['change'])
+        self.assertEqual(
+            {'en': 'Old'}, attributes['before']['attributes']['name'])
+        self.assertEqual(
+            {'en': 'New'}, attributes['after']['attributes']['name'])
+
+    def test_snapshot_not_found(self):
+        url = self.api_reverse('changeset-snapshot', pk=666)
+        response = self.client.get(url)
+        self.assertEqual(404, response.status_code)
+
+    def test_snapshot_archived(self):
+        self.create(Browser, slug='browser', name={'en': 'Browser'})
+        old_changeset = self.changeset
+        floor = Changeset.objects.create(user=self.user)
+        HistoryCompaction.objects.create(floor=floor.id)
+        for name in ('changeset-snapshot', 'changeset-diff'):
+            url = self.api_reverse(name, pk=old_changeset.pk)
+            response = self.client.get(url)
+            self.assertEqual(410, response.status_code, name)
+
+
+class TestChangeViewSet(APITestCase):
+    """Test ChangeViewSet."""
+
+    def test_list(self):
+        browser = self.create(Browser, slug='browser', name={'en': 'Browser'})
+        version = self.create(Version, browser=browser, version='1.0')
+        self.changeset.closed = True
+        self.changeset.save(update_cache=False)
+        url = self.full_api_reverse('change-list')
+
+        response = self.client.get(url, {'page_size': 1})
+        self.assertEqual(200, response.status_code)
+        actual = loads(b''.join(response.streaming_content).decode('utf8'))
+        browser_history = browser.history.get()
+        expected_data = [{
+            'type': 'browsers',
+            'id': str(browser.pk),
+            'meta': {
+                'event': 'created',
+                'history_id': str(browser_history.pk),
+                'changeset': str(self.changeset.pk),
+            },
+        }]
+        self.assertEqual(expected_data, actual['data'])
+
+        response = self.client.get(actual['links']['next'])
+        actual = loads(b''.join(response.streaming_content).decode('utf8'))
+        self.assertEqual(
+            [('versions', str(version.pk))],
+            [(item['type'], item['id']) for item in actual['data']])
+
+        response = self.client.get(actual['links']['next'])
+        actual = loads(b''.join(response.streaming_content).decode('utf8'))
+        self.assertEqual([], actual['data'])
+        self.assertIn('page%5Bcursor%5D=', actual['links']['next'])
+
+    def test_invalid_cursor(self):
+        url = self.api_reverse('change-list')
+        response = self.client.get(url, {'page[cursor]': 'next'})
+        self.assertEqual(400, response.status_code, response.content)
+        expected = {
+            'errors': [{
+                'status': '400',
+                'detail': 'Query parameter "page[cursor]" is invalid.',
+                'source': {'parameter': 'page[cursor]'}
+            }]
+        }
+        self.assertEqual(expected, loads(response.content.decode('utf8')))
+
+
+class TestExportViewSet(APITestCase):
+    """Test ExportViewSet."""
+
+    def setUp(self):
+        super(TestExportViewSet, self).setUp()
+        self.browser = self.create(
+            Browser, slug='browser', name={'en': 'Browser'})
+        self.version = self.create(
+            Version, browser=self.browser, version='1.0')
+        self.changeset.closed = True
+        self.changeset.save(update_cache=False)
+        self.url = self.full_api_reverse('export-list')
+
+    def test_list(self):
+        response = self.client.get(self.url)
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('application/vnd.api+json', response['Content-Type'])
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(
+            self.url + '?as_of=%d' % self.changeset.pk,
+            response['Content-Location'])
+        actual = loads(b''.join(response.streaming_content).decode('utf8'))
+        self.assertEqual({'self': self.url}, actual['links'])
+        self.assertEqual({'as_of': self.changeset.pk}, actual['meta'])
+        items = [(item['type'], item['id']) for item in actual['data']]
+        expected = [
+            ('browsers', str(self.browser.pk)),
+            ('versions', str(self.version.pk))]
+        self.assertEqual(expected, items)
+
+    def test_list_as_of(self):
+        first_changeset = self.changeset
+        self.changeset = Changeset.objects.create(user=self.user)
+        self.create(Browser, slug='later', name={'en': 'Later'})
+
+        response = self.client.get(self.url, {'as_of': first_changeset.pk})
+        self.assertEqual(200, response.status_code)
+        actual = loads(b''.join(response.streaming_content).decode('utf8'))
+        self.assertEqual({'as_of': first_changeset.pk}, actual['meta'])
+        self.assertEqual(2, len(actual['data']))
+
+    def test_list_before_open_changeset(self):
+        final_changeset = self.changeset
+        open_changeset = Changeset.objects.create(user=self.user)
+        self.changeset = Changeset.objects.create(user=self.user)
+        self.create(Browser, slug='later', name={'en': 'Later'})
+        self.changeset.closed = True
+        self.changeset.save(update_cache=False)
+
+        response = self.client.get(self.url)
+        self.assertEqual(200, response.status_code)
+        actual = loads(b''.join(response.streaming_content).decode('utf8'))
+        self.assertEqual({'as_of': final_changeset.pk}, actual['meta'])
+        for changeset in (open_changeset, self.changeset):
+            response = self.client.get(self.url, {'as_of': changeset.pk})
+            self.assertEqual(400, response.status_code, changeset.pk)
+
+    def test_list_ndjson_type(self):
+        response = self.client.get(
+            self.url, {'type': 'versions'}, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+        lines = b''.join(response.streaming_content).decode('utf8')
+        self.assertTrue(lines.endswith('\n'))
+        items = [loads(line) for line in lines.splitlines()]
+        self.assertEqual(['versions'], [item['type'] for item in items])
+        self.assertEqual(str(self.version.pk), items[0]['id'])
+
+    def test_list_gzip(self):
+        response = self.client.get(
+            self.url, {'format': 'ndjson'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual('gzip', response['Content-Encoding'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        content = b''.join(response.streaming_content)
+        lines = GzipFile(fileobj=BytesIO(content)).read().decode('utf8')
+        self.assertEqual(2, len(lines.splitlines()))
+
+    def test_list_invalid(self):
+        for param, value in (
+                ('as_of', 'yesterday'), ('as_of', '666'),
+                ('type', 'browsers,browsers'), ('type', 'users')):
+            response = self.client.get(self.url, {param: value})
+            self.assertEqual(400, response.status_code, response.content)
+            actual = loads(response.content.decode('utf8'))
+            self.assertEqual(
+                {'parameter': param}, actual['errors'][0]['source'], value)
+
+    def test_list_as_of_before_floor(self):
+        first_changeset = self.changeset
+        self.changeset = Changeset.objects.create(user=self.user)
+        HistoryCompaction.objects.create(floor=self.changeset.pk)
+        response = self.client.get(self.url, {'as_of': first_changeset.pk})
+        self.assertEqual(400, response.status_code, response.content)
+
+
+class TestBulkViewSet(APITestCase):
+    """Test BulkViewSet."""
+
+    def post(self, operations):
+        url = self.full_api_reverse('bulk-list')
+        data = {'atomic:operations': operations}
+        return self.client.post(
+            url, dumps(data), content_type='application/vnd.api+json')
+
+    def test_apply(self):
+        self.login_user(groups=['change-resource', 'delete-resource'])
+        feature = self.create(Feature, slug='feature', name={'en': 'Old'})
+        browser = self.create(Browser, slug='old', name={'en': 'Old'})
+        response = self.post([
+            {'op': 'add', 'data': {
+                'type': 'browsers', 'lid': 'new-browser',
+                'attributes': {'slug': 'new', 'name': {'en': 'New'}}}},
+            {'op': 'add', 'data': {
+                'type': 'versions', 'lid': 'new-version',
+                'attributes': {'version': '1.0', 'status': 'current'},
+                'relationships': {'browser': {'data': {
+                    'type': 'browsers', 'lid': 'new-browser'}}}}},
+            {'op': 'update', 'data': {
+                'type': 'features', 'id': str(feature.pk),
+                'attributes': {'name': {'en': 'New'}}}},
+            {'op': 'remove', 'ref': {'type': 'browsers', 'id': browser.pk}},
+        ])
+        self.assertEqual(200, response.status_code, response.content)
+
+        new_browser = Browser.objects.get(slug='new')
+        version = new_browser.versions.get()
+        changeset = Changeset.objects.latest('id')
+        expected = {
+            'atomic:results': [
+                {'data': {
+                    'type': 'browsers', 'id': str(new_browser.pk),
+                    'lid': 'new-browser'}},
+                {'data': {
+                    'type': 'versions', 'id': str(version.pk),
+                    'lid': 'new-version'}},
+                {'data': {'type': 'features', 'id': str(feature.pk)}},
+                {},
+            ],
+            'meta': {'changeset': str(changeset.pk)},
+        }
+        self.assertDataEqual(
+            expected, loads(response.content.decode('utf-8')))
+        self.assertTrue(changeset.closed)
+        self.assertEqual(2, changeset.historical_browsers.count())
+        self.assertEqual(1, changeset.historical_versions.count())
+        self.assertEqual(1, changeset.historical_features.count())
+        self.assertEqual(
+            {'en': 'New'}, Feature.objects.get(pk=feature.pk).name)
+
+    def test_errors_roll_back(self):
+        changeset_count = Changeset.objects.count()
+        self.login_user()
+        response = self.post([
+            {'op': 'add', 'data': {
+                'type': 'browsers', 'lid': 'new-browser',
+                'attributes': {'slug': 'new', 'name': {'en': 'New'}}}},
+            {'op': 'add', 'data': {
+                'type': 'versions',
+                'attributes': {'version': '1.0', 'status': 'current'},
+                'relationships': {'browser': {'data': {
+                    'type': 'browsers', 'lid': 'other-browser'}}}}},
+            {'op': 'add', 'data': {
+                'type': 'browsers', 'attributes': {'slug': 'other'}}},
+            {'op': 'update', 'data': {'type': 'features', 'id': '666'}},
+        ])
+        self.assertEqual(400, response.status_code, response.content)
+        expected = {
+            'errors': [{
+                'status': '400',
+                'detail': (
+                    'Local ID "other-browser" was not added by an earlier'
+                    ' operation.'),
+                'path': (
+                    '/atomic:operations/1/data/relationships/browser/data'),
+            }, {
+                'status': '400',
+                'detail': 'This field is required.',
+                'path': '/atomic:operations/2/data/attributes/name',
+            }, {
+                'status': '404',
+                'detail': 'Resource features "666" not found.',
+                'path': '/atomic:operations/3/data',
+            }]
+        }
+        self.assertDataEqual(
+            expected, loads(response.content.decode('utf-8')))
+        self.assertFalse(Browser.objects.exists())
+        self.assertEqual(changeset_count, Changeset.objects.count())
+
+    def test_invalid_operation(self):
+        self.login_user()
+        response = self.post([{'op': 'replace', 'data': {}}])
+        self.assertEqual(400, response.status_code, response.content)
+        expected = {
+            'errors': [{
+                'status': '400',
+                'detail': (
+                    'atomic:operations.0.op must be "add", "update", or'
+                    ' "remove".'),
+            }]
+        }
+        self.assertDataEqual(
+            expected, loads(response.content.decode('utf-8')))
+
+    def test_anonymous(self):
+        response = self.post([])
+        self.assertEqual(401, response.status_code, response.content)
+
+    def test_permission_denied(self):
+        self.login_user()
+        browser = self.create(Browser, slug='browser', name={'en': 'Old'})
+        response = self.post(
+            [{'op': 'remove', 'ref': {'type': 'browsers', 'id': browser.pk}}])
+        self.assertEqual(403, response.status_code, response.content)
+        self.assertTrue(Browser.objects.filter(pk=browser.pk).exists())
+
+
 class TestHistoricaBrowserViewset(APITestCase):
     """Test common historical viewset functionality through browsers."""
 
@@ -985,6 +1811,74 @@ class TestHistoricaBrowserViewset(APITestCase):
         actual_json = loads(response.content.decode('utf-8'))
         self.assertDataEqual(expected_json, actual_json)
 
+    def test_page_cursor(self):
+        self.browser.name = {'en': 'Renamed'}
+        self.browser.save()
+        url = self.full_api_reverse('historicalbrowser-list')
+        response = self.client.get(url, {'page[cursor]': '', 'page_size': 1})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(str(self.history.pk), actual['data'][0]['id'])
+        self.assertEqual(2, actual['meta']['count'])
+        response = self.client.get(actual['links']['next'])
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            'Renamed',
+            actual['data'][0]['attributes']['archive_data']['attributes'][
+                'name']['en'])
+        self.assertIsNone(actual['links']['next'])
+
+    def test_param_lang(self):
+        self.browser.name = {'en': 'Browser', 'de': 'Browser', 'es': 'Nav'}
+        self.browser.save()
+        url = self.full_api_reverse('historicalbrowser-list')
+        response = self.client.get(url, {'lang': 'es'})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        names = [
+            item['attributes']['archive_data']['attributes']['name']
+            for item in actual['data']]
+        self.assertEqual(
+            [{'en': 'A Browser'}, {'en': 'Browser', 'es': 'Nav'}], names)
+
+    def test_filter_by_object(self):
+        other = self.create(Browser, slug='other', name={'en': 'Other'})
+        url = self.full_api_reverse('historicalbrowser-list')
+        response = self.client.get(url, {'filter[browser]': other.pk})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))
+        self.assertEqual(
+            [str(other.history.get().pk)],
+            [item['id'] for item in actual['data']])
+
+    def test_param_fields(self):
+        url = self.full_api_reverse('historicalbrowser-list')
+        response = self.client.get(
+            url, {'fields[historical_browsers]': 'date,event,changeset'})
+        self.assertEqual(200, response.status_code, response.content)
+        actual = loads(response.content.decode('utf8'))['data'][0]
+        self.assertEqual(['date', 'event'], sorted(actual['attributes']))
+        self.assertEqual(['changeset'], list(actual['relationships']))
+
+    def test_param_fields_loads_columns(self):
+        view = HistoricalBrowserViewSet(
+            request=mock.Mock(query_params={
+                'fields[historical_browsers]': 'date,event,changeset'}),
+            action='list', format_kwarg=None)
+        queryset = view.get_queryset()
+        self.assertEqual(
+            set(['history_id', 'history_date', 'history_type',
+                 'history_changeset']),
+            set(queryset.query.deferred_loading[0]))
+
+    def test_param_fields_archive_data_loads_all(self):
+        view = HistoricalBrowserViewSet(
+            request=mock.Mock(query_params={
+                'fields[historical_browsers]': 'archive_data'}),
+            action='list', format_kwarg=None)
+        queryset = view.get_queryset()
+        self.assertEqual((set(), True), queryset.query.deferred_loading)
+
     def test_related_browser(self):
         url = self.full_api_reverse(
             'historicalbrowser-browser', pk=self.history.pk)
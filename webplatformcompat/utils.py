@@ -1,6 +1,12 @@
 """API utilty functions."""
+from uuid import uuid4
+
+from django.core.cache import cache as default_cache
 from rest_framework.views import get_view_name as drf_get_view_name
 
+from .exceptions import InvalidQueryParam
+from .fields import TranslatedValue
+
 
 def get_view_name(view_cls, suffix=None):
     name = drf_get_view_name(view_cls, suffix=None)
@@ -8,3 +14,69 @@ def get_view_name(view_cls, suffix=None):
         return 'API Root'
     else:
         return name
+
+
+def get_generation(key, cache=None):
+    """Return the generation token at a cache key, creating it if needed.
+
+    A generation token is part of the keys of a group of cache entries, so
+    that replacing it with new_generation expires the whole group.
+    """
+    cache = cache or default_cache
+    generation = cache.get(key)
+    if generation is None:
+        generation = uuid4().hex
+        cache.add(key, generation, None)
+        generation = cache.get(key) or generation
+    return generation
+
+
+def new_generation(key, cache=None):
+    """Replace the generation token at a cache key."""
+    (cache or default_cache).set(key, uuid4().hex, None)
+
+
+def parse_accept_header(header):
+    """Return the values in an Accept-* header, omitting those with q=0."""
+    accepted = []
+    for part in header.split(','):
+        value, _, params = part.partition(';')
+        value = value.strip().lower()
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, param_value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(param_value)
+                except ValueError:
+                    quality = 0.0
+        if value and quality > 0:
+            accepted.append(value)
+    return accepted
+
+
+def get_requested_languages(request):
+    """Return the languages requested with ?lang, or None for all.
+
+    ?lang=fr,de requests French and German, and a blank ?lang= requests the
+    languages in the Accept-Language header.  A regional language, such as
+    fr-CA, includes the base language (fr).  English (en), the fallback, and
+    non-linguistic content (zxx) are always included.  The languages are
+    lowercase, since language tags are case insensitive.
+    """
+    value = request.query_params.get('lang')
+    if value is None:
+        return None
+    if value:
+        tags = value.split(',')
+        if not all(TranslatedValue.locale_re.match(tag) for tag in tags):
+            raise InvalidQueryParam('lang')
+    else:
+        header = request.META.get('HTTP_ACCEPT_LANGUAGE', '')
+        tags = [tag for tag in parse_accept_header(header) if tag != '*']
+    languages = set(('en', 'zxx'))
+    for tag in tags:
+        tag = tag.lower()
+        languages.add(tag)
+        languages.add(tag.split('-')[0])
+    return frozenset(languages)
@@ -217,3 +217,13 @@ class JsonApiV10Parser(JSONParser):
                 (prefix, expected_type, resource_type))
 
         return resource_id
+
+
+class JsonApiV10DocumentParser(JSONParser):
+    """Parse a JSON API v1.0 document, without converting to DRF format.
+
+    This is used by views that handle the document structure themselves,
+    such as bulk operations.
+    """
+
+    media_type = 'application/vnd.api+json'
@@ -3,9 +3,11 @@
 
 from collections import OrderedDict
 
-from django.core.urlresolvers import reverse
+from django.conf import settings
+from django.core.urlresolvers import get_script_prefix, reverse
+from django.utils import six
 from django.utils.encoding import force_text
-from django.utils.six.moves.urllib.parse import urlparse, urlunparse
+from django.utils.module_loading import import_string
 from rest_framework.renderers import JSONRenderer
 from rest_framework.status import is_client_error, is_server_error
 
@@ -17,12 +19,26 @@ class JsonApiV10Renderer(JSONRenderer):
 
     This is a partial implementation, focused on the current needs of the API.
     For the full spec, see http://jsonapi.org/format/1.0/
+
+    Output is compact JSON, unless indenting is requested, such as by the
+    browsable API or with an "indent" media type parameter.  Compact output
+    is encoded with the function named in the JSON_API_FAST_DUMPS setting,
+    if set.
     """
 
     PAGINATION_KEYS = ('count', 'next', 'previous', 'results')
     dict_class = OrderedDict
     media_type = 'application/vnd.api+json'
     namespace = 'v2'
+    path_sentinel = '9876543210'
+
+    # Shared between instances
+    _fast_dumps = {}
+    _path_templates = {}
+
+    # Set in get_base_uri
+    _base_request = None
+    _base_uri = None
 
     def render(self, data, accepted_media_type=None, renderer_context=None):
         """Convert DRF native data to the JSON API v1.0 format."""
@@ -41,6 +57,9 @@ class JsonApiV10Renderer(JSONRenderer):
         if data is None:
             # Deleted items
             converted = None
+        elif renderer_context.get('is_document'):
+            # Already a JSON API document
+            converted = data
         elif all([key in data for key in self.PAGINATION_KEYS]):
             # Paginated object
             converted = self.convert_paginated(
@@ -78,12 +97,65 @@ class JsonApiV10Renderer(JSONRenderer):
                 data, fields_extra, resource_uri=resource_uri,
                 request_uri=self.request_uri)
 
-        renderer_context['indent'] = 4
+        included = renderer_context.get('included')
+        if included and converted and 'data' in converted:
+            converted['included'] = [
+                self.convert_object(item, item_extra)
+                for item_extra, item in included]
+
+        return self.encode(converted, accepted_media_type, renderer_context)
+
+    def encode(self, data, accepted_media_type=None, renderer_context=None):
+        """Encode data as JSON, with the fast encoder if possible."""
+        fast_dumps = self.get_fast_dumps()
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if fast_dumps and data is not None and indent is None:
+            try:
+                ret = fast_dumps(data)
+            except (TypeError, ValueError, OverflowError):
+                pass  # Use the standard encoder for unsupported data
+            else:
+                if isinstance(ret, six.text_type):
+                    ret = ret.replace(u'\u2028', u'\\u2028')
+                    ret = ret.replace(u'\u2029', u'\\u2029')
+                    ret = ret.encode('utf-8')
+                return ret
         return super(JsonApiV10Renderer, self).render(
-            data=converted,
-            accepted_media_type=accepted_media_type,
+            data=data, accepted_media_type=accepted_media_type,
             renderer_context=renderer_context)
 
+    @classmethod
+    def get_fast_dumps(cls):
+        """Return the function in JSON_API_FAST_DUMPS, or None if unset."""
+        path = settings.JSON_API_FAST_DUMPS
+        if path not in cls._fast_dumps:
+            cls._fast_dumps[path] = import_string(path) if path else None
+        return cls._fast_dumps[path]
+
+    def stream_document(self, request, objects, meta=None, links=None):
+        """Render a JSON API document with a list of objects, in chunks.
+
+        objects is an iterable of converted resource objects, which are
+        encoded one at a time, so that the full document is never in memory.
+        It may be a generator that uses this renderer's convert methods,
+        which depend on the request set here.  links are added to the
+        document's "self" link.
+        """
+        self.request = request
+        self.request_uri = request.build_absolute_uri()
+        encode = self.encode
+        doc_links = self.dict_class((('self', self.request_uri),))
+        doc_links.update(links or {})
+        yield b'{"links":' + encode(doc_links) + b',"data":['
+        separator = b''
+        for obj in objects:
+            yield separator + encode(obj)
+            separator = b','
+        if meta is None:
+            yield b']}'
+        else:
+            yield b'],"meta":' + encode(meta) + b'}'
+
     def convert_to_relationship_object(
             self, name, raw_id, field_data, resource_uri, include_links=True):
         """Convert from IDs to a relationship object.
@@ -115,9 +187,7 @@ class JsonApiV10Renderer(JSONRenderer):
             # TODO: Use reverse instead of concat to construct links
             attr_name = field_data.get('name', name)
             endpoint = field_data.get('singular', attr_name)
-            scheme, netloc, path, params, query, fragment = urlparse(
-                resource_uri)
-            base_uri = urlunparse((scheme, netloc, path, '', '', ''))
+            base_uri = resource_uri.split('?', 1)[0].split('#', 1)[0]
             relationship['links'] = self.dict_class((
                 ('self', base_uri + '/relationships/' + endpoint),
                 ('related', base_uri + '/' + endpoint),
@@ -140,9 +210,30 @@ class JsonApiV10Renderer(JSONRenderer):
     def construct_resource_uri(self, resource_type, resource_id, field_data):
         singular = field_data.get('singular', resource_type[:-1])
         pattern = '%s:%s-detail' % (self.namespace, singular.replace('_', ''))
-        url = reverse(pattern, kwargs={'pk': resource_id})
-        uri = self.request.build_absolute_uri(url)
-        return uri
+        path = self.get_path_template(pattern) % resource_id
+        return self.get_base_uri() + path
+
+    def get_path_template(self, pattern):
+        """Return a path template for a detail URL pattern.
+
+        The URL is reversed once with a sentinel ID, rather than once per
+        resource.  Return is a string with a %s placeholder for the ID.
+        """
+        key = (get_script_prefix(), pattern)
+        template = self._path_templates.get(key)
+        if template is None:
+            path = reverse(pattern, kwargs={'pk': self.path_sentinel})
+            template = path.replace('%', '%%').replace(
+                self.path_sentinel, '%s')
+            self._path_templates[key] = template
+        return template
+
+    def get_base_uri(self):
+        """Return the scheme and host of the request."""
+        if self._base_request is not self.request:
+            self._base_request = self.request
+            self._base_uri = self.request.build_absolute_uri('/')[:-1]
+        return self._base_uri
 
     def convert_document(
             self, data, fields_extra, resource_uri=None, request_uri=None,
@@ -328,6 +419,25 @@ class JsonApiV10Renderer(JSONRenderer):
         return extra
 
 
+class JsonApiV10NdjsonRenderer(JsonApiV10Renderer):
+    """Stream JSON API resource objects as newline-delimited JSON.
+
+    Each line of a streamed document is a compact resource object.  Other
+    responses, such as errors, are JSON API documents.
+    """
+
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def stream_document(self, request, objects, meta=None, links=None):
+        """Render a list of objects, one per line."""
+        self.request = request
+        self.request_uri = request.build_absolute_uri()
+        encode = self.encode
+        for obj in objects:
+            yield encode(obj) + b'\n'
+
+
 class JsonApiV10TemplateHTMLRenderer(BaseJsonApiTemplateHTMLRenderer):
     """Render to a template, but use JSON API format as context."""
 
@@ -10,8 +10,9 @@ from .viewsets import (
     HistoricalBrowserViewSet, HistoricalFeatureViewSet,
     HistoricalMaturityViewSet, HistoricalReferenceViewSet,
     HistoricalSectionViewSet, HistoricalSpecificationViewSet,
-    HistoricalSupportViewSet, HistoricalVersionViewSet, ChangesetViewSet,
-    UserViewSet, ViewFeaturesViewSet, RelatedListRoute, RelatedItemRoute)
+    HistoricalSupportViewSet, HistoricalVersionViewSet, BulkViewSet,
+    ChangesetViewSet, ChangeViewSet, ExportViewSet, UserViewSet,
+    ViewFeaturesViewSet, RelatedListRoute, RelatedItemRoute)
 
 
 class GroupedRelatedRouter(GroupedRouter):
@@ -112,6 +113,10 @@ router.register(r'references', ReferenceViewSet, group='resources')
 
 router.register(r'changesets', ChangesetViewSet, group='change_control')
 router.register(r'users', UserViewSet, group='change_control')
+router.register(
+    r'changes', ChangeViewSet, base_name='change', group='change_control')
+router.register(
+    r'bulk', BulkViewSet, base_name='bulk', group='change_control')
 
 router.register(
     r'historical_browsers', HistoricalBrowserViewSet, group='history')
@@ -134,3 +139,5 @@ router.register(
 router.register(
     r'view_features', ViewFeaturesViewSet, base_name='viewfeatures',
     group='views')
+router.register(
+    r'export', ExportViewSet, base_name='export', group='views')
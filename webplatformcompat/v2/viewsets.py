@@ -4,17 +4,40 @@
 from collections import OrderedDict, namedtuple
 import re
 
-from django.core.exceptions import FieldError
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.urlresolvers import reverse
-from rest_framework.exceptions import APIException
+from django.db import transaction
+from django.db.models import F, Max
+from django.db.models.query import QuerySet
+from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.encoding import force_text
+from django.utils.functional import cached_property
+from django.utils.text import compress_sequence
+from drf_cached_instances.models import CachedQueryset
+from rest_framework.decorators import detail_route, list_route
+from rest_framework.exceptions import APIException, ParseError
 from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import DjangoModelPermissions, IsAuthenticated
 from rest_framework.status import HTTP_400_BAD_REQUEST
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.viewsets import ViewSet
 
-from ..exceptions import InvalidQueryParam, NotImplementedQueryParam
+from ..exceptions import HistoryArchived, InvalidQueryParam
+from ..fields import TranslatedValue
+from ..history import Changeset, start_bulk_changeset
 from ..renderers import BrowsableAPIRenderer
+from ..pagination import Pagination
+from ..response_cache import get_accepted_encodings
+from ..search import feature_index
+from ..snapshot import (
+    ChangeFeed, ChangesetDiff, Snapshot, get_history_floor)
+from ..tasks import update_cache_for_instance
 from ..viewsets import (
-    BrowserBaseViewSet, ChangesetBaseViewSet, FeatureBaseViewSet,
+    AsOfMixin, BrowserBaseViewSet, ChangesetBaseViewSet, FeatureBaseViewSet,
+    GroupRouterMixin,
     HistoricalBrowserBaseViewSet, HistoricalFeatureBaseViewSet,
     HistoricalMaturityBaseViewSet, HistoricalReferenceBaseViewSet,
     HistoricalSectionBaseViewSet, HistoricalSpecificationBaseViewSet,
@@ -22,8 +45,10 @@ from ..viewsets import (
     MaturityBaseViewSet, ReferenceBaseViewSet, SectionBaseViewSet,
     SpecificationBaseViewSet, SupportBaseViewSet, UserBaseViewSet,
     VersionBaseViewSet, ViewFeaturesBaseViewSet)
-from .parsers import JsonApiV10Parser
-from .renderers import JsonApiV10Renderer, JsonApiV10TemplateHTMLRenderer
+from .parsers import JsonApiV10DocumentParser, JsonApiV10Parser
+from .renderers import (
+    JsonApiV10NdjsonRenderer, JsonApiV10Renderer,
+    JsonApiV10TemplateHTMLRenderer)
 
 
 #
@@ -43,6 +68,15 @@ class RelatedActionMixin(object):
     detail_url_pattern - The URL pattern name for the detail view
     related_routes - A sequence of tuples of related routes
         (RelatedListRoute and RelatedItemRoute instances)
+
+    Implementing viewsets can also set:
+    filter_fields - The indexed fields that can be used in filter[name]
+        parameters, such as 'slug' or 'name.en', for one locale of a
+        TranslatedField.
+    filter_lookups - A dictionary of filter names to model lookups, if the
+        filter name is not the model field name
+    sort_fields - The indexed fields that can be used in the sort
+        parameter, in addition to id.
     """
 
     # View parameters set in router with initkwargs
@@ -50,10 +84,15 @@ class RelatedActionMixin(object):
     related_filter_name = None
     related_id_name = None
     as_relationship = None
+    filter_fields = ()
+    filter_lookups = {}
+    max_filter_values = 1000
+    sort_fields = ()
 
     # View parameter set by related_list
     related_filter = None
     filter_re = re.compile('^filter\[(?P<name>[^]]*)\]$')
+    fields_re = re.compile('^fields\[(?P<resource_type>[^]]*)\]$')
     reserved_param_re = re.compile('^[a-z]*$')
 
     # Other parameters
@@ -71,6 +110,7 @@ class RelatedActionMixin(object):
         renderer_context = super(
             RelatedActionMixin, self).get_renderer_context()
         renderer_context = self.add_related_context(renderer_context)
+        renderer_context['included'] = getattr(self, 'included', None)
         return renderer_context
 
     def get_parser_context(self, http_request):
@@ -80,14 +120,87 @@ class RelatedActionMixin(object):
         return parser_context
 
     def filter_queryset(self, queryset):
-        """Apply filters from the query string and the view."""
-        filter_params = self.get_filter_params()
-        for name, value in filter_params.items():
-            try:
-                queryset = queryset.filter(**filter_params)
-            except FieldError:
-                raise UnknownFilterError(name)
-        return queryset
+        """Apply filters from the query string and the view.
+
+        Each filter is applied once.  Filters on one locale of a
+        TranslatedField, such as filter[name.en], are applied to an
+        annotation that matches the expression index.
+        """
+        filters = self.get_filter_params()
+        related_filter = self.related_filter or {}
+        if filters or related_filter:
+            cache = None
+            if isinstance(queryset, CachedQueryset):
+                cache, queryset = queryset.cache, queryset.queryset
+            for key, lookup, value in filters:
+                if '.' in lookup:
+                    field_name, locale = lookup.split('.', 1)
+                    alias = 'filter_%s_%s' % (
+                        field_name, locale.replace('-', '_').lower())
+                    queryset = queryset.annotate(
+                        **{alias: TranslatedValue(field_name, locale)})
+                    lookup = alias
+                if isinstance(value, list):
+                    lookup += '__in'
+                try:
+                    queryset = queryset.filter(**{lookup: value})
+                except (ValueError, TypeError, ValidationError):
+                    raise InvalidQueryParam(key)
+            if related_filter:
+                queryset = queryset.filter(**related_filter)
+            if cache:
+                queryset = CachedQueryset(cache, queryset)
+        return self.sort_queryset(queryset)
+
+    def sort_queryset(self, queryset):
+        """Apply the requested sort order to a list."""
+        ordering = self.sort_ordering
+        if not ordering:
+            return queryset
+        if isinstance(queryset, CachedQueryset):
+            return CachedQueryset(
+                queryset.cache, queryset.queryset.order_by(*ordering))
+        return queryset.order_by(*ordering)
+
+    @cached_property
+    def sort_ordering(self):
+        """Parse the sort query parameter into a list of orderings.
+
+        For example, sort=-name.en,slug becomes the ordering
+        (-TranslatedValue('name', 'en'), slug, id).  The ID is added as the
+        last ordering, so that pages are stable.  Only the ID and the
+        indexed fields in sort_fields can be used.
+        """
+        value = self.request.query_params.get('sort', '')
+        if not value or self.action != 'list':
+            return []
+        if isinstance(self, AsOfMixin) and self.as_of_requested:
+            raise InvalidQueryParam('sort')
+        if 'page[cursor]' in self.request.query_params:
+            # Cursor pagination is ordered by ID
+            raise InvalidQueryParam('sort')
+        ordering = []
+        names = []
+        for param in value.split(','):
+            descending = param.startswith('-')
+            name = param[1:] if descending else param
+            if name in names:
+                raise InvalidQueryParam('sort')
+            if name == 'id':
+                expression = F('pk')
+            elif name in self.sort_fields and '.' in name:
+                field_name, locale = name.split('.', 1)
+                expression = TranslatedValue(field_name, locale)
+            elif name in self.sort_fields:
+                expression = F(name)
+            else:
+                raise InvalidQueryParam('sort')
+            names.append(name)
+            ordering.append(
+                expression.desc() if descending else expression.asc())
+        if 'id' not in names:
+            ordering.append(F('pk').asc())
+        return ordering
 
     def finalize_response(self, request, response, *args, **kwargs):
         """Restore the renderer_context for related item/list views.
@@ -106,61 +219,327 @@ class RelatedActionMixin(object):
         return response
 
     def get_filter_params(self):
-        """Gather filters from the request and view."""
-        filters = {}
-        request = self.request
-        fields_extra = self.serializer_class.get_fields_extra()
+        """Gather filters from the request.
 
-        # Search the request's query parameters for filters
-        for key, value in request.query_params.items():
+        Only the filters in filter_fields can be used, and filter[name__in]
+        filters on a comma-separated list of values.  Return is a list of
+        (query parameter, model lookup, value) tuples, where the value is a
+        list for __in filters.
+        """
+        filters = []
+        fields_extra = self.get_fields_extra()
+        for key, value in sorted(self.request.query_params.items()):
             is_filter = self.filter_re.match(key)
-            if is_filter:
-                name = is_filter.group('name')
-                field_extra = fields_extra.get(name, {})
-                if value == '' and field_extra.get('link'):
-                    # Treat blank link values as None
-                    value = None
-                filters[name] = value
-            else:
+            if not is_filter:
                 self.verify_parameter(key)
-
-        # Apply the implicit filter for related views
-        filters.update(getattr(self, 'related_filter') or {})
-
+                continue
+            name = is_filter.group('name')
+            is_in = name.endswith('__in')
+            if is_in:
+                name = name[:-len('__in')]
+            if name not in self.filter_fields:
+                raise UnknownFilterError(is_filter.group('name'))
+            lookup = self.filter_lookups.get(name, name)
+            if is_in:
+                value = value.split(',')
+                if '' in value or len(value) > self.max_filter_values:
+                    raise InvalidQueryParam(key)
+            elif value == '' and fields_extra.get(name, {}).get('link'):
+                # Treat blank link values as None
+                value = None
+            filters.append((key, lookup, value))
         return filters
 
     def verify_parameter(self, key):
         """Raise an error for invalid query parameters."""
-        if key in ('page', 'page_size'):
+        if key in ('page', 'page_size', 'page[cursor]', 'page[count]'):
             # Pagination is handled in .pagination.Pagination class
             # TOOD: bug 1243128, use page[number] and page[size]
             pass
         elif key == 'include':
-            # TODO: bug 1243190, implement included resources
-            raise NotImplementedQueryParam(key)
-        elif key == 'fields' or key.startswith('fields['):
-            # TODO: bug 1252973, implement sparse fieldsets
-            raise NotImplementedQueryParam(key)
+            # Included resources are loaded in list and retrieve
+            pass
+        elif self.fields_re.match(key):
+            # Sparse fieldsets are applied in get_serializer
+            pass
         elif key == 'sort':
-            # TODO: bug 1243195, implement sorting
-            raise NotImplementedQueryParam(key)
+            # Sorting is applied in filter_queryset
+            pass
+        elif key == 'as_of' and isinstance(self, AsOfMixin):
+            # Point-in-time reads are handled in AsOfMixin
+            pass
+        elif key == 'lang':
+            # Languages are pruned by the serializer's translated fields
+            pass
         elif self.reserved_param_re.match(key):
             raise InvalidQueryParam(key)
 
+    def get_queryset(self):
+        """Load just the columns of a sparse fieldset, if possible.
+
+        Cached querysets load the full instance from the cache, so this only
+        applies to database querysets, such as for historical resources.
+        """
+        queryset = super(RelatedActionMixin, self).get_queryset()
+        if isinstance(queryset, QuerySet):
+            columns = self.get_sparse_columns(queryset.model)
+            if columns:
+                queryset = queryset.only(*columns)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        """Drop the fields omitted by a sparse fieldset.
+
+        Omitted fields are not computed, so dropping the history and
+        children fields avoids loading the related IDs.
+        """
+        serializer = super(RelatedActionMixin, self).get_serializer(
+            *args, **kwargs)
+        kept = self.get_sparse_field_names()
+        if kept is not None:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in list(fields.keys()):
+                if name not in kept:
+                    del fields[name]
+        return serializer
+
+    @cached_property
+    def sparse_fields(self):
+        """Parse the fields[type] query parameters into sparse fieldsets.
+
+        For example, fields[browsers]=slug,versions becomes:
+        {'browsers': set(['id', 'slug', 'versions'])}
+
+        The names are the public names of the resource, and are validated
+        against the serializer of the resource type. The result has the
+        serializer field names, and always includes the ID.
+        """
+        sparse = {}
+        for key, value in self.request.query_params.items():
+            is_fields = self.fields_re.match(key)
+            if not is_fields:
+                continue
+            resource_type = is_fields.group('resource_type')
+            viewset = viewset_by_resource_type.get(resource_type)
+            if viewset is None:
+                raise InvalidQueryParam(key)
+            public_names = self.get_public_names(viewset.serializer_class)
+            requested = set(name for name in value.split(',') if name)
+            if not requested.issubset(public_names.values()):
+                raise InvalidQueryParam(key)
+            sparse[resource_type] = set(
+                name for name, public_name in public_names.items()
+                if public_name in requested or name == 'id')
+        return sparse
+
+    def get_public_names(self, serializer_class):
+        """Return the public names of the serializer fields."""
+        fields_extra = serializer_class.get_fields_extra()
+        public_names = OrderedDict()
+        for name in serializer_class.Meta.fields:
+            field_extra = fields_extra.get(name, {})
+            if field_extra.get('is_archive_of'):
+                public_names[name] = 'archive_data'
+            else:
+                public_names[name] = field_extra.get('name', name)
+        return public_names
+
+    def get_sparse_field_names(self):
+        """Return the serializer fields to keep, or None for all fields."""
+        if self.action not in ('list', 'retrieve'):
+            return None
+        resource_type = self.get_fields_extra()['id']['resource']
+        return self.sparse_fields.get(resource_type)
+
+    def get_sparse_columns(self, model):
+        """Return the model fields needed for a sparse fieldset, or None.
+
+        None is returned if there is no sparse fieldset, or if a kept field
+        is not backed by a known column, such as a method field.
+        """
+        kept = self.get_sparse_field_names()
+        if kept is None:
+            return None
+        serializer_class = self.get_serializer_class()
+        field_sources = getattr(serializer_class.Meta, 'field_sources', {})
+        fields = serializer_class(
+            context=self.get_serializer_context()).fields
+        columns = [model._meta.pk.name]
+        for name in sorted(kept):
+            sources = field_sources.get(name, (fields[name].source,))
+            for source in sources:
+                try:
+                    field = model._meta.get_field(source)
+                except FieldDoesNotExist:
+                    return None
+                if not field.concrete or field.many_to_many:
+                    return None
+                if field.name not in columns:
+                    columns.append(field.name)
+        return columns
+
+    def list(self, request, *args, **kwargs):
+        """List resources, with included resources if requested."""
+        response = super(RelatedActionMixin, self).list(
+            request, *args, **kwargs)
+        if self.include_tree and not self.as_relationship:
+            self.included = self.get_included(response.data['results'])
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a resource, with included resources if requested."""
+        response = super(RelatedActionMixin, self).retrieve(
+            request, *args, **kwargs)
+        if self.include_tree and not self.as_relationship:
+            self.included = self.get_included([response.data])
+        return response
+
+    @cached_property
+    def include_tree(self):
+        """Parse the include query parameter into a tree of relationships.
+
+        For example, include=supports.version.browser,parent becomes:
+        {'supports': {'version': {'browser': {}}}, 'parent': {}}
+
+        Relationship names are validated against the serializers of each
+        resource in the path.
+        """
+        tree = OrderedDict()
+        value = self.request.query_params.get('include', '')
+        if not value:
+            return tree
+        if isinstance(self, AsOfMixin) and self.as_of_requested:
+            raise InvalidQueryParam('include')
+        fields_extra = self.get_fields_extra()
+        for path in value.split(','):
+            node, path_extra = tree, fields_extra
+            for name in path.split('.'):
+                key = self.get_relationship_key(path_extra, name)
+                if key is None:
+                    raise InvalidQueryParam('include')
+                resource_type = path_extra[key].get('resource', key)
+                viewset = viewset_by_resource_type[resource_type]
+                path_extra = viewset.serializer_class.get_fields_extra()
+                node = node.setdefault(name, OrderedDict())
+        return tree
+
+    def get_relationship_key(self, fields_extra, name):
+        """Return the serializer field for a relationship name, or None."""
+        for key, field_extra in fields_extra.items():
+            if (field_extra.get('link') not in (None, 'self') and
+                    field_extra.get('name', key) == name and
+                    field_extra.get('resource', key) in
+                    viewset_by_resource_type):
+                return key
+        return None
+
+    def get_included(self, items):
+        """Load the resources to include with the primary data.
+
+        Each level of the include paths is loaded with one batch per
+        relationship, through the instance cache for cached resources.
+        Return is a list of (fields_extra, data) pairs, with no duplicates
+        and no primary resources.
+        """
+        fields_extra = self.get_fields_extra()
+        primary_type = fields_extra['id']['resource']
+        seen = set((primary_type, item['id']) for item in items)
+        loaded = {}
+        included = []
+        level = [(self.include_tree, fields_extra, items)]
+        while level:
+            next_level = []
+            for tree, fields_extra, items in level:
+                for name, subtree in tree.items():
+                    key = self.get_relationship_key(fields_extra, name)
+                    resource_type = fields_extra[key].get('resource', key)
+                    pks = OrderedDict()
+                    for item in items:
+                        value = item.get(key)
+                        for pk in (value if isinstance(value, list)
+                                   else [value]):
+                            if pk is not None:
+                                pks[pk] = True
+                    related_extra, related = self.load_related(
+                        resource_type, list(pks), loaded)
+                    for data in related:
+                        if (resource_type, data['id']) not in seen:
+                            seen.add((resource_type, data['id']))
+                            included.append((related_extra, data))
+                    if subtree:
+                        next_level.append((subtree, related_extra, related))
+            level = next_level
+        return included
+
+    def load_related(self, resource_type, pks, loaded):
+        """Load and serialize related resources in a batch.
+
+        loaded is a dictionary of (resource type, pk) to serialized data,
+        which is updated with newly loaded resources.
+
+        Return is the fields_extra of the resource, and the serialized data
+        of the resources, in the order of pks.
+        """
+        viewset = viewset_by_resource_type[resource_type]
+        view = viewset(
+            request=self.request, args=(), kwargs={},
+            format_kwarg=self.format_kwarg, action='list')
+        missing = [pk for pk in pks if (resource_type, pk) not in loaded]
+        if missing:
+            queryset = view.get_queryset()
+            if isinstance(queryset, CachedQueryset):
+                found = queryset.queryset.filter(
+                    pk__in=missing).values_list('pk', flat=True)
+                queryset = CachedQueryset(
+                    queryset.cache, queryset.queryset, list(found))
+            else:
+                queryset = queryset.filter(pk__in=missing)
+            serializer = view.get_serializer(queryset, many=True)
+            for data in serializer.data:
+                loaded[(resource_type, data['id'])] = data
+        related = [
+            loaded[(resource_type, pk)] for pk in pks
+            if (resource_type, pk) in loaded]
+        return view.get_fields_extra(), related
+
+    def get_related_view(self, request, method_map, **kwargs):
+        """Initialize the related viewset, without dispatching to it.
+
+        The request has already been authenticated and negotiated by this
+        view, so the related view can use it directly.
+        """
+        action = method_map['get']
+        view = self.related_viewset(
+            request=request, args=(), kwargs=kwargs,
+            format_kwarg=self.format_kwarg, action=action,
+            action_map=method_map)
+        for method, method_action in method_map.items():
+            setattr(view, method, getattr(view, method_action))
+        view.check_permissions(request)
+        return view
+
+    def related_response(self, view, response):
+        """Use the related view's renderer context for the response."""
+        response.related_renderer_context = view.get_renderer_context()
+        return response
+
     def related_item(self, request, pk):
         """Return a related item, or signal that there is no related item."""
-        viewset = self.related_viewset
         id_name = self.related_id_name
-        obj = self.get_object()
-        related_id = getattr(obj, id_name)
+        queryset = self.get_queryset()
+        if isinstance(queryset, CachedQueryset):
+            queryset = queryset.queryset
+        related_ids = queryset.values_list(id_name, flat=True)
+        related_id = get_object_or_404(related_ids, pk=pk)
         if related_id is None:
             data = OrderedDict((('id', None),))
             return Response(data)
 
-        related_view = viewset.as_view({'get': 'retrieve'})
-        response = related_view(request, pk=related_id)
-        response.related_renderer_context = response.renderer_context
-        id_extra = response.renderer_context['fields_extra']['id']
+        view = self.get_related_view(
+            request, {'get': 'retrieve'}, pk=related_id)
+        response = self.related_response(
+            view, view.retrieve(request, pk=related_id))
+        id_extra = response.related_renderer_context['fields_extra']['id']
         resource = id_extra['resource']
         pattern = id_extra.get('singular', resource[:-1]).replace('_', '')
         path = reverse('v2:%s-detail' % pattern, kwargs={'pk': related_id})
@@ -170,13 +549,9 @@ class RelatedActionMixin(object):
 
     def related_list(self, request, pk):
         """Return a list of related items."""
-        viewset = self.related_viewset
-        filter_name = self.related_filter_name
-        related_view = viewset.as_view(
-            {'get': 'list'}, related_filter={filter_name: pk})
-        response = related_view(request)
-        response.related_renderer_context = response.renderer_context
-        return response
+        view = self.get_related_view(request, {'get': 'list'})
+        view.related_filter = {self.related_filter_name: pk}
+        return self.related_response(view, view.list(request))
 
     def relationships(self, request, pk):
         """Return the IDs of related items."""
@@ -218,6 +593,8 @@ class UnknownFilterError(APIException):
 
 class BrowserViewSet(WritableMixin, BrowserBaseViewSet):
     detail_url_pattern = 'browser-detail'
+    filter_fields = ('slug', 'name.en')
+    sort_fields = ('slug', 'name.en')
     related_routes = (
         RelatedListRoute('versions', 'VersionViewSet', 'browser'),
         RelatedItemRoute(
@@ -229,6 +606,8 @@ class BrowserViewSet(WritableMixin, BrowserBaseViewSet):
 
 class FeatureViewSet(WritableMixin, FeatureBaseViewSet):
     detail_url_pattern = 'feature-detail'
+    filter_fields = ('slug', 'parent', 'name.en')
+    sort_fields = ('slug', 'name.en')
     related_routes = (
         RelatedListRoute('references', 'ReferenceViewSet', 'feature'),
         RelatedListRoute('supports', 'SupportViewSet', 'feature'),
@@ -240,9 +619,34 @@ class FeatureViewSet(WritableMixin, FeatureBaseViewSet):
         RelatedListRoute('history', 'HistoricalFeatureViewSet', 'id'),
     )
 
+    @list_route()
+    def search(self, request):
+        """Search features by slug, name, and MDN URI, best matches first."""
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise InvalidQueryParam('q')
+        # Results are every matching feature in rank order, so snapshots,
+        # filters, sorting, and cursor pagination (in ID order) are not
+        # supported
+        unsupported = ('as_of', 'sort', self.paginator.cursor_query_param)
+        for param in request.query_params:
+            if param in unsupported or param.startswith('filter['):
+                raise InvalidQueryParam(param)
+        queryset = CachedQueryset(
+            self.get_queryset_cache(), self.get_queryset(),
+            feature_index.search(query))
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        if self.include_tree:
+            self.included = self.get_included(response.data['results'])
+        return response
+
 
 class MaturityViewSet(WritableMixin, MaturityBaseViewSet):
     detail_url_pattern = 'maturity-detail'
+    filter_fields = ('slug', 'name.en')
+    sort_fields = ('slug', 'name.en')
     related_routes = (
         RelatedListRoute('specifications', 'SpecificationViewSet', 'maturity'),
         RelatedItemRoute(
@@ -254,6 +658,7 @@ class MaturityViewSet(WritableMixin, MaturityBaseViewSet):
 
 class ReferenceViewSet(WritableMixin, ReferenceBaseViewSet):
     detail_url_pattern = 'reference-detail'
+    filter_fields = ('feature', 'section')
     related_routes = (
         RelatedItemRoute('feature', 'FeatureViewSet', 'feature_id'),
         RelatedItemRoute('section', 'SectionViewSet', 'section_id'),
@@ -266,6 +671,8 @@ class ReferenceViewSet(WritableMixin, ReferenceBaseViewSet):
 
 class SectionViewSet(WritableMixin, SectionBaseViewSet):
     detail_url_pattern = 'section-detail'
+    filter_fields = ('specification', 'name.en')
+    sort_fields = ('name.en',)
     related_routes = (
         RelatedItemRoute(
             'specification', 'SpecificationViewSet', 'specification_id'),
@@ -280,6 +687,8 @@ class SectionViewSet(WritableMixin, SectionBaseViewSet):
 
 class SpecificationViewSet(WritableMixin, SpecificationBaseViewSet):
     detail_url_pattern = 'specification-detail'
+    filter_fields = ('slug', 'mdn_key', 'maturity', 'name.en')
+    sort_fields = ('slug', 'name.en')
     related_routes = (
         RelatedItemRoute('maturity', 'MaturityViewSet', 'maturity_id'),
         RelatedListRoute('sections', 'SectionViewSet', 'specification'),
@@ -292,6 +701,7 @@ class SpecificationViewSet(WritableMixin, SpecificationBaseViewSet):
 
 class SupportViewSet(WritableMixin, SupportBaseViewSet):
     detail_url_pattern = 'support-detail'
+    filter_fields = ('feature', 'version')
     related_routes = (
         RelatedItemRoute('version', 'VersionViewSet', 'version_id'),
         RelatedItemRoute('feature', 'FeatureViewSet', 'feature_id'),
@@ -304,6 +714,7 @@ class SupportViewSet(WritableMixin, SupportBaseViewSet):
 
 class VersionViewSet(WritableMixin, VersionBaseViewSet):
     detail_url_pattern = 'version-detail'
+    filter_fields = ('browser', 'version', 'status')
     related_routes = (
         RelatedItemRoute('browser', 'BrowserViewSet', 'browser_id'),
         RelatedListRoute('supports', 'SupportViewSet', 'version'),
@@ -320,6 +731,7 @@ class VersionViewSet(WritableMixin, VersionBaseViewSet):
 
 class ChangesetViewSet(WritableMixin, ChangesetBaseViewSet):
     detail_url_pattern = 'changeset-detail'
+    filter_fields = ('user',)
     related_routes = (
         RelatedItemRoute('user', 'UserViewSet', 'user_id'),
         RelatedListRoute(
@@ -345,9 +757,484 @@ class ChangesetViewSet(WritableMixin, ChangesetBaseViewSet):
             'history_changeset_id'),
     )
 
+    @detail_route()
+    def snapshot(self, request, pk):
+        """Stream the resources as they were at this changeset."""
+        changeset = self.get_unarchived_object()
+        renderer = JsonApiV10Renderer()
+        objects = self.snapshot_objects(Snapshot(changeset.id), renderer)
+        meta = OrderedDict((('as_of', changeset.id),))
+        content = renderer.stream_document(request, objects, meta)
+        return StreamingHttpResponse(
+            content, content_type=renderer.media_type)
+
+    @detail_route()
+    def diff(self, request, pk):
+        """Stream the before and after state of the changed resources."""
+        changeset = self.get_unarchived_object()
+        renderer = JsonApiV10Renderer()
+        objects = self.diff_objects(ChangesetDiff(changeset.id), renderer)
+        meta = OrderedDict((('changeset', changeset.id),))
+        content = renderer.stream_document(request, objects, meta)
+        return StreamingHttpResponse(
+            content, content_type=renderer.media_type)
+
+    def get_unarchived_object(self):
+        """Return the changeset, if its history has not been archived."""
+        changeset = self.get_object()
+        if changeset.id < get_history_floor():
+            raise HistoryArchived()
+        return changeset
+
+    def snapshot_objects(self, snapshot, renderer):
+        """Yield the converted resource objects in a snapshot."""
+        for resource_type, (_, serializer_cls) in snapshot.resources.items():
+            archived_object = serializer_cls.ArchivedObject
+            for data in snapshot.archived_representations(resource_type):
+                yield renderer.convert_archive_object(
+                    resource_type, data, archived_object)
+
+    def diff_objects(self, diff, renderer):
+        """Yield the converted changes in a changeset diff."""
+        for resource_type, (_, serializer_cls) in diff.resources.items():
+            archived_object = serializer_cls.ArchivedObject
+            changes = diff.changes(resource_type)
+            for pk, change, before, after in changes:
+                if before is not None:
+                    before = renderer.convert_archive_object(
+                        resource_type, before, archived_object)
+                if after is not None:
+                    after = renderer.convert_archive_object(
+                        resource_type, after, archived_object)
+                yield OrderedDict((
+                    ('type', resource_type),
+                    ('id', str(pk)),
+                    ('attributes', OrderedDict((
+                        ('change', change),
+                        ('before', before),
+                        ('after', after),
+                    ))),
+                ))
+
+
+class ChangeViewSet(GroupRouterMixin, ViewSet):
+    """Feed of changes to resources, in changeset order.
+
+    ?since=<changeset_id> starts the feed after a changeset, and the "next"
+    link continues from the last change, with ?page[cursor].  The "next"
+    link is included on the last page as well, so that it can be polled for
+    new changes.
+    """
+
+    _ignore_model_permissions = True
+    renderer_classes = (JsonApiV10Renderer,)
+    namespace = 'v2'
+
+    def get_renderer_context(self):
+        context = super(ChangeViewSet, self).get_renderer_context()
+        context['fields_extra'] = {}
+        return context
+
+    def list(self, request):
+        """Stream a page of changes."""
+        params = request.query_params
+        try:
+            since = int(params.get('since', 0))
+        except ValueError:
+            raise InvalidQueryParam('since')
+        pagination = Pagination()
+        cursor_param = pagination.cursor_query_param
+        cursor = None
+        if cursor_param in params:
+            try:
+                cursor = ChangeFeed.parse_cursor(params[cursor_param])
+            except ValueError:
+                raise InvalidQueryParam(cursor_param)
+        feed = ChangeFeed(since, cursor)
+        changes = feed.page(pagination.get_page_size(request))
+
+        next_cursor = changes[-1][:3] if changes else feed.cursor
+        next_url = replace_query_param(
+            request.build_absolute_uri(), cursor_param,
+            ChangeFeed.format_cursor(next_cursor))
+        renderer = JsonApiV10Renderer()
+        objects = (self.change_object(change) for change in changes)
+        content = renderer.stream_document(
+            request, objects, links={'next': next_url})
+        return StreamingHttpResponse(
+            content, content_type=renderer.media_type)
+
+    def change_object(self, change):
+        """Represent a change as a resource identifier with metadata."""
+        return OrderedDict((
+            ('type', change.resource_type),
+            ('id', str(change.id)),
+            ('meta', OrderedDict((
+                ('event', change.event),
+                ('history_id', str(change.history_id)),
+                ('changeset', str(change.changeset_id)),
+            ))),
+        ))
+
+
+class ExportViewSet(GroupRouterMixin, ViewSet):
+    """Stream every resource, as of a changeset, in one response.
+
+    ?as_of=<changeset_id> exports the resources as they were at a changeset,
+    defaulting to the latest changeset, and ?type=<type>,<type> limits the
+    export to some resource types.  The response is a JSON API document, or
+    one resource object per line for the application/x-ndjson media type
+    (or ?format=ndjson).  It is gzip-compressed as it is streamed, if the
+    client accepts gzip.
+    """
+
+    _ignore_model_permissions = True
+    renderer_classes = (JsonApiV10Renderer, JsonApiV10NdjsonRenderer)
+    namespace = 'v2'
+    resources = Snapshot.resources
+
+    def get_renderer_context(self):
+        context = super(ExportViewSet, self).get_renderer_context()
+        context['fields_extra'] = {}
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(ExportViewSet, self).finalize_response(
+            request, response, *args, **kwargs)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    def list(self, request):
+        """Stream the resources at the changeset."""
+        resource_types = self.get_resource_types(request)
+        as_of = self.get_as_of(request)
+        renderer = request.accepted_renderer
+        objects = self.export_objects(
+            Snapshot(as_of), resource_types, renderer)
+        meta = OrderedDict((('as_of', as_of),))
+        content = renderer.stream_document(request, objects, meta)
+        use_gzip = 'gzip' in get_accepted_encodings(request)
+        if use_gzip:
+            content = compress_sequence(content)
+        response = StreamingHttpResponse(
+            content, content_type=renderer.media_type)
+        if use_gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Content-Location'] = replace_query_param(
+            request.build_absolute_uri(), 'as_of', as_of)
+        return response
+
+    def get_resource_types(self, request):
+        """Return the requested resource types, in export order."""
+        value = request.query_params.get('type')
+        if value is None:
+            return list(self.resources.keys())
+        requested = value.split(',')
+        if (len(set(requested)) != len(requested) or
+                not set(requested).issubset(self.resources)):
+            raise InvalidQueryParam('type')
+        return [name for name in self.resources if name in requested]
+
+    def get_as_of(self, request):
+        """Return the requested changeset ID, or the latest final changeset ID.
+
+        An export is final if no more records can be added before it, so
+        it must be of a closed changeset before the oldest open changeset,
+        the same horizon used by the change feed.
+        """
+        final = Changeset.objects.filter(closed=True)
+        horizon = ChangeFeed.get_horizon()
+        if horizon is not None:
+            final = final.filter(id__lt=horizon)
+        value = request.query_params.get('as_of')
+        if value is None:
+            return final.aggregate(latest=Max('id'))['latest'] or 0
+        try:
+            changeset_id = int(value)
+        except ValueError:
+            raise InvalidQueryParam('as_of')
+        if (changeset_id < get_history_floor() or
+                not final.filter(id=changeset_id).exists()):
+            raise InvalidQueryParam('as_of')
+        return changeset_id
+
+    def export_objects(self, snapshot, resource_types, renderer):
+        """Yield the converted resource objects of some resource types."""
+        for resource_type in resource_types:
+            archived_object = self.resources[resource_type][1].ArchivedObject
+            for data in snapshot.archived_representations(resource_type):
+                yield renderer.convert_archive_object(
+                    resource_type, data, archived_object)
+
+
+class BulkViewSet(GroupRouterMixin, ViewSet):
+    """Apply a list of operations in one transaction and changeset.
+
+    The request is in the style of the JSON API atomic operations extension:
+
+    {
+        "atomic:operations": [
+            {"op": "add",
+             "data": {"type": "browsers", "lid": "b1", "attributes": ...}},
+            {"op": "add",
+             "data": {"type": "versions", "attributes": ...,
+                      "relationships": {"browser": {"data":
+                          {"type": "browsers", "lid": "b1"}}}}},
+            {"op": "update",
+             "data": {"type": "features", "id": "5", "attributes": ...}},
+            {"op": "remove", "ref": {"type": "supports", "id": "7"}}
+        ]
+    }
+
+    Added resources can be given a local ID (lid), which later operations
+    can use in relationships and refs.  The results are in the same order
+    as the operations, and map local IDs to the new IDs.  If any operation
+    fails, then no changes are made, and the errors for all the operations
+    are returned.
+    """
+
+    _ignore_model_permissions = True
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (JsonApiV10DocumentParser,)
+    renderer_classes = (JsonApiV10Renderer,)
+    namespace = 'v2'
+    is_document = False
+    max_operations = 1000
+    operations_key = 'atomic:operations'
+    results_key = 'atomic:results'
+    action_by_op = {
+        'add': ('create', 'POST'),
+        'update': ('partial_update', 'PATCH'),
+        'remove': ('destroy', 'DELETE'),
+    }
+    viewset_by_type = {
+        'browsers': BrowserViewSet,
+        'features': FeatureViewSet,
+        'maturities': MaturityViewSet,
+        'references': ReferenceViewSet,
+        'sections': SectionViewSet,
+        'specifications': SpecificationViewSet,
+        'supports': SupportViewSet,
+        'versions': VersionViewSet,
+    }
+
+    def get_renderer_context(self):
+        context = super(BulkViewSet, self).get_renderer_context()
+        context['fields_extra'] = {}
+        context['is_document'] = self.is_document
+        return context
+
+    def create(self, request):
+        """Apply the operations, or none of them if any fail."""
+        operations = self.parse_operations(request.data)
+        self.check_operation_permissions(request, operations)
+        http_request = request._request
+        had_changeset = http_request.changeset is not None
+        start_bulk_changeset(http_request)
+
+        local_ids = {}
+        results = []
+        errors = []
+        with transaction.atomic():
+            for seq, operation in enumerate(operations):
+                prefix = '/%s/%d' % (self.operations_key, seq)
+                result, op_errors = self.apply_operation(
+                    request, operation, local_ids, prefix)
+                results.append(result)
+                errors.extend(op_errors)
+            if errors:
+                transaction.set_rollback(True)
+
+        self.is_document = True
+        if errors:
+            if not had_changeset:
+                # The auto-changeset was rolled back as well
+                http_request.changeset = None
+                update_cache_for_instance.delay('User', request.user.pk)
+            return Response(
+                OrderedDict((('errors', errors),)),
+                status=HTTP_400_BAD_REQUEST)
+        document = OrderedDict((
+            (self.results_key, results),
+            ('meta', OrderedDict((
+                ('changeset', str(http_request.changeset.pk)),
+            ))),
+        ))
+        return Response(document)
+
+    def parse_operations(self, data):
+        """Check the structure of the operations.
+
+        Return is a list of (op, resource type, resource object or ref).
+        """
+        operations = data.get(self.operations_key) if hasattr(
+            data, 'get') else None
+        if not isinstance(operations, list):
+            raise ParseError('"%s" must be a list.' % self.operations_key)
+        if len(operations) > self.max_operations:
+            raise ParseError(
+                'At most %d operations are allowed in a request.' %
+                self.max_operations)
+
+        parsed = []
+        for seq, operation in enumerate(operations):
+            prefix = '%s.%d' % (self.operations_key, seq)
+            op = operation.get('op') if hasattr(operation, 'get') else None
+            if op not in self.action_by_op:
+                raise ParseError(
+                    '%s.op must be "add", "update", or "remove".' % prefix)
+            body_name = 'ref' if op == 'remove' else 'data'
+            body = operation.get(body_name)
+            if not hasattr(body, 'get'):
+                raise ParseError(
+                    '%s.%s must be an object.' % (prefix, body_name))
+            resource_type = body.get('type')
+            if resource_type not in self.viewset_by_type:
+                raise ParseError(
+                    '%s.%s.type "%s" is not a resource type.' %
+                    (prefix, body_name, resource_type))
+            parsed.append((op, resource_type, body))
+        return parsed
+
+    def check_operation_permissions(self, request, operations):
+        """Check that the user has model permissions for all operations."""
+        checker = DjangoModelPermissions()
+        needed = set()
+        for op, resource_type, _ in operations:
+            method = self.action_by_op[op][1]
+            model = self.viewset_by_type[resource_type].queryset.model
+            needed.update(checker.get_required_permissions(method, model))
+        if not request.user.has_perms(needed):
+            self.permission_denied(request)
+
+    def get_resource_view(self, request, resource_type, action, pk=None):
+        """Initialize the resource's viewset, without dispatching to it."""
+        viewset = self.viewset_by_type[resource_type]
+        kwargs = {} if pk is None else {'pk': pk}
+        return viewset(
+            request=request, args=(), kwargs=kwargs, format_kwarg=None,
+            action=action)
+
+    def apply_operation(self, request, operation, local_ids, prefix):
+        """Apply an operation.
+
+        Return is a tuple of the result object and a list of errors.
+        """
+        op, resource_type, body = operation
+        action = self.action_by_op[op][0]
+        body_name = 'ref' if op == 'remove' else 'data'
+        body_prefix = '%s/%s' % (prefix, body_name)
+        errors = self.resolve_local_ids(
+            body, local_ids, body_prefix, is_new=(op == 'add'))
+        if errors:
+            return None, errors
+        result = OrderedDict()
+
+        instance = None
+        if op != 'add':
+            pk = body.get('id')
+            view = self.get_resource_view(request, resource_type, action, pk)
+            instance = view.get_queryset().filter(pk=pk).first()
+            if instance is None:
+                detail = 'Resource %s "%s" not found.' % (resource_type, pk)
+                return None, [self.format_error(detail, body_prefix, 404)]
+        else:
+            view = self.get_resource_view(request, resource_type, action)
+
+        if op == 'remove':
+            view.perform_destroy(instance)
+            return result, []
+
+        fields_extra = view.get_fields_extra()
+        try:
+            _, resource = JsonApiV10Parser().convert_resource_object(
+                body_prefix, body, fields_extra, id_required=(op != 'add'))
+        except ParseError as error:
+            return None, [self.format_error(error.detail, body_prefix)]
+        serializer = view.get_serializer(
+            instance, data=resource, partial=(op != 'add'))
+        if not serializer.is_valid():
+            return None, self.format_serializer_errors(
+                serializer.errors, fields_extra, body_prefix)
+        if op == 'add':
+            view.perform_create(serializer)
+        else:
+            view.perform_update(serializer)
+
+        pk = str(serializer.instance.pk)
+        lid = body.get('lid')
+        if lid is not None:
+            local_ids[(resource_type, lid)] = pk
+        result['data'] = OrderedDict((('type', resource_type), ('id', pk)))
+        if lid is not None:
+            result['data']['lid'] = lid
+        return result, []
+
+    def resolve_local_ids(self, body, local_ids, prefix, is_new):
+        """Replace local IDs with the IDs of resources added earlier.
+
+        Return is a list of errors for unknown local IDs.
+        """
+        identifiers = []
+        if not is_new:
+            identifiers.append((prefix, body))
+        relationships = body.get('relationships') or {}
+        for name, relationship in relationships.items():
+            if not hasattr(relationship, 'get'):
+                continue  # Reported by the parser
+            linkage = relationship.get('data')
+            rel_prefix = '%s/relationships/%s/data' % (prefix, name)
+            if isinstance(linkage, list):
+                identifiers.extend(
+                    ('%s/%d' % (rel_prefix, seq), item)
+                    for seq, item in enumerate(linkage))
+            else:
+                identifiers.append((rel_prefix, linkage))
+
+        errors = []
+        for path, identifier in identifiers:
+            if not hasattr(identifier, 'get') or 'lid' not in identifier:
+                continue
+            lid = identifier['lid']
+            key = (identifier.get('type'), lid)
+            if key in local_ids:
+                identifier['id'] = local_ids[key]
+            else:
+                detail = (
+                    'Local ID "%s" was not added by an earlier operation.' %
+                    lid)
+                errors.append(self.format_error(detail, path))
+        return errors
+
+    def format_error(self, detail, path, status_code=HTTP_400_BAD_REQUEST):
+        return OrderedDict((
+            ('status', str(status_code)),
+            ('detail', detail),
+            ('path', path),
+        ))
+
+    def format_serializer_errors(self, serializer_errors, fields_extra, path):
+        """Convert serializer errors to JSON API error objects."""
+        errors = []
+        for name, value in serializer_errors.items():
+            field_extra = fields_extra.get(name, {})
+            is_link = bool(field_extra.get('link'))
+            group = 'relationships' if is_link else 'attributes'
+            if name == 'non_field_errors':
+                field_path = path
+            else:
+                field_path = '%s/%s/%s' % (
+                    path, group, field_extra.get('name', name))
+            details = value if isinstance(value, list) else [value]
+            errors.extend(
+                self.format_error(force_text(detail), field_path)
+                for detail in details)
+        return errors
+
 
 class UserViewSet(ReadOnlyMixin, UserBaseViewSet):
     detail_url_pattern = 'user-detail'
+    filter_fields = ('username',)
     related_routes = (
         RelatedListRoute('changesets', 'ChangesetViewSet', 'user_id'),
     )
@@ -360,11 +1247,14 @@ class UserViewSet(ReadOnlyMixin, UserBaseViewSet):
 
 changeset_route = RelatedItemRoute(
     'changeset', 'ChangesetViewSet', 'history_changeset_id')
+historical_filter_lookups = {'changeset': 'history_changeset'}
 
 
 class HistoricalBrowserViewSet(
         ReadOnlyMixin, HistoricalBrowserBaseViewSet):
     detail_url_pattern = 'historicalbrowser-detail'
+    filter_fields = ('changeset', 'browser')
+    filter_lookups = dict(historical_filter_lookups, browser='id')
     related_routes = (
         changeset_route,
         RelatedItemRoute('browser', 'BrowserViewSet', 'id'),
@@ -374,6 +1264,8 @@ class HistoricalBrowserViewSet(
 class HistoricalFeatureViewSet(
         ReadOnlyMixin, HistoricalFeatureBaseViewSet):
     detail_url_pattern = 'historicalfeature-detail'
+    filter_fields = ('changeset', 'feature')
+    filter_lookups = dict(historical_filter_lookups, feature='id')
     related_routes = (
         changeset_route,
         RelatedItemRoute('feature', 'FeatureViewSet', 'id'),
@@ -383,6 +1275,8 @@ class HistoricalFeatureViewSet(
 class HistoricalMaturityViewSet(
         ReadOnlyMixin, HistoricalMaturityBaseViewSet):
     detail_url_pattern = 'historicalmaturity-detail'
+    filter_fields = ('changeset', 'maturity')
+    filter_lookups = dict(historical_filter_lookups, maturity='id')
     related_routes = (
         changeset_route,
         RelatedItemRoute('maturity', 'MaturityViewSet', 'id'),
@@ -392,6 +1286,8 @@ class HistoricalMaturityViewSet(
 class HistoricalReferenceViewSet(
         ReadOnlyMixin, HistoricalReferenceBaseViewSet):
     detail_url_pattern = 'historicalreference-detail'
+    filter_fields = ('changeset', 'reference')
+    filter_lookups = dict(historical_filter_lookups, reference='id')
     related_routes = (
         changeset_route,
         RelatedItemRoute('reference', 'ReferenceViewSet', 'id'),
@@ -401,6 +1297,8 @@ class HistoricalReferenceViewSet(
 class HistoricalSectionViewSet(
         ReadOnlyMixin, HistoricalSectionBaseViewSet):
     detail_url_pattern = 'historicalsection-detail'
+    filter_fields = ('changeset', 'section')
+    filter_lookups = dict(historical_filter_lookups, section='id')
     related_routes = (
         changeset_route,
         RelatedItemRoute('section', 'SectionViewSet', 'id'),
@@ -410,6 +1308,8 @@ class HistoricalSectionViewSet(
 class HistoricalSpecificationViewSet(
         ReadOnlyMixin, HistoricalSpecificationBaseViewSet):
     detail_url_pattern = 'historicalspecification-detail'
+    filter_fields = ('changeset', 'specification')
+    filter_lookups = dict(historical_filter_lookups, specification='id')
     related_routes = (
         changeset_route,
         RelatedItemRoute('specification', 'SpecificationViewSet', 'id'),
@@ -419,6 +1319,8 @@ class HistoricalSpecificationViewSet(
 class HistoricalSupportViewSet(
         ReadOnlyMixin, HistoricalSupportBaseViewSet):
     detail_url_pattern = 'historicalsupport-detail'
+    filter_fields = ('changeset', 'support')
+    filter_lookups = dict(historical_filter_lookups, support='id')
     related_routes = (
         changeset_route,
         RelatedItemRoute('support', 'SupportViewSet', 'id'),
@@ -428,6 +1330,8 @@ class HistoricalSupportViewSet(
 class HistoricalVersionViewSet(
         ReadOnlyMixin, HistoricalVersionBaseViewSet):
     detail_url_pattern = 'historicalversion-detail'
+    filter_fields = ('changeset', 'version')
+    filter_lookups = dict(historical_filter_lookups, version='id')
     related_routes = (
         changeset_route,
         RelatedItemRoute('version', 'VersionViewSet', 'id'),
@@ -445,3 +1349,19 @@ class ViewFeaturesViewSet(ViewFeaturesBaseViewSet):
         JsonApiV10TemplateHTMLRenderer)
     template_name = 'webplatformcompat/feature-basic-v2.html'
     namespace = 'v2'
+
+
+#
+# Viewsets by resource type, for included resources
+#
+
+viewset_by_resource_type = dict(
+    (viewset.serializer_class.get_fields_extra()['id']['resource'], viewset)
+    for viewset in (
+        BrowserViewSet, FeatureViewSet, MaturityViewSet, ReferenceViewSet,
+        SectionViewSet, SpecificationViewSet, SupportViewSet, VersionViewSet,
+        ChangesetViewSet, UserViewSet,
+        HistoricalBrowserViewSet, HistoricalFeatureViewSet,
+        HistoricalMaturityViewSet, HistoricalReferenceViewSet,
+        HistoricalSectionViewSet, HistoricalSpecificationViewSet,
+        HistoricalSupportViewSet, HistoricalVersionViewSet))
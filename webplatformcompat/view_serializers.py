@@ -20,9 +20,10 @@ from .models import (
     Browser, Feature, Maturity, Reference, Section, Specification, Support,
     Version)
 from .serializers import (
-    BrowserSerializer, FieldMapMixin, FeatureSerializer, MaturitySerializer,
-    ReferenceSerializer, SectionSerializer, SpecificationSerializer,
-    SupportSerializer, VersionSerializer, FieldsExtraMixin)
+    BrowserSerializer, CachedFieldsMixin, FieldMapMixin, FeatureSerializer,
+    MaturitySerializer, ReferenceSerializer, SectionSerializer,
+    SpecificationSerializer, SupportSerializer, VersionSerializer,
+    FieldsExtraMixin)
 
 
 #
@@ -84,7 +85,7 @@ view_cls_by_name = {
 
 
 class ViewFeatureListSerializer(
-        FieldMapMixin, FieldsExtraMixin, ModelSerializer):
+        FieldMapMixin, FieldsExtraMixin, CachedFieldsMixin, ModelSerializer):
     """Get list of features."""
 
     href = SerializerMethodField()
@@ -111,6 +112,7 @@ class DjangoResourceClient(object):
     """Implement tools.client.Client using Django native functions."""
 
     namespace = 'v1'
+    use_bulk = False  # Changes are already in the request's changeset
 
     def url(self, resource_type, resource_id=None):
         """Use Django reverse to determine URL."""
@@ -422,7 +424,7 @@ class FeatureExtra(object):
                 pass  # cached_property was not accessed during serialization
 
 
-class ViewFeatureExtraSerializer(ModelSerializer):
+class ViewFeatureExtraSerializer(CachedFieldsMixin, ModelSerializer):
     """Linked resources and metadata for ViewFeatureSerializer."""
 
     browsers = ViewBrowserSerializer(source='all_browsers', many=True)
@@ -557,12 +559,22 @@ class ViewFeatureExtraSerializer(ModelSerializer):
         return ReturnDict(ret, serializer=self)
 
     def find_languages(self, obj):
-        """Find languages used in feature view."""
+        """Find languages used in feature view.
+
+        If languages were requested, then only those languages are listed.
+        """
         languages = set()
+        requested = self.context.get('languages')
 
         def add_langs(item):
             if hasattr(item, 'keys'):  # pragma: nocover
-                languages.update(item.keys())
+                found = item.keys()
+                if requested is not None:
+                    # Values without a requested language are not pruned
+                    found = [
+                        lang for lang in found
+                        if lang.lower() in requested] or found
+                languages.update(found)
 
         for browser in obj.all_browsers:
             add_langs(browser.name)
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 """API endpoints for CRUD operations."""
 
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.urlresolvers import reverse
 from django.shortcuts import redirect
+from django.utils.cache import patch_vary_headers
 from django.utils.functional import cached_property
 from django.http import Http404
 from rest_framework.decorators import list_route
@@ -15,11 +17,14 @@ from rest_framework.viewsets import ReadOnlyModelViewSet as BaseROModelViewSet
 from drf_cached_instances.mixins import CachedViewMixin as BaseCacheViewMixin
 
 from .cache import Cache
+from .exceptions import InvalidQueryParam
 from .history import Changeset
 from .mixins import PartialPutMixin
 from .models import (
     Browser, Feature, Maturity, Reference, Section, Specification, Support,
     Version)
+from .response_cache import ResponseCache
+from .slugs import get_pk_by_slug
 from .serializers import (
     BrowserSerializer, FeatureSerializer, MaturitySerializer,
     ReferenceSerializer, SectionSerializer, SpecificationSerializer,
@@ -29,6 +34,8 @@ from .serializers import (
     HistoricalMaturitySerializer, HistoricalReferenceSerializer,
     HistoricalSectionSerializer, HistoricalSpecificationSerializer,
     HistoricalSupportSerializer, HistoricalVersionSerializer)
+from .snapshot import Snapshot, get_history_floor
+from .utils import get_requested_languages
 from .view_serializers import (
     ViewFeatureListSerializer, ViewFeatureSerializer,
     ViewFeatureRowChildrenSerializer)
@@ -78,6 +85,108 @@ class FieldsExtraMixin(object):
         return serializer_cls.get_fields_extra()
 
 
+class AsOfMixin(object):
+    """List resources as they were at a changeset.
+
+    With ?as_of=<changeset_id>, the list action returns the historical records
+    that were current as of that changeset, using the historical serializer.
+    Changesets before the floor of compact_history are rejected.
+    """
+
+    historical_serializer_class = None
+
+    @property
+    def as_of_requested(self):
+        return self.action == 'list' and 'as_of' in self.request.query_params
+
+    @cached_property
+    def as_of(self):
+        """Return the requested changeset ID, or None for current data."""
+        if not self.as_of_requested:
+            return None
+        value = self.request.query_params['as_of']
+        try:
+            changeset_id = int(value)
+        except ValueError:
+            raise InvalidQueryParam('as_of')
+        if changeset_id < max(1, get_history_floor()):
+            raise InvalidQueryParam('as_of')
+        return changeset_id
+
+    def get_queryset(self):
+        """Return the historical records as of the changeset, if requested."""
+        if self.as_of is None:
+            return super(AsOfMixin, self).get_queryset()
+        model = self.queryset.model
+        model = getattr(model, 'instance_type', model)
+        return Snapshot(self.as_of).get_queryset(model)
+
+    def get_serializer_class(self):
+        """Use the historical serializer for resource snapshots."""
+        if self.as_of_requested and self.historical_serializer_class:
+            return self.historical_serializer_class
+        return super(AsOfMixin, self).get_serializer_class()
+
+
+class LanguagesMixin(object):
+    """Limit translated fields to the languages requested with ?lang.
+
+    This includes the archived representations of historical resources.
+    """
+
+    @cached_property
+    def languages(self):
+        """Return the lowercase requested languages, or None for all."""
+        return get_requested_languages(self.request)
+
+    def get_serializer_context(self):
+        context = super(LanguagesMixin, self).get_serializer_context()
+        context['languages'] = self.languages
+        return context
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super(LanguagesMixin, self).finalize_response(
+            request, response, *args, **kwargs)
+        if request.query_params.get('lang') == '':
+            patch_vary_headers(response, ('Accept-Language',))
+        return response
+
+
+class ResponseCacheMixin(object):
+    """Serve GET requests for some actions from the response cache.
+
+    Rendered responses for the actions in cached_response_actions are stored
+    with precompressed bodies, and served in the encoding requested by the
+    Accept-Encoding header.  The cache is enabled by USE_RESPONSE_CACHE.
+    """
+
+    cached_response_actions = ()
+
+    def dispatch(self, request, *args, **kwargs):
+        response_cache = self.get_response_cache(request)
+        if response_cache is None:
+            return super(ResponseCacheMixin, self).dispatch(
+                request, *args, **kwargs)
+        key = response_cache.get_key(request)
+        response = response_cache.get(request, key)
+        if response is None:
+            response = super(ResponseCacheMixin, self).dispatch(
+                request, *args, **kwargs)
+            response = response_cache.set(request, response, key)
+        return response
+
+    def get_response_cache(self, request):
+        """Return the response cache, or None if the request is uncached."""
+        if not getattr(settings, 'USE_RESPONSE_CACHE', False):
+            return None
+        if request.method != 'GET':
+            return None
+        action = getattr(self, 'action_map', {}).get('get')
+        if action not in self.cached_response_actions:
+            return None
+        return ResponseCache()
+
+
 class GroupRouterMixin(object):
     """Extra parameters used by the GroupedRouter."""
 
@@ -86,19 +195,58 @@ class GroupRouterMixin(object):
     alt_lookup_value_regex = None
 
 
+class SlugLookupMixin(object):
+    """Look up resources by slug, as well as by ID.
+
+    The router adds a <basename>-by-slug endpoint, which redirects to the
+    detail endpoint.  With SERVE_SLUG_URLS, the resource is returned
+    instead, with the detail URL in the Content-Location header.
+
+    Implementing viewsets should set slug_detail_name, the URL pattern name
+    for the detail view.
+    """
+
+    alt_lookup_field = 'slug'
+    alt_lookup_value_regex = r'[-a-zA-Z0-9_]+'
+    slug_detail_name = None
+
+    def alternate_lookup(self, request, slug, **extra_kwargs):
+        """Lookup a resource by slug."""
+        model = self.queryset.model
+        pk = get_pk_by_slug(model, slug)
+        if pk is None:
+            raise Http404(
+                'No %s has the requested slug.' % model._meta.verbose_name)
+        kwargs = {'pk': pk}
+        kwargs.update(extra_kwargs)
+        namespace = getattr(self, 'namespace', None) or request.version
+        url = reverse(
+            '%s:%s' % (namespace, self.slug_detail_name), kwargs=kwargs)
+        if not settings.SERVE_SLUG_URLS:
+            return redirect(url)
+        self.action = 'retrieve'
+        self.kwargs = kwargs
+        response = self.retrieve(request, **kwargs)
+        response['Content-Location'] = request.build_absolute_uri(url)
+        return response
+
+
 class ModelViewSet(
-        PartialPutMixin, CachedViewMixin, FieldsExtraMixin, GroupRouterMixin,
+        ResponseCacheMixin, PartialPutMixin, CachedViewMixin,
+        FieldsExtraMixin, LanguagesMixin, GroupRouterMixin,
         BaseModelViewSet):
     """Base class for ViewSets supporting CRUD operations on models."""
 
 
 class ReadOnlyModelViewSet(
-        FieldsExtraMixin, GroupRouterMixin, BaseROModelViewSet):
+        FieldsExtraMixin, LanguagesMixin, GroupRouterMixin,
+        BaseROModelViewSet):
     """Base class for ViewSets supporting read operations on models."""
 
 
 class ReadUpdateModelViewSet(
-        PartialPutMixin, CachedViewMixin, FieldsExtraMixin, UpdateModelMixin,
+        ResponseCacheMixin, PartialPutMixin, CachedViewMixin,
+        FieldsExtraMixin, LanguagesMixin, UpdateModelMixin,
         GroupRouterMixin, BaseROModelViewSet):
     """Base class for ViewSets supporting read and update operations."""
 
@@ -109,44 +257,63 @@ class ReadUpdateModelViewSet(
 # 'Regular' viewsets
 #
 
-class BrowserBaseViewSet(ModelViewSet):
+class BrowserBaseViewSet(SlugLookupMixin, AsOfMixin, ModelViewSet):
     queryset = Browser.objects.order_by('id')
     serializer_class = BrowserSerializer
+    historical_serializer_class = HistoricalBrowserSerializer
+    cached_response_actions = ('list',)
+    slug_detail_name = 'browser-detail'
 
 
-class FeatureBaseViewSet(ModelViewSet):
+class FeatureBaseViewSet(AsOfMixin, ModelViewSet):
     queryset = Feature.objects.order_by('id')
     serializer_class = FeatureSerializer
+    historical_serializer_class = HistoricalFeatureSerializer
+    cached_response_actions = ('list', 'search')
 
 
-class MaturityBaseViewSet(ModelViewSet):
+class MaturityBaseViewSet(SlugLookupMixin, AsOfMixin, ModelViewSet):
     queryset = Maturity.objects.order_by('id')
     serializer_class = MaturitySerializer
+    historical_serializer_class = HistoricalMaturitySerializer
+    cached_response_actions = ('list',)
+    slug_detail_name = 'maturity-detail'
 
 
-class ReferenceBaseViewSet(ModelViewSet):
+class ReferenceBaseViewSet(AsOfMixin, ModelViewSet):
     queryset = Reference.objects.order_by('id')
     serializer_class = ReferenceSerializer
+    historical_serializer_class = HistoricalReferenceSerializer
+    cached_response_actions = ('list',)
 
 
-class SectionBaseViewSet(ModelViewSet):
+class SectionBaseViewSet(AsOfMixin, ModelViewSet):
     queryset = Section.objects.order_by('id')
     serializer_class = SectionSerializer
+    historical_serializer_class = HistoricalSectionSerializer
+    cached_response_actions = ('list',)
 
 
-class SpecificationBaseViewSet(ModelViewSet):
+class SpecificationBaseViewSet(SlugLookupMixin, AsOfMixin, ModelViewSet):
     queryset = Specification.objects.order_by('id')
     serializer_class = SpecificationSerializer
+    historical_serializer_class = HistoricalSpecificationSerializer
+    cached_response_actions = ('list',)
+    slug_detail_name = 'specification-detail'
 
 
-class SupportBaseViewSet(ModelViewSet):
+class SupportBaseViewSet(AsOfMixin, ModelViewSet):
     queryset = Support.objects.order_by('id')
     serializer_class = SupportSerializer
+    historical_serializer_class = HistoricalSupportSerializer
+    cached_response_actions = ('list',)
 
 
-class VersionBaseViewSet(ModelViewSet):
+class VersionBaseViewSet(AsOfMixin, ModelViewSet):
     queryset = Version.objects.order_by('id')
     serializer_class = VersionSerializer
+    historical_serializer_class = HistoricalVersionSerializer
+    cached_response_actions = ('list',)
 
 
 #
@@ -178,42 +345,42 @@ class UserBaseViewSet(CachedViewMixin, ReadOnlyModelViewSet):
 # Historical object viewsets
 #
 
-class HistoricalBrowserBaseViewSet(ReadOnlyModelViewSet):
+class HistoricalBrowserBaseViewSet(AsOfMixin, ReadOnlyModelViewSet):
     queryset = Browser.history.model.objects.order_by('id')
     serializer_class = HistoricalBrowserSerializer
 
 
-class HistoricalFeatureBaseViewSet(ReadOnlyModelViewSet):
+class HistoricalFeatureBaseViewSet(AsOfMixin, ReadOnlyModelViewSet):
     queryset = Feature.history.model.objects.order_by('id')
     serializer_class = HistoricalFeatureSerializer
 
 
-class HistoricalMaturityBaseViewSet(ReadOnlyModelViewSet):
+class HistoricalMaturityBaseViewSet(AsOfMixin, ReadOnlyModelViewSet):
     queryset = Maturity.history.model.objects.order_by('id')
     serializer_class = HistoricalMaturitySerializer
 
 
-class HistoricalReferenceBaseViewSet(ReadOnlyModelViewSet):
+class HistoricalReferenceBaseViewSet(AsOfMixin, ReadOnlyModelViewSet):
     queryset = Reference.history.model.objects.order_by('id')
     serializer_class = HistoricalReferenceSerializer
 
 
-class HistoricalSectionBaseViewSet(ReadOnlyModelViewSet):
+class HistoricalSectionBaseViewSet(AsOfMixin, ReadOnlyModelViewSet):
     queryset = Section.history.model.objects.order_by('id')
     serializer_class = HistoricalSectionSerializer
 
 
-class HistoricalSpecificationBaseViewSet(ReadOnlyModelViewSet):
+class HistoricalSpecificationBaseViewSet(AsOfMixin, ReadOnlyModelViewSet):
     queryset = Specification.history.model.objects.order_by('id')
     serializer_class = HistoricalSpecificationSerializer
 
 
-class HistoricalSupportBaseViewSet(ReadOnlyModelViewSet):
+class HistoricalSupportBaseViewSet(AsOfMixin, ReadOnlyModelViewSet):
     queryset = Support.history.model.objects.order_by('id')
     serializer_class = HistoricalSupportSerializer
 
 
-class HistoricalVersionBaseViewSet(ReadOnlyModelViewSet):
+class HistoricalVersionBaseViewSet(AsOfMixin, ReadOnlyModelViewSet):
     queryset = Version.history.model.objects.order_by('id')
     serializer_class = HistoricalVersionSerializer
 
@@ -222,11 +389,11 @@ class HistoricalVersionBaseViewSet(ReadOnlyModelViewSet):
 # Views
 #
 
-class ViewFeaturesBaseViewSet(ReadUpdateModelViewSet):
+class ViewFeaturesBaseViewSet(SlugLookupMixin, ReadUpdateModelViewSet):
     queryset = Feature.objects.order_by('id')
     format_suffixes = ('api', 'json', 'html')
-    alt_lookup_field = 'slug'
-    alt_lookup_value_regex = r'[-a-zA-Z0-9_]+'
+    cached_response_actions = ('list', 'retrieve', 'alternate_lookup')
+    slug_detail_name = 'viewfeatures-detail'
 
     def get_serializer_class(self):
         """Return the serializer to use based on action and query."""
@@ -283,14 +450,3 @@ class ViewFeaturesBaseViewSet(ReadUpdateModelViewSet):
         child_pages = self.request.query_params.get('child_pages', '0')
         falsy = ('0', 'false', 'no')
         return bool(child_pages.lower() not in falsy)
-
-    def alternate_lookup(self, request, slug, **extra_kwargs):
-        """Lookup features by slug."""
-        try:
-            pk = Feature.objects.only('pk').get(slug=slug).pk
-        except Feature.DoesNotExist:
-            raise Http404('No feature has the requested slug.')
-        kwargs = {'pk': pk}
-        kwargs.update(extra_kwargs)
-        url = reverse('%s:viewfeatures-detail' % self.namespace, kwargs=kwargs)
-        return redirect(url)
@@ -31,8 +31,12 @@ BROKER_URL - Broker URL string for Celery
 CELERY_ALWAYS_EAGER - 1 to run all tasks synchronosly. Defaults to 1 if
     BROKER_URL is undefined, or 0 if defined
 CELERY_RESULT_BACKEND - Backend URL string for Celery
+CHANGESET_MAX_OPEN_SECONDS - Seconds a changeset can stay open before it is
+    stale, and no longer holds back the change feed, default 86400
 CSRF_COOKIE_HTTPONLY - Prevent in-page JS from accessing CSRF token
 CSRF_COOKIE_SECURE - Only send CSRF cookies on HTTPS connections
+DATABASE_REPLICA_URLS - comma-separated list of database URLs for read
+    replicas, default none
 DATABASE_URL - See https://github.com/kennethreitz/dj-database-url
 DEFAULT_FROM_EMAIL - "From" email for emails to users
 DJANGO_DEBUG - 1 to enable, 0 to disable, default disabled
@@ -51,14 +55,28 @@ EXTRA_INSTALLED_APPS - comma-separated list of apps to add to INSTALLED_APPS
 FXA_OAUTH_ENDPOINT - Override for Firefox Account OAuth2 endpoint
 FXA_PROFILE_ENDPOINT - Override for Firefox Account profile endpoint
 FXA_SCOPE - Override default OAuth2 scope
+JSON_API_FAST_DUMPS - Dotted path of a faster JSON encoding function, such as
+    ujson.dumps, for compact v2 API responses. Default is the DRF encoder.
 MDN_ALLOWED_URL_PREFIXES - comma-separated list of URL prefixes allowed by
     the scraper
 MDN_SHOW_REPARSE - 1 to show Reparse button, defaults to DEBUG
 MEMCACHE_SERVERS - semicolon-separated list of memcache servers
 MEMCACHE_USERNAME - username for memcache servers
 MEMCACHE_PASSWORD - password for memcache servers
+OAUTH2_TOKEN_CACHE_SECONDS - Seconds to cache a validated OAuth2 access
+    token, default 60
 PAGE_SIZE - Items per page, default 10
+PERMISSION_SNAPSHOT_TIMEOUT - Seconds to cache the groups and permissions of
+    a user, default 60
 REDIS_URL - Redis URL string to use Redis for caching
+REPLICA_CACHE_TIMEOUT - Maximum seconds to cache data read from a replica,
+    default 60
+REPLICA_MAX_LAG - Seconds a replica can lag before reads skip it, default 10
+REPLICA_PIN_SECONDS - Seconds a user reads from the primary after a change,
+    default 30
+REQUEST_BUDGETS_STRICT - 1 to raise an error when a request exceeds its
+    budget, rather than logging a warning, default disabled
+RESPONSE_CACHE_TIMEOUT - Seconds to cache rendered API responses, default 3600
 SECRET_KEY - Overrides SECRET_KEY
 SECURE_BROWSER_XSS_FILTER - Enable browser-based XSS protection
 SECURE_CONTENT_TYPE_NOSNIFF - Add nosniff header to disallow browser guessing
@@ -67,11 +85,19 @@ SECURE_HSTS_SECONDS - Number of seconds for Strict Transport Security header,
     0 to disable (default)
 SECURE_PROXY_SSL_HEADER - 'HTTP_X_FORWARDED_PROTOCOL,https' to enable
 SECURE_SSL_REDIRECT - 301 Redirect http:// to https://
+SERVE_SLUG_URLS - 1 to return resources from slug URLs, 0 to redirect to the
+    ID URL, default disabled
 SERVER_EMAIL - Email "From" address for error messages to admins
 SESSION_COOKIE_SECURE - Only send session cookies on HTTPS connections
+SLUG_CACHE_TIMEOUT - Seconds to cache the ID of a resource by slug, default
+    3600
 STATIC_ROOT - Overrides STATIC_ROOT
 USE_DRF_INSTANCE_CACHE - 1 to enable, 0 to disable, default enabled
 USE_CACHE - 1 to enable, 0 to disable, default enabled
+USE_REQUEST_STATS - 1 to count the queries, cache calls, and tasks of each
+    request, 0 to disable, default disabled (enabled in tests)
+USE_RESPONSE_CACHE - 1 to cache precompressed list and view_feature
+    responses, 0 to disable, default enabled
 X_FRAME_OPTIONS - Set X-Frame-Options value
 """
 from os import path
@@ -131,9 +157,11 @@ X_FRAME_OPTIONS = config('X_FRAME_OPTIONS', default='SAMEORIGIN')
 
 AUTHENTICATION_BACKENDS = (
     'oauth2_provider.backends.OAuth2Backend',
-    'django.contrib.auth.backends.ModelBackend',
+    'webplatformcompat.backends.CachedModelBackend',
     'allauth.account.auth_backends.AuthenticationBackend',
 )
+PERMISSION_SNAPSHOT_TIMEOUT = config(
+    'PERMISSION_SNAPSHOT_TIMEOUT', default=60, cast=int)
 
 # Application definition
 INSTALLED_APPS = [
@@ -167,6 +195,7 @@ INSTALLED_APPS.extend(
     config('EXTRA_INSTALLED_APPS', default='', cast=cast_list))
 
 MIDDLEWARE_CLASSES = (
+    'webplatformcompat.budgets.RequestStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'oauth2_provider.middleware.OAuth2TokenMiddleware',
@@ -178,6 +207,7 @@ MIDDLEWARE_CLASSES = (
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'webplatformcompat.history.HistoryChangesetMiddleware',
+    'webplatformcompat.replicas.ReplicaMiddleware',
 )
 
 ROOT_URLCONF = 'wpcsite.urls'
@@ -218,6 +248,20 @@ DATABASES = {
         cast=db_url)
 }
 
+# Read replicas, used for safe requests
+REPLICA_DATABASES = []
+_replica_urls = config('DATABASE_REPLICA_URLS', default='', cast=cast_list)
+for _num, _replica_url in enumerate(_replica_urls, 1):
+    _alias = 'replica%d' % _num
+    DATABASES[_alias] = db_url(_replica_url)
+    DATABASES[_alias]['TEST'] = {'MIRROR': 'default'}
+    REPLICA_DATABASES.append(_alias)
+DATABASE_ROUTERS = ['webplatformcompat.replicas.ReplicaRouter']
+REPLICA_MAX_LAG = config('REPLICA_MAX_LAG', default=10, cast=int)
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=30, cast=int)
+REPLICA_CACHE_TIMEOUT = config(
+    'REPLICA_CACHE_TIMEOUT', default=60, cast=int)
+
 # Internationalization
 # https://docs.djangoproject.com/en/1.6/topics/i18n/
 
@@ -404,6 +448,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.DjangoModelPermissionsOrAnonReadOnly',
     ],
     'VIEW_NAME_FUNCTION': 'webplatformcompat.utils.get_view_name',
+    'DEFAULT_METADATA_CLASS': 'webplatformcompat.metadata.CachedMetadata',
     'DEFAULT_PAGINATION_CLASS': 'webplatformcompat.pagination.Pagination',
     'PAGE_SIZE': config('PAGE_SIZE', default=10, cast=int),
     'DEFAULT_VERSIONING_CLASS': (
@@ -411,6 +456,9 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'webplatformcompat.exceptions.handler',
 }
 
+# Faster JSON encoder for the v2 API, such as ujson.dumps
+JSON_API_FAST_DUMPS = config('JSON_API_FAST_DUMPS', default='')
+
 # Django nose
 TEST_RUNNER = 'django_nose.NoseTestSuiteRunner'
 
@@ -452,6 +500,41 @@ USE_DRF_INSTANCE_CACHE = config(
 DRF_INSTANCE_CACHE_POPULATE_COLD = config(
     'DRF_INSTANCE_CACHE_POPULATE_COLD', default=True, cast=bool)
 
+# Response cache - store rendered, precompressed list and view_feature bodies
+USE_RESPONSE_CACHE = config(
+    'USE_RESPONSE_CACHE', default=True, cast=bool) and not TESTING
+RESPONSE_CACHE_TIMEOUT = config(
+    'RESPONSE_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Slug URLs - return the resource rather than redirecting to the ID URL, and
+# cache the ID for each slug
+SERVE_SLUG_URLS = config('SERVE_SLUG_URLS', default=False, cast=bool)
+SLUG_CACHE_TIMEOUT = config('SLUG_CACHE_TIMEOUT', default=3600, cast=int)
+
+# Changesets - open changesets older than this are stale, and are skipped by
+# the change feed
+CHANGESET_MAX_OPEN_SECONDS = config(
+    'CHANGESET_MAX_OPEN_SECONDS', default=86400, cast=int)
+
+# Request stats - count queries, cache calls, and tasks per request, and
+# check the counts against the budgets for endpoints
+USE_REQUEST_STATS = config('USE_REQUEST_STATS', default=TESTING, cast=bool)
+REQUEST_BUDGETS_STRICT = config(
+    'REQUEST_BUDGETS_STRICT', default=False, cast=bool)
+REQUEST_BUDGETS = {
+    'feature_page_detail': {'queries': 15},
+    'feature_page_list': {'queries': 15},
+    'v2:feature-search.search': {'queries': 5, 'tasks': 0},
+}
+for _version in ('v1', 'v2'):
+    REQUEST_BUDGETS['%s:viewfeatures-detail.retrieve' % _version] = {
+        'queries': 5, 'cache_gets': 10, 'tasks': 0}
+    for _resource in (
+            'browser', 'feature', 'maturity', 'reference', 'section',
+            'specification', 'support', 'version'):
+        REQUEST_BUDGETS['%s:historical%s-list.list' % (
+            _version, _resource)] = {'queries': 6, 'tasks': 0}
+
 # CORS Middleware
 CORS_ORIGIN_ALLOW_ALL = True
 CORS_ALLOW_CREDENTIALS = True
@@ -471,3 +554,11 @@ SOCIALACCOUNT_PROVIDERS = {
             default='https://profile.accounts.firefox.com/v1'),
     }
 }
+
+# django-oauth-toolkit - cache validated access tokens
+OAUTH2_PROVIDER = {
+    'OAUTH2_VALIDATOR_CLASS': (
+        'bcauth.oauth2p.validators.CachedOAuth2Validator'),
+}
+OAUTH2_TOKEN_CACHE_SECONDS = config(
+    'OAUTH2_TOKEN_CACHE_SECONDS', default=60, cast=int)